@@ -2,8 +2,12 @@ import  time
 from b_CSPTimetableScheduler import CSPTimetableScheduler
 # ==================== MAIN PROGRAM ====================
 
-def main():
-    """Main entry point for the timetable scheduler."""
+def main(local_search=False, optimize_time_limit=None):
+    """
+    Main entry point for the timetable scheduler.
+    local_search: complete the timetable with local search if backtracking gets stuck
+    optimize_time_limit: seconds to improve soft constraints afterwards (None = skip)
+    """
     print("\n" + "=" * 80)
     print("CSP-BASED TIMETABLE SCHEDULER")
     print("=" * 80)
@@ -13,7 +17,11 @@ def main():
 
     # Generate timetable
     start_time = time.time()
-    success_count, failed_assignments = scheduler.generate_timetable()
+    success_count, failed_assignments = scheduler.generate_timetable(local_search=local_search)
+
+    # Optionally improve gaps, load balance, late slots and room changes (time-boxed)
+    if optimize_time_limit is not None:
+        scheduler.optimize_timetable(time_limit=optimize_time_limit)
     end_time = time.time()
 
     # Export to Excel
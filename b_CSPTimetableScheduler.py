@@ -1,8 +1,16 @@
-import pandas as pd
 from collections import defaultdict
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
 import random
+import time
+from bisect import bisect_left
+from e_forward_checking import ForwardChecker, NogoodStore, VariableHeap, merge_conflict
+from f_schedule_store import ScheduleStore
+from j_instrumentation import Instrumentation
+from k_database_loader import load_database
+from r_records import Assignment, ScheduledClass, Variable
 
 class CSPTimetableScheduler:
     """
@@ -15,41 +23,80 @@ class CSPTimetableScheduler:
         functions
         1. constructor✅
         2. get_consecutive_slot_pairs✅
-        3. find_suitable_rooms✅
-        4. find_suitable_labs✅
-        5. is_slot_available✅
-        6. is_actual_lab✅
-        7. is_course_already_scheduled_today✅
-        8. get_theory_domain✅
-        9. get_lab_domain✅
-        10. assign_class✅
-        11. unassign_class✅
-        12. generate_timetable
-        13. get_domain
-        14. select_next_variable
-        15. sort_key
-        16. backtrack
-        17. export_to_excel
-        18. print_statistics
+        3. build_capacity_index
+        4. find_suitable_rooms✅
+        5. find_suitable_labs✅
+        6. find_labs_with_capacity
+        7. get_window_mask
+        8. is_window_available
+        9. is_slot_available✅
+        10. is_actual_lab✅
+        11. is_course_already_scheduled_today✅
+        12. get_theory_domain✅
+        13. get_lab_domain✅
+        14. assign_class✅
+        15. add_class
+        16. unassign_class✅
+        17. assign_variable
+        18. unassign_variable
+        19. block_cell
+        20. load_schedule
+        21. load_schedule_file
+        22. build_variables
+        23. generate_timetable
+        24. solve_variables
+        25. rank_variable
+        26. select_next_variable
+        27. sort_key
+        28. backtrack
+        29. generate_timetable_portfolio
+        30. generate_timetable_decomposed
+        31. reschedule
+        32. repair_with_local_search
+        33. optimize_timetable
+        34. summarize_results
+        35. build_timetable_index
+        36. export_to_excel
+        37. export_to_csv
+        38. export_to_jsonl
+        39. export_to_parquet
+        40. print_statistics
     """
-    def __init__(self, excel_file='university_database.xlsx'):
+    def __init__(self, excel_file='university_database.xlsx', domain_engine='python',
+                 use_cache=True):
         """
         Initialize scheduler by loading all data from Excel file.
         Sets up lookup dictionaries and tracking structures.
+        domain_engine: 'python' (loops over bitmasks) or 'numpy' (vectorized
+                       TensorDomainEngine) to set up the forward checker's
+                       domains and for get_theory_domain/get_lab_domain.
+        use_cache: load from / write a binary cache next to the workbook
+                   (rebuilt automatically when the workbook changes)
         """
+        if domain_engine not in ('python', 'numpy'):
+            raise ValueError(f"Unknown domain engine: {domain_engine!r} (use 'python' or 'numpy')")
+        self.excel_file = excel_file
+        self.domain_engine = domain_engine
+
+        # Counters and per-phase timers (see j_instrumentation.Instrumentation)
+        self.stats = Instrumentation()
+        load_start = time.perf_counter()
+
         print("\n" + "=" * 80)
         print("LOADING UNIVERSITY DATABASE")
         print("=" * 80)
 
         # ==================== LOAD ALL DATA FROM EXCEL ====================
-        self.rooms = pd.read_excel(excel_file, sheet_name='Rooms').to_dict('records')
-        self.labs = pd.read_excel(excel_file, sheet_name='Labs').to_dict('records')
-        self.teachers = pd.read_excel(excel_file, sheet_name='Teachers').to_dict('records')
-        self.courses = pd.read_excel(excel_file, sheet_name='Courses').to_dict('records')
-        self.sections = pd.read_excel(excel_file, sheet_name='Sections').to_dict('records')
-        self.assignments = pd.read_excel(excel_file, sheet_name='Course_Assignments').to_dict('records')
-        self.time_slots = pd.read_excel(excel_file, sheet_name='Time_Slots').to_dict('records')
-        self.days = pd.read_excel(excel_file, sheet_name='Days').to_dict('records')
+        # Workbook parsed once (or read from its binary cache)
+        data = load_database(excel_file, use_cache)
+        self.rooms = data['Rooms']
+        self.labs = data['Labs']
+        self.teachers = data['Teachers']
+        self.courses = data['Courses']
+        self.sections = data['Sections']
+        self.assignments = data['Course_Assignments']
+        self.time_slots = data['Time_Slots']
+        self.days = data['Days']
 
         # ==================== CREATE FAST LOOKUP DICTIONARIES ====================
         # These allow O(1) lookups instead of scanning through lists
@@ -65,6 +112,10 @@ class CSPTimetableScheduler:
         for lab in self.labs:
             self.labs_by_type[lab['Lab_Type']].append(lab['Lab_Name'])
 
+        # ==================== CAPACITY INDEX ====================
+        # Rooms/labs sorted by strength so suitable resources are found with a bisect
+        self.build_capacity_index()
+
         # ==================== TIME SLOT INFORMATION ====================
         self.day_list = [d['Day_ID'] for d in self.days]  # ['MON', 'TUE', ...]
         self.slot_list = [s['Slot_ID'] for s in self.time_slots]  #['S1', 'S2', ...]
@@ -74,24 +125,54 @@ class CSPTimetableScheduler:
         self.slot_index = {slot_id: idx for idx, slot_id in enumerate(self.slot_list)}
 
         # ==================== SCHEDULE STORAGE ====================
-        self.schedule = []  # Final schedule will be stored here
+        # Final schedule will be stored here. Indexed by (day, slot, section, course)
+        # so classes are added/removed in O(1); iterating yields the class dicts
+        self.schedule = ScheduleStore()
+
+        # ==================== BITMASK OCCUPANCY ====================
+        # Every (day, slot) cell of the week gets one bit:
+        # bit index = day_index * slots_per_day + slot_index
+        slots_per_day = len(self.slot_list)
+        self.cell_bit = {(day, slot): 1 << (d_idx * slots_per_day + s_idx)
+                         for d_idx, day in enumerate(self.day_list)
+                         for s_idx, slot in enumerate(self.slot_list)}
 
         # ==================== CONSTRAINT TRACKING STRUCTURES ====================
-        # These track what's been scheduled to enforce constraints
+        # These track what's been scheduled to enforce constraints.
+        # Each owner has an int bitmask of busy cells, so an availability test
+        # is a single AND (missing owners are simply 0 - nothing is inserted)
 
-        # Track which teachers are busy at each (day, slot)
-        self.teacher_schedule = defaultdict(set)  # {(day, slot): {teacher_ids}}
+        # Track at which cells each teacher is busy
+        self.teacher_busy = {}  # {teacher_id: bitmask}
 
-        # Track which rooms/labs are occupied at each (day, slot)
-        self.room_schedule = defaultdict(set)  # {(day, slot): {room/lab names}}
+        # Track at which cells each room/lab is occupied
+        self.room_busy = {}  # {room/lab name: bitmask}
 
-        # Track which sections have classes at each (day, slot)
-        self.section_schedule = defaultdict(set)  # {(day, slot): {section_ids}}
+        # Track at which cells each section has a class
+        self.section_busy = {}  # {section_id: bitmask}
 
         # CRITICAL: Track which courses are scheduled on which days per section
         # Prevents same course appearing twice on same day (except consecutive lab slots)
         self.section_course_day = defaultdict(set)  # {(section_id, course_id): {days}}
 
+        # Cells where a teacher or room is unavailable (see block_cell);
+        # they stay set in teacher_busy/room_busy so no class is put there
+        self.teacher_blocked = {}  # {teacher_id: bitmask}
+        self.room_blocked = {}  # {room/lab name: bitmask}
+
+        # Set when the last search stopped on its time/node budget
+        self.budget_exhausted = False
+        # Set when the last search of an infeasible problem stopped on
+        # INFEASIBLE_NODES_PER_VARIABLE (not a budget the caller gave)
+        self.infeasible_cap_reached = False
+
+        # ==================== OPTIONAL NUMPY ENGINE ====================
+        # Mirrors the occupancy as boolean arrays to vectorize domain generation
+        self.tensor_engine = None
+        if domain_engine == 'numpy':
+            from g_tensor_engine import TensorDomainEngine
+            self.tensor_engine = TensorDomainEngine(self)
+
         # ==================== LOAD BALANCING ====================
         # Track how many classes each section has per day (for even distribution)
         self.section_day_load = defaultdict(lambda: defaultdict(int))  # {section: {day: count}}
@@ -100,6 +181,7 @@ class CSPTimetableScheduler:
         print(f"Loaded: {len(self.teachers)} Teachers, {len(self.courses)} Courses")
         print(f"Loaded: {len(self.sections)} Sections, {len(self.assignments)} Assignments")
         print("=" * 80 + "\n")
+        self.stats.add_time('load', time.perf_counter() - load_start)
 
     # ==================== HELPER METHODS FOR RESOURCE FINDING ====================
 
@@ -114,45 +196,111 @@ class CSPTimetableScheduler:
             pairs.append((self.slot_list[i], self.slot_list[i + 1]))
         return pairs
 
+    def build_capacity_index(self):
+        """
+        Build the static capacity index used by find_suitable_rooms/find_suitable_labs.
+        Rooms are sorted by Strength and split by Multimedia; labs are grouped
+        by Lab_Type and sorted by Strength. Each index entry is a pair of
+        parallel lists: (strengths, names).
+        """
+        def sorted_index(records, name_key):
+            records = sorted(records, key=lambda r: r.get('Strength', 0))
+            return ([r.get('Strength', 0) for r in records],
+                    [r[name_key] for r in records])
+
+        # Rooms split by multimedia equipment
+        self.room_index = {
+            True: sorted_index([r for r in self.rooms if r['Multimedia']], 'Room_Number'),
+            False: sorted_index([r for r in self.rooms if not r['Multimedia']], 'Room_Number'),
+        }
+
+        # Labs grouped by type, plus all labs together (for courses without a type)
+        self.lab_index = {lab_type: sorted_index([self.lab_dict[name] for name in names], 'Lab_Name')
+                          for lab_type, names in self.labs_by_type.items()}
+        self.all_labs_index = sorted_index(self.labs, 'Lab_Name')
+
+        # Memoized lookup results
+        self.suitable_rooms_cache = {}  # {(student_count, needs_multimedia): rooms}
+        self.suitable_labs_cache = {}  # {(lab_type, student_count): labs}
+
     def find_suitable_rooms(self, student_count, needs_multimedia):
         """
         Find all rooms that can accommodate the given number of students
         and have multimedia equipment if required.
+        Returns a tuple of room numbers, smallest sufficient rooms first.
+        Results are memoized (the tuple is shared between calls).
         """
-        suitable = []
-        for room in self.rooms:
-            # Check capacity
-            if room['Strength'] >= student_count:
-                # Check multimedia requirement
-                if not needs_multimedia or room['Multimedia']:
-                    suitable.append(room['Room_Number'])
+        key = (student_count, bool(needs_multimedia))
+        suitable = self.suitable_rooms_cache.get(key)
+        if suitable is None:
+            # Multimedia rooms are always acceptable; plain rooms only if not required
+            groups = [self.room_index[True]] if needs_multimedia else \
+                [self.room_index[True], self.room_index[False]]
+
+            candidates = []
+            for strengths, names in groups:
+                start = bisect_left(strengths, student_count)
+                candidates.extend(zip(strengths[start:], names[start:]))
+            candidates.sort(key=lambda item: item[0])
+
+            suitable = tuple(name for _, name in candidates)
+            self.suitable_rooms_cache[key] = suitable
         return suitable
 
     def find_suitable_labs(self, lab_type, student_count):
         """
         Find all labs of a specific type that can accommodate students.
         Prioritizes labs with sufficient capacity but includes smaller labs as backup.
+        Returns a tuple of lab names. Results are memoized.
         """
-        if lab_type not in self.labs_by_type:
-            return []
+        if lab_type not in self.lab_index:
+            return ()
+
+        key = (lab_type, student_count)
+        suitable = self.suitable_labs_cache.get(key)
+        if suitable is None:
+            strengths, names = self.lab_index[lab_type]
+            split = bisect_left(strengths, student_count)
+
+            # Sufficient labs first (smallest fit first), then largest backups first
+            suitable = tuple(names[split:]) + tuple(reversed(names[:split]))
+            self.suitable_labs_cache[key] = suitable
+        return suitable
 
-        # Get all labs of this type
-        candidate_labs = self.labs_by_type[lab_type]
+    def find_labs_with_capacity(self, student_count):
+        """
+        Find labs of any type that can accommodate the given number of students.
+        Used for lab courses that don't require a specific lab type.
+        """
+        key = (None, student_count)
+        suitable = self.suitable_labs_cache.get(key)
+        if suitable is None:
+            strengths, names = self.all_labs_index
+            suitable = tuple(names[bisect_left(strengths, student_count):])
+            self.suitable_labs_cache[key] = suitable
+        return suitable
 
-        # Separate into sufficient and insufficient capacity
-        sufficient = []
-        insufficient = []
-        for lab_name in candidate_labs:
-            lab = self.lab_dict[lab_name]
-            if lab.get('Strength', 0) >= student_count:
-                sufficient.append(lab_name)
-            else:
-                insufficient.append(lab_name)
+    # ==================== CONSTRAINT CHECKING ====================
 
-        # Return sufficient labs first, then insufficient as backup
-        return sufficient + insufficient
+    def get_window_mask(self, day, slots):
+        """
+        Bitmask covering the given slots of one day.
+        E.g. a lab on (MON, S1, S2) gives a two-bit window.
+        """
+        mask = 0
+        for slot in slots:
+            mask |= self.cell_bit[(day, slot)]
+        return mask
 
-    # ==================== CONSTRAINT CHECKING ====================
+    def is_window_available(self, mask, section_id, teacher_id, resource):
+        """
+        Check if every cell in the bitmask window is free for the
+        section, the teacher and the room/lab (one AND across three ints).
+        """
+        busy = (self.section_busy.get(section_id, 0) |
+                self.teacher_busy.get(teacher_id, 0) |
+                self.room_busy.get(resource, 0))
+        return not (busy & mask)
 
     def is_slot_available(self, day, slot, section_id, teacher_id, resource):
         """
@@ -162,21 +310,8 @@ class CSPTimetableScheduler:
         2. Teacher must be free (teacher can't teach two classes simultaneously)
         3. Room/Lab must be free (room can't host two classes at once)
         """
-        key = (day, slot)
-
-        # Check if section already has a class at this time
-        if section_id in self.section_schedule[key]:
-            return False
-
-        # Check if teacher is already teaching at this time
-        if teacher_id in self.teacher_schedule[key]:
-            return False
-
-        # Check if room/lab is already occupied at this time
-        if resource in self.room_schedule[key]:
-            return False
-
-        return True  # All constraints satisfied
+        return self.is_window_available(self.cell_bit[(day, slot)],
+                                        section_id, teacher_id, resource)
 
     def is_actual_lab(self, resource_name):
         """
@@ -196,7 +331,7 @@ class CSPTimetableScheduler:
     # ==================== DOMAIN GENERATION ====================
     # Domains = all possible (day, slot, room) combinations for a class
 
-    def get_theory_domain(self, assignment, is_2hour):
+    def get_theory_domain(self, assignment, is_2hour, skip_scheduled_days=False):
         """
             assignment = {
         'Assignment_ID': 101,
@@ -206,6 +341,8 @@ class CSPTimetableScheduler:
         'Student_Count': 40,
         'Type': 'theory'  # or 'lab'    }
         Generate all possible scheduling options for a theory class.
+        If skip_scheduled_days is set, days on which the course is already
+        scheduled for the section are left out.
         Returns: List of (day, slot, room) tuples representing valid choices.
         """
         section_id = assignment['Section_ID']
@@ -223,20 +360,37 @@ class CSPTimetableScheduler:
         else:
             slot_options = self.slot_list  # Regular classes can use any slot
 
+        blocked_days = self.section_course_day.get((section_id, assignment['Course_ID']), ()) \
+            if skip_scheduled_days else ()
+
+        if self.tensor_engine is not None:
+            return self.tensor_engine.theory_domain(section_id, teacher_id, suitable_rooms,
+                                                    slot_options, blocked_days)
+
+        # Section and teacher occupancy is the same for every room
+        people_busy = self.section_busy.get(section_id, 0) | self.teacher_busy.get(teacher_id, 0)
+
         # Build all possible (day, slot, room) combinations
         domain = []
         for day in self.day_list:
+            if day in blocked_days:
+                continue
             for slot in slot_options:
+                bit = self.cell_bit.get((day, slot), 0)
+                if not bit or people_busy & bit:
+                    continue
                 for room in suitable_rooms:
-                    if self.is_slot_available(day, slot, section_id, teacher_id, room):
+                    if not self.room_busy.get(room, 0) & bit:
                         domain.append((day, slot, room))
 
         return domain
 
-    def get_lab_domain(self, assignment):
+    def get_lab_domain(self, assignment, skip_scheduled_days=False):
         """
         Generate all possible scheduling options for a lab session.
         Labs need 2 consecutive slots.
+        If skip_scheduled_days is set, days on which the course is already
+        scheduled for the section are left out.
         Returns: List of (day, slot1, slot2, lab) tuples.
         """
         section_id = assignment['Section_ID']
@@ -248,8 +402,7 @@ class CSPTimetableScheduler:
         # Find suitable labs
         if not lab_type:
             # No specific type required - any lab with sufficient capacity
-            suitable_labs = [l['Lab_Name'] for l in self.labs
-                             if l.get('Strength', 0) >= student_count]
+            suitable_labs = self.find_labs_with_capacity(student_count)
         else:
             # Find labs of the required type
             suitable_labs = self.find_suitable_labs(lab_type, student_count)
@@ -258,17 +411,30 @@ class CSPTimetableScheduler:
         if not suitable_labs:
             suitable_labs = self.find_suitable_rooms(student_count, needs_multimedia=False)
 
+        blocked_days = self.section_course_day.get((section_id, assignment['Course_ID']), ()) \
+            if skip_scheduled_days else ()
+
+        if self.tensor_engine is not None:
+            return self.tensor_engine.lab_domain(section_id, teacher_id, suitable_labs, blocked_days)
+
         # Get consecutive slot pairs
         slot_pairs = self.get_consecutive_slot_pairs()
 
+        # Section and teacher occupancy is the same for every lab
+        people_busy = self.section_busy.get(section_id, 0) | self.teacher_busy.get(teacher_id, 0)
+
         # Build all possible (day, slot1, slot2, lab) combinations
         domain = []
         for day in self.day_list:
+            if day in blocked_days:
+                continue
             for slot1, slot2 in slot_pairs:
+                # Both consecutive slots must be available: one two-bit window
+                window = self.get_window_mask(day, (slot1, slot2))
+                if people_busy & window:
+                    continue
                 for lab in suitable_labs:
-                    # Both consecutive slots must be available
-                    if (self.is_slot_available(day, slot1, section_id, teacher_id, lab) and
-                            self.is_slot_available(day, slot2, section_id, teacher_id, lab)):
+                    if not self.room_busy.get(lab, 0) & window:
                         domain.append((day, slot1, slot2, lab))
 
         return domain
@@ -279,26 +445,33 @@ class CSPTimetableScheduler:
         """
         Assign a class to the schedule and update all tracking structures.
         This ensures constraints are maintained as we build the schedule.
+        assignment_info: anything with 'Assignment_ID', 'Course_ID' and 'Type'
+        (e.g. a schedule row dict or ScheduledClass).
         """
-        course_id = assignment_info['Course_ID']
+        self.add_class(ScheduledClass(assignment_info['Assignment_ID'], section_id,
+                                      assignment_info['Course_ID'], teacher_id,
+                                      day, slot, resource, assignment_info['Type']))
+
+    def add_class(self, entry):
+        """Add a ScheduledClass record to the schedule and the tracking structures."""
+        day = entry.day
+        slot = entry.slot
+        section_id = entry.section_id
+        teacher_id = entry.teacher_id
+        resource = entry.room_or_lab
+        course_id = entry.course_id
 
         # Add to the main schedule
-        self.schedule.append({
-            'Assignment_ID': assignment_info['Assignment_ID'],
-            'Section_ID': section_id,
-            'Course_ID': course_id,
-            'Teacher_ID': teacher_id,
-            'Day': day,
-            'Slot': slot,
-            'Room_or_Lab': resource,
-            'Type': assignment_info['Type']
-        })
+        self.schedule.add(entry)
 
         # Update constraint tracking structures
-        key = (day, slot)
-        self.section_schedule[key].add(section_id)  # Mark section as busy
-        self.teacher_schedule[key].add(teacher_id)  # Mark teacher as busy
-        self.room_schedule[key].add(resource)  # Mark room/lab as occupied
+        bit = self.cell_bit[(day, slot)]
+        self.section_busy[section_id] = self.section_busy.get(section_id, 0) | bit  # Mark section as busy
+        self.teacher_busy[teacher_id] = self.teacher_busy.get(teacher_id, 0) | bit  # Mark teacher as busy
+        if resource is not None:  # Phase one of two-phase solving has no room yet
+            self.room_busy[resource] = self.room_busy.get(resource, 0) | bit  # Mark room/lab as occupied
+        if self.tensor_engine is not None:
+            self.tensor_engine.set_busy(day, slot, section_id, teacher_id, resource, True)
 
         # Mark this course as scheduled on this day for this section
         self.section_course_day[(section_id, course_id)].add(day)
@@ -311,34 +484,190 @@ class CSPTimetableScheduler:
         Remove a class from the schedule (used during backtracking).
         Reverses all changes made by assign_class.
         """
-        # Remove from main schedule
-        self.schedule = [c for c in self.schedule
-                         if not (c['Day'] == day and c['Slot'] == slot and
-                                 c['Section_ID'] == section_id and c['Course_ID'] == course_id)]
+        # Remove from main schedule (returns classes of this course still on this day)
+        still_scheduled_today = self.schedule.remove(day, slot, section_id, course_id)
 
         # Update constraint tracking structures
-        key = (day, slot)
-        self.section_schedule[key].discard(section_id)
-        self.teacher_schedule[key].discard(teacher_id)
-        self.room_schedule[key].discard(resource)
+        keep = ~self.cell_bit[(day, slot)]
+        self.section_busy[section_id] &= keep
+        self.teacher_busy[teacher_id] &= keep
+        if resource is not None:
+            self.room_busy[resource] &= keep
+        if self.tensor_engine is not None:
+            self.tensor_engine.set_busy(day, slot, section_id, teacher_id, resource, False)
 
         # Check if this was the last class of this course on this day
-        still_scheduled_today = any(
-            c for c in self.schedule
-            if c['Section_ID'] == section_id and c['Course_ID'] == course_id and c['Day'] == day
-        )
         if not still_scheduled_today:
             self.section_course_day[(section_id, course_id)].discard(day)
 
         # Update day load
         self.section_day_load[section_id][day] -= 1
 
+    def assign_variable(self, var, value):
+        """
+        Assign a domain value to a variable (one theory class or one lab session).
+        value: (day, slot, room) for theory, (day, slot1, slot2, lab) for labs.
+        Labs occupy both consecutive slots.
+        """
+        assignment = var.assignment
+        day = value[0]
+        resource = value[-1]
+
+        if var.kind == 'theory':
+            course = self.course_dict[assignment.course_id]
+            class_type = '2 Hour Class' if course['Is_2Hour_Special'] else '1.5 Hr Class'
+        else:
+            class_type = f"Lab: {resource}"
+
+        for slot in value[1:-1]:
+            self.add_class(ScheduledClass(assignment.assignment_id, assignment.section_id,
+                                          assignment.course_id, assignment.teacher_id,
+                                          day, slot, resource, class_type))
+
+    def unassign_variable(self, var, value):
+        """Reverse assign_variable (used during backtracking)."""
+        assignment = var.assignment
+        day = value[0]
+        resource = value[-1]
+
+        for slot in value[1:-1]:
+            self.unassign_class(day, slot, assignment.section_id,
+                                assignment.teacher_id, resource, assignment.course_id)
+
+    def block_cell(self, kind, owner_id, day, slot):
+        """
+        Mark a teacher or a room/lab as unavailable at (day, slot).
+        kind: 'teacher' or 'room'. Any class already there must be removed first.
+        """
+        if kind == 'teacher':
+            blocked, busy = self.teacher_blocked, self.teacher_busy
+        elif kind == 'room':
+            blocked, busy = self.room_blocked, self.room_busy
+        else:
+            raise ValueError(f"Unknown block kind: {kind!r} (use 'teacher' or 'room')")
+
+        bit = self.cell_bit[(day, slot)]
+        blocked[owner_id] = blocked.get(owner_id, 0) | bit
+        busy[owner_id] = busy.get(owner_id, 0) | bit
+        if self.tensor_engine is not None:
+            self.tensor_engine.block(kind, owner_id, day, slot)
+
+    def load_schedule(self, entries):
+        """
+        Replace the current schedule with the given class dicts (schedule row
+        format, or ScheduledClass records) and rebuild every tracking structure
+        from them.
+        """
+        self.schedule.clear()
+        self.teacher_busy.clear()
+        self.room_busy.clear()
+        self.section_busy.clear()
+        self.section_course_day.clear()
+        self.section_day_load.clear()
+        if self.tensor_engine is not None:
+            from g_tensor_engine import TensorDomainEngine
+            self.tensor_engine = TensorDomainEngine(self)
+
+        # Unavailable cells stay unavailable
+        for kind, blocked in (('teacher', self.teacher_blocked), ('room', self.room_blocked)):
+            for owner_id, mask in list(blocked.items()):
+                for (day, slot), bit in self.cell_bit.items():
+                    if mask & bit:
+                        self.block_cell(kind, owner_id, day, slot)
+
+        for entry in entries:
+            self.add_class(ScheduledClass.from_row(entry))
+
+    def load_schedule_file(self, input_file):
+        """Load a timetable saved with export_to_csv/export_to_jsonl/export_to_parquet."""
+        from l_flat_export import read_flat_schedule
+        self.load_schedule(read_flat_schedule(self, input_file))
+        print(f"✓ Schedule loaded: {input_file} ({len(self.schedule)} classes)")
+
     # ==================== CSP BACKTRACKING ALGORITHM ====================
 
-    def generate_timetable(self):
+    # Variable ordering heuristics for generate_timetable
+    HEURISTICS = ('earliest-slot', 'mrv', 'labs-first')
+    # Value ordering modes for generate_timetable
+    VALUE_ORDERS = ('morning-first', 'lcv')
+    # Nodes per variable the search may spend on a problem known to be infeasible
+    # (an exhaustive search of one may never finish, and local search can use the
+    # rest of the time limit to complete the partial timetable). Reaching it ends
+    # the search like an exhausted one and sets infeasible_cap_reached, not
+    # budget_exhausted.
+    INFEASIBLE_NODES_PER_VARIABLE = 10
+
+    def build_variables(self, assignments):
+        """
+        One "variable" per class session to schedule: a theory variable for
+        each weekly theory class and one lab variable if the course has a lab.
+        """
+        variables = []
+        """
+            Variable('lab', Assignment(101, 'SEC-A', 'CSE101', 'T1', 40))
+        """
+        for row in assignments:
+            course = self.course_dict[row['Course_ID']]
+            # One record per row, shared by all sessions of the assignment
+            assignment = Assignment.from_row(row)
+
+            # Add one variable for each theory class per week
+            for t_idx in range(course['Theory_Classes_Per_Week']):
+                variables.append(Variable('theory', assignment, t_idx))
+
+            # Add one variable for lab if course has a lab
+            if course.get('Has_Lab'):
+                variables.append(Variable('lab', assignment))
+        return variables
+
+    def generate_timetable(self, arc_consistency=True, maintain_arc_consistency=False,
+                           backjumping=True, heuristic='earliest-slot', time_limit=None,
+                           node_limit=None, two_phase=False, local_search=False,
+                           symmetry_breaking=True, value_order='morning-first'):
         """
         Main timetable generation using CSP with backtracking.
 
+        arc_consistency: run an AC-3 pre-pass that shrinks domains before search
+        maintain_arc_consistency: re-run AC-3 after every assignment (MAC)
+        backjumping: conflict-directed backjumping with nogood learning
+                     (False = plain chronological backtracking)
+        heuristic: which variable to schedule next
+                   'earliest-slot' -> earliest free slot first, MRV as tie-breaker
+                   'mrv'           -> smallest domain first, earliest slot as tie-breaker
+                   'labs-first'    -> all lab sessions before theory classes
+        time_limit: seconds before the search stops (None = no limit)
+        node_limit: assignments tried before the search stops (None = no limit)
+                    When a budget runs out, the most complete assignment seen
+                    during the search is kept (not just the current one), the
+                    scheduler stays consistent for export and self.stats holds
+                    the search statistics (budget_exhausted is set).
+                    A timetable that can't be complete (e.g. a lab capacity
+                    shortfall) is still searched for its most complete
+                    version, for at most INFEASIBLE_NODES_PER_VARIABLE nodes
+                    per class (infeasible_cap_reached is set when it stops
+                    there; budget_exhausted is not).
+        two_phase: phase one searches only the time of each theory class
+                   (checking each time still has room capacity), phase two
+                   matches classes to rooms per time slot and fits in what
+                   phase one left out (see q_room_matching)
+        local_search: if the search fails, complete the partial timetable
+                      with min-conflicts local search (within what is left
+                      of time_limit, see repair_with_local_search)
+        symmetry_breaking: explore one representative of interchangeable
+                           choices - the theory sessions of an assignment
+                           take increasing days, and of several free rooms
+                           (labs) with the same attributes only one is tried
+                           (labs also need the same busy cells that day)
+        value_order: which value to try first
+                     'morning-first' -> earliest slot, then least loaded day
+                     'lcv'           -> earliest slot first, then least
+                                        constraining value (fewest time options
+                                        taken from other classes) instead of
+                                        least loaded day. Worth it on tight
+                                        instances (fewer dead ends); each node
+                                        costs about twice as much, so on roomy
+                                        ones morning-first is faster
+
         Algorithm:
         1. Create a list of all "variables" (classes to schedule)
         2. Use MRV heuristic to select which class to schedule next
@@ -346,276 +675,538 @@ class CSPTimetableScheduler:
         4. If assignment leads to solution, keep it
         5. If assignment fails, backtrack and try next option
         6. Prioritize morning slots to fill early time slots first
+        7. Forward checking keeps every domain pruned incrementally (no rebuilding)
+        8. Arc consistency removes values that can't be part of any solution
+        9. Dead ends jump back to the decision that caused them (backjumping)
         """
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"Unknown heuristic: {heuristic!r} (use one of {self.HEURISTICS})")
+        if value_order not in self.VALUE_ORDERS:
+            raise ValueError(f"Unknown value order: {value_order!r} (use one of {self.VALUE_ORDERS})")
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        # Fresh counters for this run (loading happened once, in __init__)
+        stats = self.stats
+        stats.reset(keep=('load',))
+        phase_start = time.perf_counter()
+
         print("=" * 80)
         print("GENERATING TIMETABLE USING CSP WITH BACKTRACKING")
         print("=" * 80 + "\n")
 
         # ==================== BUILD VARIABLE LIST ====================
         # Each class session (theory or lab) is a "variable" to assign
-        variables = []
-        """
-            {
-                'kind': 'lab',
-                'assignment': {
-                    'Assignment_ID': 101,
-                    'Section_ID': 'SEC-A',
-                    'Course_ID': 'CSE101',
-                    'Teacher_ID': 'T1',
-                    'Student_Count': 40,
-                    'Type': 'lab'
-                }
-            }
-        """
-        for assignment in self.assignments:
-            course = self.course_dict[assignment['Course_ID']]
-
-            # Add one variable for each theory class per week
-            for t_idx in range(course['Theory_Classes_Per_Week']):
-                variables.append({
-                    'kind': 'theory',
-                    'assignment': assignment,
-                    'index': t_idx
-                })
-
-            # Add one variable for lab if course has a lab
-            if course.get('Has_Lab'):
-                variables.append({
-                    'kind': 'lab',
-                    'assignment': assignment
-                })
+        build_start = time.perf_counter()
+        variables = self.build_variables(self.assignments)
 
         # Shuffle to avoid bias toward certain sections being scheduled first
         random.shuffle(variables)
+        stats.add_time('build_variables', time.perf_counter() - build_start)
 
-        # ==================== HELPER FUNCTIONS ====================
+        # ==================== RUN BACKTRACKING ====================
+        nodes_start = stats.counters['nodes']
+        solved = self.solve_variables(variables, arc_consistency, maintain_arc_consistency,
+                                      backjumping, heuristic, deadline, node_limit, two_phase,
+                                      symmetry_breaking, value_order, keep_best=True)
+
+        # ==================== ROOM MATCHING (PHASE TWO) ====================
+        if two_phase and not solved:
+            from q_room_matching import RoomMatcher
+            # Only the nodes phase one left over
+            nodes_used = stats.counters['nodes'] - nodes_start
+            nodes_left = None if node_limit is None else max(0, node_limit - nodes_used)
+            solved = RoomMatcher(self).run(
+                deadline=deadline, arc_consistency=arc_consistency,
+                maintain_arc_consistency=maintain_arc_consistency,
+                backjumping=backjumping, heuristic=heuristic, node_limit=nodes_left,
+                symmetry_breaking=symmetry_breaking, value_order=value_order)
+
+        # ==================== LOCAL SEARCH REPAIR ====================
+        if local_search and not solved:
+            from n_local_search import MinConflictsRepair
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            MinConflictsRepair(self).run(time_limit=remaining)
+        stats.add_time('generate_timetable', time.perf_counter() - phase_start)
+
+        return self.summarize_results()
+
+    def solve_variables(self, variables, arc_consistency=True, maintain_arc_consistency=False,
+                        backjumping=True, heuristic='earliest-slot', deadline=None,
+                        node_limit=None, two_phase=False, symmetry_breaking=True,
+                        value_order='morning-first', keep_best=False):
+        """
+        Search for values of the given variables (see generate_timetable for
+        the options). Classes already in the schedule stay where they are and
+        only restrict the domains. deadline: time.perf_counter() value at which
+        to stop (None = no limit); node_limit: assignments this search may try.
+        When either budget runs out, the most complete assignment found so
+        far is put in the schedule and self.budget_exhausted is set. A search
+        of an infeasible problem also stops after INFEASIBLE_NODES_PER_VARIABLE
+        nodes per variable; it then ends like an exhausted search (see
+        keep_best) and self.infeasible_cap_reached is set instead.
+        two_phase: branch on times only for theory classes, counting the
+        rooms each (day, slot) has left; the classes get their rooms when the
+        search is over (q_room_matching.RoomMatcher.seat_classes).
+        symmetry_breaking: sibling theory sessions in day order and one room
+        per equivalence class (see ForwardChecker).
+        value_order: 'lcv' ranks the values of each slot by their impact on
+        other classes' domains (ForwardChecker.value_impacts).
+        keep_best: if the search fails without running out of budget, also
+        keep the most complete assignment found. Otherwise a failed search
+        leaves the schedule as it was, unless it stopped on its budget or
+        only sessions with no possible value are missing.
+        Returns True if every variable was assigned.
+        """
+        stats = self.stats
+        self.budget_exhausted = False
+        self.infeasible_cap_reached = False
+        node_stop = None if node_limit is None else stats.counters['nodes'] + node_limit
+        infeasible_stop = None
+
+        # Give each variable an id so the forward checker can index it
+        for var_id, var in enumerate(variables):
+            var.id = var_id
+        stats.count('variables', len(variables))
+
+        # ==================== FORWARD CHECKING ====================
+        # Keeps every variable's live domain up to date as classes are assigned,
+        # so domains are pruned incrementally instead of rebuilt on every step
+        with stats.phase('domain_generation'):
+            checker = ForwardChecker(self, variables, symmetry_breaking=symmetry_breaking,
+                                     impacts=value_order == 'lcv', two_phase=two_phase)
+        nogoods = NogoodStore()
+
+        # ==================== ARC CONSISTENCY PRE-PASS ====================
+        # Capacity shortfalls (e.g. too few lab slots) make a complete timetable
+        # impossible. The search still runs for the most complete one, without
+        # the pre-pass pruning (which only holds for complete timetables).
+        consistent = True
+        if arc_consistency:
+            shortfalls = checker.capacity_report()
+            for message in shortfalls:
+                print(f"  ⚠️  {message}")
+            with stats.phase('arc_consistency'):
+                consistent = not shortfalls and checker.propagate()
+            stats.count('ac_pruned', checker.pruned)
+            print(f"AC-3 pre-pass removed {checker.pruned} time options"
+                  + ("" if consistent else " (problem is infeasible - searching for the "
+                                           "most complete timetable)") + "\n")
+            if not consistent and checker.pruned:
+                with stats.phase('domain_generation'):
+                    checker = ForwardChecker(self, variables, symmetry_breaking=symmetry_breaking,
+                                             impacts=value_order == 'lcv', two_phase=two_phase)
+
+        # Sessions with no option at all can't be placed by any search; leaving
+        # them out lets the others be searched (a partial timetable at best)
+        impossible = [var for var in variables if checker.domain_size(var) == 0]
+        if impossible:
+            print(f"{len(impossible)} sessions have no possible time/room - searching without them\n")
+        if not consistent or impossible:
+            infeasible_stop = stats.counters['nodes'] + self.INFEASIBLE_NODES_PER_VARIABLE * len(variables)
+
+        # ==================== SYMMETRY BREAKING ====================
+        if symmetry_breaking:
+            classes = checker.resource_class
+            print(f"Symmetry breaking: {checker.sibling_groups} groups of interchangeable sessions "
+                  f"in day order, {len(classes)} rooms/labs in {len(set(classes.values()))} "
+                  f"equivalence classes\n")
 
-        def get_domain(var):
-            """Get all possible scheduling options for a variable."""
-            assignment = var['assignment']
-            if var['kind'] == 'theory':
-                course = self.course_dict[assignment['Course_ID']]
-                return self.get_theory_domain(assignment, course['Is_2Hour_Special'])
-            else:
-                return self.get_lab_domain(assignment)
+        # ==================== HELPER FUNCTIONS ====================
 
-        def select_next_variable(unassigned):
+        def rank_variable(var):
             """
-            Select which variable to schedule next using:
+            Heap key of a variable. By default ('earliest-slot'):
             1. Earliest available slot (prioritize morning classes)
             2. MRV (Minimum Remaining Values) as tie-breaker
+            3. Degree (most neighbours in the constraint graph), then variable order
 
             This ensures morning slots fill up before afternoon slots.
+            The other heuristics only change the order of these criteria.
+            A variable with no options left ranks before everything else.
             """
-            best_var = None
-            best_domain = None
-            best_earliest_slot = 999
-
-            for var in unassigned:
-                # Get all possible options for this variable
-                domain = get_domain(var)
-
-                # Filter domain by current constraints
-                filtered_domain = []
-
-                if var['kind'] == 'theory':
-                    # Filter theory class options
-                    for (day, slot, room) in domain:
-                        # Skip if course already scheduled today
-                        if self.is_course_already_scheduled_today(
-                                var['assignment']['Section_ID'],
-                                var['assignment']['Course_ID'],
-                                day
-                        ):
-                            continue
-
-                        # Skip if slot not available
-                        if not self.is_slot_available(
-                                day, slot,
-                                var['assignment']['Section_ID'],
-                                var['assignment']['Teacher_ID'],
-                                room
-                        ):
-                            continue
-
-                        filtered_domain.append((day, slot, room))
+            size = checker.domain_size(var)
+            if size == 0:
+                return (-1,)
+            earliest_slot = checker.earliest_slot(var)
+            degree = -len(checker.neighbors[var.id])
+
+            if heuristic == 'earliest-slot':
+                return (earliest_slot, size, degree)
+            elif heuristic == 'mrv':
+                return (size, earliest_slot, degree)
+            else:  # labs-first
+                return (var.kind != 'lab', earliest_slot, size, degree)
 
-                else:  # Lab
-                    # Filter lab options (need 2 consecutive slots)
-                    for (day, s1, s2, lab) in domain:
-                        # Skip if not actual lab
-                        if not self.is_actual_lab(lab):
-                            continue
-
-                        # Skip if course already scheduled today
-                        if self.is_course_already_scheduled_today(
-                                var['assignment']['Section_ID'],
-                                var['assignment']['Course_ID'],
-                                day
-                        ):
-                            continue
-
-                        # Skip if either slot not available
-                        if not (self.is_slot_available(day, s1,
-                                                       var['assignment']['Section_ID'],
-                                                       var['assignment']['Teacher_ID'], lab) and
-                                self.is_slot_available(day, s2,
-                                                       var['assignment']['Section_ID'],
-                                                       var['assignment']['Teacher_ID'], lab)):
-                            continue
+        def select_next_variable(unassigned):
+            """
+            Select which variable to schedule next: the top of the variable
+            heap (see rank_variable). Only variables whose domains changed
+            since the last selection are re-ranked.
+            """
+            select_start = time.perf_counter()
+            refreshed = unassigned.refreshed
+            best_var = unassigned.best()
+            stats.count('candidates_scanned', unassigned.refreshed - refreshed)
 
-                        filtered_domain.append((day, s1, s2, lab))
+            # If no options, this variable is most constrained
+            if best_var is not None and checker.domain_size(best_var) == 0:
+                stats.add_time('select_variable', time.perf_counter() - select_start)
+                return best_var, []
 
-                # Sort domain: prioritize morning slots, then low-load days
-                def sort_key(item):
-                    day = item[0]
-                    slot = item[1]
-                    section = var['assignment']['Section_ID']
+            sort_start = time.perf_counter()
+            stats.add_time('select_variable', sort_start - select_start)
+            if best_var is None:
+                return None, None
 
-                    slot_priority = self.slot_index.get(slot, 999)
-                    day_load = self.section_day_load[section][day]
+            # Sort domain: prioritize morning slots, then low-load days
+            section = best_var.assignment.section_id
 
-                    return (slot_priority, day_load, random.random())
+            def sort_key(item):
+                day = item[0]
+                slot = item[1]
 
-                filtered_domain = sorted(filtered_domain, key=sort_key)
+                slot_priority = self.slot_index.get(slot, 999)
+                day_load = self.section_day_load[section][day]
 
-                # If no options, this variable is most constrained
-                if len(filtered_domain) == 0:
-                    return var, filtered_domain
+                return (slot_priority, day_load, random.random())
 
-                # Find earliest available slot for this variable
-                first_option = filtered_domain[0]
-                slot = first_option[1]
-                earliest_slot = self.slot_index.get(slot, 999)
+            if two_phase and best_var.kind == 'theory':
+                # Phase one: one value per time with room capacity left, no room yet
+                values = checker.get_time_values(best_var)
+            else:
+                values = checker.get_values(best_var)
+            if value_order == 'lcv':
+                # Earliest slot first as usual, then least constraining value
+                # (ranking by impact alone spreads classes over the afternoon
+                # and packs tight instances badly)
+                impacts = checker.value_impacts(best_var, values)
+                keys = [sort_key(value) for value in values]
+                order = sorted(range(len(values)), key=lambda i: (keys[i][0], impacts[i], keys[i]))
+                domain = [values[i] for i in order]
+            else:
+                domain = sorted(values, key=sort_key)
+            stats.add_time('sort_domain', time.perf_counter() - sort_start)
+            stats.count('domain_values', len(domain))
+            return best_var, domain
 
-                # Select variable with earliest available slot
-                if best_var is None:
-                    best_var = var
-                    best_domain = filtered_domain
-                    best_earliest_slot = earliest_slot
-                elif earliest_slot < best_earliest_slot:
-                    # This variable can use earlier slot - prioritize it
-                    best_var = var
-                    best_domain = filtered_domain
-                    best_earliest_slot = earliest_slot
-                elif earliest_slot == best_earliest_slot and len(filtered_domain) < len(best_domain):
-                    # Same earliest slot, use MRV (smaller domain)
-                    best_var = var
-                    best_domain = filtered_domain
-                    best_earliest_slot = earliest_slot
+        # ==================== BACKTRACKING SEARCH ====================
 
-            return best_var, best_domain
+        unassigned = VariableHeap(checker, rank_variable,
+                                  [var for var in variables if checker.domain_size(var) > 0])
 
-        # ==================== BACKTRACKING SEARCH ====================
+        def assign_value(var, value):
+            """
+            Assign a value and (with MAC) propagate.
+            Returns False if propagation wiped out a domain; the assignment is
+            still on the checker's stack so the caller undoes it as usual.
+            """
+            stats.count('nodes')
+            start = time.perf_counter()
+            checker.assign(var, value)
+            stats.add_time('assign', time.perf_counter() - start)
+            if maintain_arc_consistency:
+                with stats.phase('propagate'):
+                    return checker.propagate(var)
+            return True
+
+        def unassign_value():
+            """Undo the latest assignment."""
+            start = time.perf_counter()
+            checker.undo()
+            stats.add_time('unassign', time.perf_counter() - start)
+
+        # ==================== ANYTIME SEARCH ====================
+        # Most complete assignment seen so far, as [(var, value)]. The search
+        # only goes deeper between dead ends, so it is enough to save the
+        # stack when a dead end is reached deeper than the best one.
+        best = []
+
+        def save_if_best():
+            if len(checker.stack) > len(best):
+                best[:] = [(var, value) for _, var, value in checker.stack]
+
+        def restore_best(reason):
+            """Leave the best assignment seen in the schedule."""
+            save_if_best()
+            if len(best) > len(checker.stack):
+                while checker.stack:
+                    unassign_value()
+                for var, value in best:
+                    self.assign_variable(var, value)
+            stats.counters['best_assigned'] = len(best)
+            print(f"{reason.replace('_', ' ').capitalize()} - keeping the most complete assignment "
+                  f"found: {len(best)} of {len(variables)} classes\n")
+
+        def stop_with_best(reason):
+            """Budget exhausted: leave the best assignment in the schedule."""
+            self.budget_exhausted = True
+            stats.count(reason)
+            restore_best(reason)
+            return False
 
-        unassigned = variables.copy()
+        def stop_at_infeasible_cap():
+            """
+            Node cap of an infeasible problem reached: end as if the search
+            was exhausted (keep_best decides what stays in the schedule).
+            """
+            self.infeasible_cap_reached = True
+            stats.count('infeasible_cap_reached')
+            save_if_best()
+            while checker.stack:
+                unassign_value()
+            return False
 
         def backtrack():
             """
-            Recursive backtracking function.
+            Iterative backtracking with an explicit stack of choice points.
+            Each choice point is [var, domain, index of the value currently tried,
+            conflict set {level: time_only}, failed times {time: conflict set}];
+            a variable's decision level is its position in the stack.
+            Never hits Python's recursion limit.
+
+            With backjumping, a dead end jumps straight back to the deepest
+            decision that caused it (conflict-directed backjumping) and the
+            failing combination is stored as a nogood so it is never tried again.
+            If a failure only depended on a decision's time (not its room), the
+            other rooms at that time are skipped as well.
+            Without it, values are explored in plain chronological order.
             Returns True if all variables successfully assigned, False otherwise.
+            When a budget runs out, the most complete assignment seen is kept.
             """
-            # Base case: all variables assigned - success!
-            if not unassigned:
-                return True
+            choice_points = []
+
+            def try_values(choice):
+                """Assign the next untried value of a choice point. False if none is left."""
+                level = len(choice_points) - 1
+                var, domain, _, conflict, failed_times = choice
+                while choice[2] + 1 < len(domain):
+                    choice[2] += 1
+                    value = domain[choice[2]]
+
+                    if backjumping:
+                        # Skip rooms at a time that already failed regardless of room
+                        if value[:-1] in failed_times:
+                            merge_conflict(conflict, failed_times[value[:-1]])
+                            stats.count('failed_time_skips')
+                            continue
 
-            # Select next variable to assign
-            var, domain = select_next_variable(unassigned)
+                        # Skip values that would complete a learned nogood
+                        others = nogoods.violated_by(var.id, value, checker.current)
+                        if others is not None:
+                            merge_conflict(conflict, {checker.level[v]: False for v, _ in others})
+                            stats.count('nogood_skips')
+                            continue
+
+                    if assign_value(var, value):
+                        return True
 
-            # No valid options - dead end, backtrack
-            if var is None or domain is None or len(domain) == 0:
+                    # Propagation wiped out a domain: blame whatever pruned it
+                    if backjumping:
+                        wiped = checker.conflict_set(checker.wiped)
+                        wiped.pop(level, None)
+                        merge_conflict(conflict, wiped)
+                    unassign_value()
                 return False
 
-            # Remove from unassigned list
-            unassigned.remove(var)
-
-            # Try each possible assignment (domain value)
-            if var['kind'] == 'theory':
-                # Try scheduling theory class
-                for day, slot, room in domain:
-                    # Prepare assignment info
-                    course = self.course_dict[var['assignment']['Course_ID']]
-                    assignment_info = {
-                        'Assignment_ID': var['assignment']['Assignment_ID'],
-                        'Course_ID': var['assignment']['Course_ID'],
-                        'Type': '2 Hour Class' if course['Is_2Hour_Special'] else '1.5 Hr Class'
-                    }
-
-                    # Make assignment
-                    self.assign_class(
-                        day, slot,
-                        var['assignment']['Section_ID'],
-                        var['assignment']['Teacher_ID'],
-                        room,
-                        assignment_info
-                    )
-
-                    # Recursively try to assign remaining variables
-                    if backtrack():
-                        return True  # Success!
-
-                    # Assignment didn't work, undo it (backtrack)
-                    self.unassign_class(
-                        day, slot,
-                        var['assignment']['Section_ID'],
-                        var['assignment']['Teacher_ID'],
-                        room,
-                        var['assignment']['Course_ID']
-                    )
-
-            else:  # Lab
-                # Try scheduling lab (2 consecutive slots)
-                for day, s1, s2, lab in domain:
-                    # Prepare assignment info
-                    assignment_info = {
-                        'Assignment_ID': var['assignment']['Assignment_ID'],
-                        'Course_ID': var['assignment']['Course_ID'],
-                        'Type': f"Lab: {lab}"
-                    }
-
-                    # Make assignment (both slots)
-                    self.assign_class(
-                        day, s1,
-                        var['assignment']['Section_ID'],
-                        var['assignment']['Teacher_ID'],
-                        lab,
-                        assignment_info
-                    )
-                    self.assign_class(
-                        day, s2,
-                        var['assignment']['Section_ID'],
-                        var['assignment']['Teacher_ID'],
-                        lab,
-                        assignment_info
-                    )
-
-                    # Recursively try to assign remaining variables
-                    if backtrack():
-                        return True  # Success!
-
-                    # Assignment didn't work, undo it (backtrack)
-                    self.unassign_class(
-                        day, s1,
-                        var['assignment']['Section_ID'],
-                        var['assignment']['Teacher_ID'],
-                        lab,
-                        var['assignment']['Course_ID']
-                    )
-                    self.unassign_class(
-                        day, s2,
-                        var['assignment']['Section_ID'],
-                        var['assignment']['Teacher_ID'],
-                        lab,
-                        var['assignment']['Course_ID']
-                    )
-
-            # No assignment worked, restore variable and return failure
-            unassigned.append(var)
-            return False
+            def exhaust(choice):
+                """Drop a choice point with no values left. Returns its conflict set."""
+                level = len(choice_points) - 1
+                var, conflict = choice[0], choice[3]
+                choice_points.pop()
+                unassigned.add(var)
+                merge_conflict(conflict, checker.conflict_set(var))
+                conflict.pop(level, None)
+                return conflict
+
+            while True:
+                # Base case: all variables assigned - success!
+                if not unassigned:
+                    return True
+
+                # Current/deepest search depth, periodic snapshots if enabled
+                depth = len(choice_points)
+                stats.counters['depth'] = depth
+                if depth > stats.counters['max_depth']:
+                    stats.counters['max_depth'] = depth
+                stats.tick()
+
+                # Out of budget: stop here and keep the best partial timetable
+                if deadline is not None and time.perf_counter() > deadline:
+                    return stop_with_best('time_limit_reached')
+                if node_stop is not None and stats.counters['nodes'] >= node_stop:
+                    return stop_with_best('node_limit_reached')
+                if infeasible_stop is not None and stats.counters['nodes'] >= infeasible_stop:
+                    return stop_at_infeasible_cap()
+
+                # Select next variable to assign
+                var, domain = select_next_variable(unassigned)
+
+                if var is not None and domain:
+                    # Remove from the unassigned heap and try its first value
+                    unassigned.remove(var)
+                    choice = [var, domain, -1, {}, {}]
+                    choice_points.append(choice)
+                    if try_values(choice):
+                        continue
+                    conflict = exhaust(choice)
+                else:
+                    # No valid options: the decisions that emptied its domain are to blame
+                    conflict = checker.conflict_set(var)
+
+                # Dead end - go back to a choice point that still has untried values
+                stats.record_dead_end(len(choice_points), var)
+                save_if_best()
+                while True:
+                    if backjumping:
+                        target = max(conflict, default=-1)
+                        if target >= 0:
+                            # Remember that these assignments can't hold together
+                            members = []
+                            for l in sorted(conflict):
+                                l_var, l_value = checker.assignment_at(l)
+                                members.append((l_var.id, l_value[:-1] if conflict[l] else l_value))
+                            nogoods.learn(tuple(members))
+                            stats.count('nogoods_learned')
+
+                        # Jump over every decision that played no part in the failure
+                        while len(choice_points) - 1 > target:
+                            unassign_value()
+                            unassigned.add(choice_points.pop()[0])
+                            stats.count('levels_jumped')
+                        if target < 0:
+                            return False  # Failure doesn't depend on any decision
+
+                        choice = choice_points[-1]
+                        others = {l: t for l, t in conflict.items() if l != target}
+                        merge_conflict(choice[3], others)
+                        if conflict[target]:
+                            # Any room at this time fails for the same reasons
+                            _, value = checker.assignment_at(target)
+                            choice[4][value[:-1]] = others
+                    elif not choice_points:
+                        return False  # Every option exhausted
+
+                    # Assignment didn't work, undo it (backtrack) and try the next one
+                    choice = choice_points[-1]
+                    unassign_value()
+                    if try_values(choice):
+                        break
+                    conflict = exhaust(choice)
 
         # ==================== RUN BACKTRACKING ====================
-        success = backtrack()
+        with stats.phase('search'):
+            solved = backtrack()
+            if not solved and keep_best and not self.budget_exhausted:
+                restore_best('infeasible_cap_reached' if self.infeasible_cap_reached
+                             else 'search_exhausted')
+        stats.count('symmetric_rooms_skipped', checker.rooms_skipped)
+
+        # ==================== ROOMS FOR PHASE ONE ====================
+        unseated = []
+        if two_phase:
+            from q_room_matching import RoomMatcher
+            with stats.phase('room_matching'):
+                unseated = RoomMatcher(self).seat_classes()
+        return solved and not impossible and not unseated
+
+    # ==================== PARALLEL PORTFOLIO ====================
+
+    def generate_timetable_portfolio(self, workers=None, time_limit=None, configs=None, **options):
+        """
+        Run several differently seeded/ordered searches in parallel processes
+        and keep the first complete timetable (or the most complete one when
+        the time limit is reached). See h_portfolio.PortfolioSolver.
+
+        workers: number of processes (default: one per CPU)
+        configs: list of {'seed': int, 'heuristic': str} (default: seeds
+                 counting up, heuristics taken in turn from HEURISTICS)
+        options: passed on to generate_timetable (e.g. backjumping=False);
+                 heuristic= is used by every config that doesn't name one
+        Raises RuntimeError (with the worker's traceback) if every worker
+        that reported failed with an exception.
+        """
+        from h_portfolio import PortfolioSolver
+
+        solver = PortfolioSolver(self, workers=workers, configs=configs, **options)
+        solver.solve(time_limit)
+        return self.summarize_results()
+
+    # ==================== DECOMPOSITION ====================
+
+    def generate_timetable_decomposed(self, workers=None, time_limit=None, **options):
+        """
+        Split the instance into components that share no section or teacher,
+        share the rooms out between them, solve each component in its own
+        process and merge the results (see p_decomposition.DecompositionSolver).
+
+        workers: number of processes (default: one per CPU)
+        time_limit: seconds per component (None = no limit)
+        options: passed on to generate_timetable (e.g. heuristic='mrv')
+        self.stats sums the statistics of every component's search (see
+        Instrumentation.merge) and of the final search for left-out sessions.
+        """
+        from p_decomposition import DecompositionSolver
+
+        self.stats.reset(keep=('load',))
+        DecompositionSolver(self, workers=workers, **options).solve(time_limit)
+        return self.summarize_results()
+
+    # ==================== INCREMENTAL RESCHEDULING ====================
+
+    def reschedule(self, changes, max_rounds=3, time_limit=None, **options):
+        """
+        Repair the current timetable after a change set (added/removed
+        assignments, blocked teacher/room cells) without regenerating it.
+        Only affected sessions and, if needed, their neighbours are moved.
+        See m_incremental.IncrementalRescheduler for the change set format.
+        Returns (success_count, failed assignments) like generate_timetable.
+        """
+        from m_incremental import IncrementalRescheduler
+
+        self.stats.reset(keep=('load',))
+        IncrementalRescheduler(self).apply(changes, max_rounds, time_limit, **options)
+        return self.summarize_results()
+
+    # ==================== LOCAL SEARCH REPAIR ====================
+
+    def repair_with_local_search(self, max_steps=20000, time_limit=None, tabu_tenure=10,
+                                 walk_probability=0.1):
+        """
+        Complete the current (partial) timetable with min-conflicts local
+        search: missing sessions are placed allowing conflicts, then
+        conflicting sessions are moved until none are left. Sessions still
+        in conflict at the end are left out. See n_local_search.MinConflictsRepair.
+        Returns (success_count, failed assignments) like generate_timetable.
+        """
+        from n_local_search import MinConflictsRepair
+
+        self.stats.reset(keep=('load',))
+        MinConflictsRepair(self).run(max_steps, time_limit, tabu_tenure, walk_probability)
+        return self.summarize_results()
 
+    # ==================== SOFT CONSTRAINT OPTIMIZATION ====================
+
+    def optimize_timetable(self, time_limit=10.0, weights=None, max_iterations=None):
+        """
+        Improve a feasible timetable with simulated annealing on a weighted
+        objective (section gaps, day load balance, teacher idle time, late
+        slots, room changes). Hard constraints stay satisfied and the best
+        timetable found within the time box is kept.
+        See o_soft_constraints.SoftConstraintOptimizer.
+        Returns the optimizer's report dict (objective before/after).
+        """
+        from o_soft_constraints import SoftConstraintOptimizer
+
+        return SoftConstraintOptimizer(self, weights).run(time_limit, max_iterations)
+
+    # ==================== RESULTS ====================
+
+    def summarize_results(self):
+        """
+        Check every course assignment against the current schedule and print
+        the generation summary. Returns (success_count, failed assignments).
+        """
+        tally_start = time.perf_counter()
         # ==================== CALCULATE RESULTS ====================
         total = len(self.assignments)
         failed = []
@@ -627,15 +1218,15 @@ class CSPTimetableScheduler:
 
             # Count scheduled theory classes
             theory_count = len([c for c in self.schedule
-                                if c['Assignment_ID'] == assignment['Assignment_ID']
-                                and 'Lab' not in c['Type']])
+                                if c.assignment_id == assignment['Assignment_ID']
+                                and 'Lab' not in c.type])
 
             # Check if lab scheduled (if required)
             lab_ok = True
             if course.get('Has_Lab'):
                 lab_ok = any(c for c in self.schedule
-                             if c['Assignment_ID'] == assignment['Assignment_ID']
-                             and 'Lab' in c['Type'])
+                             if c.assignment_id == assignment['Assignment_ID']
+                             and 'Lab' in c.type)
 
             # Mark as success or failure
             if theory_count >= theory_needed and lab_ok:
@@ -654,18 +1245,56 @@ class CSPTimetableScheduler:
         print(f"Total Classes Scheduled: {len(self.schedule)}")
         print("=" * 80 + "\n")
 
+        self.stats.add_time('tally', time.perf_counter() - tally_start)
         return success_count, failed
 
     # ==================== EXPORT TO EXCEL ====================
 
+    def build_timetable_index(self):
+        """
+        Group the schedule by owner in a single pass.
+        Returns (by_section, by_teacher):
+            by_section -> {(section_id, day, slot): [classes]}
+            by_teacher -> {(teacher_id, day, slot): [classes]}
+        """
+        by_section = defaultdict(list)
+        by_teacher = defaultdict(list)
+        for cls in self.schedule:
+            by_section[(cls.section_id, cls.day, cls.slot)].append(cls)
+            by_teacher[(cls.teacher_id, cls.day, cls.slot)].append(cls)
+        return by_section, by_teacher
+
     def export_to_excel(self):
-        """Export generated timetables to Excel file with nice formatting."""
+        """
+        Export generated timetables to Excel file with nice formatting.
+        Sheets are streamed (write-only workbook) with shared named styles,
+        so memory stays flat however many sections and teachers there are.
+        """
+        export_start = time.perf_counter()
         print("=" * 80)
         print("EXPORTING TIMETABLES TO EXCEL")
         print("=" * 80 + "\n")
 
-        wb = Workbook()
-        wb.remove(wb.active)
+        wb = Workbook(write_only=True)
+
+        # ==================== SHARED STYLES ====================
+        # Registered once and referenced by name from every cell
+        thin = Side(style='thin')
+        border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell_alignment = Alignment(horizontal='left', vertical='top', wrap_text=True)
+        wb.add_named_style(NamedStyle(
+            name='timetable_header',
+            font=Font(bold=True, size=11, color="FFFFFF"),
+            fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+            border=border))
+        wb.add_named_style(NamedStyle(
+            name='timetable_day',
+            font=Font(bold=True, size=11),
+            fill=PatternFill(start_color="E7E6E6", end_color="E7E6E6", fill_type="solid"),
+            alignment=cell_alignment,
+            border=border))
+        wb.add_named_style(NamedStyle(name='timetable_cell', alignment=cell_alignment, border=border))
 
         # Day name mapping
         day_names = {
@@ -676,155 +1305,101 @@ class CSPTimetableScheduler:
             'FRI': 'Friday'
         }
 
-        # Create one sheet per section
-        print("Creating section timetables...")
-        for section in self.sections:
-            section_id = section['Section_ID']
-            ws = wb.create_sheet(title=f"Section_{section_id}")
+        headers = ['Day\\Time'] + [self.slot_times[s] for s in self.slot_list]
 
-            # ==================== CREATE HEADER ROW ====================
-            headers = ['Day\\Time'] + [self.slot_times[s] for s in self.slot_list]
-            ws.append(headers)
-
-            # Style header
-            for cell in ws[1]:
-                cell.font = Font(bold=True, size=11, color="FFFFFF")
-                cell.fill = PatternFill(start_color="366092", end_color="366092",
-                                        fill_type="solid")
-                cell.alignment = Alignment(horizontal='center', vertical='center',
-                                           wrap_text=True)
-                cell.border = Border(
-                    left=Side(style='thin'), right=Side(style='thin'),
-                    top=Side(style='thin'), bottom=Side(style='thin')
-                )
-
-            # Set column widths
+        # Classes per (owner, day, slot), built once for all sheets
+        by_section, by_teacher = self.build_timetable_index()
+
+        def styled(ws, value, style):
+            """Write-only cell with a named style."""
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            return cell
+
+        def write_sheet(title, owner_id, index, describe):
+            """
+            Stream one timetable sheet: header row, then one row per day.
+            describe(cls) gives the text shown for one class.
+            """
+            ws = wb.create_sheet(title=title)
+
+            # Column widths and row heights must be set before rows are written
             ws.column_dimensions['A'].width = 15  # Day column
             for i in range(2, len(headers) + 1):
-                ws.column_dimensions[chr(64 + i)].width = 28  # Time slot columns
+                ws.column_dimensions[get_column_letter(i)].width = 28  # Time slot columns
+            for row in range(2, len(self.day_list) + 2):
+                ws.row_dimensions[row].height = 70  # Tall rows for readability
+
+            # ==================== CREATE HEADER ROW ====================
+            ws.append([styled(ws, header, 'timetable_header') for header in headers])
 
             # ==================== FILL TIMETABLE DATA ====================
             for day_id in self.day_list:
-                row_data = [day_names[day_id]]
+                row_data = [styled(ws, day_names[day_id], 'timetable_day')]
 
                 for slot_id in self.slot_list:
-                    # Find all classes for this section at this day/time
-                    classes = [c for c in self.schedule
-                               if c['Section_ID'] == section_id
-                               and c['Day'] == day_id
-                               and c['Slot'] == slot_id]
-
-                    if classes:
-                        # Format: Course Name\nRoom\nTeacher
-                        parts = []
-                        for cls in classes:
-                            course = self.course_dict[cls['Course_ID']]
-                            teacher = self.teacher_dict[cls['Teacher_ID']]
-                            part = (f"{course['Course_Name']}\n"
-                                    f"{cls['Room_or_Lab']}\n"
-                                    f"{teacher['Teacher_Name']}")
-                            parts.append(part)
-                        cell_content = "\n---\n".join(parts)
-                    else:
-                        cell_content = ""  # Empty slot
-
-                    row_data.append(cell_content)
+                    classes = index.get((owner_id, day_id, slot_id), ())
+                    # Several classes in one cell are separated by a line
+                    cell_content = "\n---\n".join(describe(cls) for cls in classes)
+                    row_data.append(styled(ws, cell_content, 'timetable_cell'))
 
                 ws.append(row_data)
 
-                # Style data row
-                current_row = ws.max_row
-                ws.row_dimensions[current_row].height = 70  # Tall rows for readability
-
-                for cell in ws[current_row]:
-                    cell.alignment = Alignment(horizontal='left', vertical='top',
-                                               wrap_text=True)
-                    cell.border = Border(
-                        left=Side(style='thin'), right=Side(style='thin'),
-                        top=Side(style='thin'), bottom=Side(style='thin')
-                    )
-                    # Highlight day column
-                    if cell.column == 1:
-                        cell.font = Font(bold=True, size=11)
-                        cell.fill = PatternFill(start_color="E7E6E6", end_color="E7E6E6",
-                                                fill_type="solid")
+        def describe_for_section(cls):
+            """Format: Course Name\nRoom\nTeacher"""
+            course = self.course_dict[cls.course_id]
+            teacher = self.teacher_dict[cls.teacher_id]
+            return (f"{course['Course_Name']}\n"
+                    f"{cls.room_or_lab}\n"
+                    f"{teacher['Teacher_Name']}")
+
+        def describe_for_teacher(cls):
+            """Format: Course Name\nSection\nRoom"""
+            course = self.course_dict[cls.course_id]
+            return (f"{course['Course_Name']}\n"
+                    f"Section: {cls.section_id}\n"
+                    f"{cls.room_or_lab}")
+
+        # Create one sheet per section
+        print("Creating section timetables...")
+        for section in self.sections:
+            section_id = section['Section_ID']
+            write_sheet(f"Section_{section_id}", section_id, by_section, describe_for_section)
 
         # Create teacher timetables
         print("Creating teacher timetables...")
         for teacher in self.teachers:
             teacher_id = teacher['Teacher_ID']
-            ws = wb.create_sheet(title=f"Teacher_{teacher_id}")
-
-            # Header row
-            headers = ['Day\\Time'] + [self.slot_times[s] for s in self.slot_list]
-            ws.append(headers)
-
-            # Style header
-            for cell in ws[1]:
-                cell.font = Font(bold=True, size=11, color="FFFFFF")
-                cell.fill = PatternFill(start_color="366092", end_color="366092",
-                                        fill_type="solid")
-                cell.alignment = Alignment(horizontal='center', vertical='center',
-                                           wrap_text=True)
-                cell.border = Border(
-                    left=Side(style='thin'), right=Side(style='thin'),
-                    top=Side(style='thin'), bottom=Side(style='thin')
-                )
-
-            # Set column widths
-            ws.column_dimensions['A'].width = 15  # Day column
-            for i in range(2, len(headers) + 1):
-                ws.column_dimensions[chr(64 + i)].width = 28  # Time slot columns
-
-            # Fill timetable data for this teacher
-            for day_id in self.day_list:
-                row_data = [day_names[day_id]]
-
-                for slot_id in self.slot_list:
-                    # Find all classes for this teacher at this day/time
-                    classes = [c for c in self.schedule
-                               if c['Teacher_ID'] == teacher_id
-                               and c['Day'] == day_id
-                               and c['Slot'] == slot_id]
-
-                    if classes:
-                        # Format: Course Name\nSection\nRoom
-                        parts = []
-                        for cls in classes:
-                            course = self.course_dict[cls['Course_ID']]
-                            part = (f"{course['Course_Name']}\n"
-                                    f"Section: {cls['Section_ID']}\n"
-                                    f"{cls['Room_or_Lab']}")
-                            parts.append(part)
-                        cell_content = "\n---\n".join(parts)
-                    else:
-                        cell_content = ""  # Empty slot
-
-                    row_data.append(cell_content)
-
-                ws.append(row_data)
-
-                # Style data row
-                current_row = ws.max_row
-                ws.row_dimensions[current_row].height = 70  # Tall rows for readability
-
-                for cell in ws[current_row]:
-                    cell.alignment = Alignment(horizontal='left', vertical='top',
-                                               wrap_text=True)
-                    cell.border = Border(
-                        left=Side(style='thin'), right=Side(style='thin'),
-                        top=Side(style='thin'), bottom=Side(style='thin')
-                    )
-                    # Highlight day column
-                    if cell.column == 1:
-                        cell.font = Font(bold=True, size=11)
-                        cell.fill = PatternFill(start_color="E7E6E6", end_color="E7E6E6",
-                                                fill_type="solid")
+            write_sheet(f"Teacher_{teacher_id}", teacher_id, by_teacher, describe_for_teacher)
 
         # Save Excel file
         wb.save('generated_timetable_csp.xlsx')
         print("✓ Timetables exported: generated_timetable_csp.xlsx")
         print("=" * 80 + "\n")
+        self.stats.add_time('export', time.perf_counter() - export_start)
+
+    # ==================== FLAT EXPORTS ====================
+
+    def export_to_csv(self, output_file='generated_timetable.csv'):
+        """Export the flat schedule (one row per scheduled slot) as CSV."""
+        from l_flat_export import export_csv
+        with self.stats.phase('export_csv'):
+            rows = export_csv(self, output_file)
+        print(f"✓ Schedule exported: {output_file} ({rows} rows)")
+
+    def export_to_jsonl(self, output_file='generated_timetable.jsonl'):
+        """Export the flat schedule as JSON Lines."""
+        from l_flat_export import export_jsonl
+        with self.stats.phase('export_jsonl'):
+            rows = export_jsonl(self, output_file)
+        print(f"✓ Schedule exported: {output_file} ({rows} rows)")
+
+    def export_to_parquet(self, output_file='generated_timetable.parquet'):
+        """Export the flat schedule as Parquet (needs pyarrow or fastparquet)."""
+        from l_flat_export import export_parquet
+        with self.stats.phase('export_parquet'):
+            rows = export_parquet(self, output_file)
+        print(f"✓ Schedule exported: {output_file} ({rows} rows)")
 
     # ==================== STATISTICS ====================
 
@@ -848,8 +1423,8 @@ class CSPTimetableScheduler:
         print("\n" + "-" * 80)
 
         # Count different types of classes
-        lab_slots = len([c for c in self.schedule if 'Lab' in c['Type']])
-        theory_classes = len([c for c in self.schedule if 'Lab' not in c['Type']])
+        lab_slots = len([c for c in self.schedule if 'Lab' in c.type])
+        theory_classes = len([c for c in self.schedule if 'Lab' not in c.type])
 
         print(f"Lab Sessions: {lab_slots // 2} (using {lab_slots} slots)")
         print(f"Theory Classes: {theory_classes}")
@@ -2,7 +2,7 @@ import pandas as pd
 import random
 
 
-def generate_database():
+def generate_database(output_file='university_database.xlsx'):
     """Generate improved university database with proper lab assignments"""
 
     # 1. ROOMS - Z103-Z120, Z203-Z220, A103-A120, A203-A220, P1-P9
@@ -324,7 +324,7 @@ def generate_database():
     ]
 
     # Create Excel file with multiple sheets
-    with pd.ExcelWriter('university_database.xlsx', engine='openpyxl') as writer:
+    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
         pd.DataFrame(rooms_data).to_excel(writer, sheet_name='Rooms', index=False)
         pd.DataFrame(labs_data).to_excel(writer, sheet_name='Labs', index=False)
         pd.DataFrame(teachers_data).to_excel(writer, sheet_name='Teachers', index=False)
@@ -334,7 +334,7 @@ def generate_database():
         pd.DataFrame(time_slots_data).to_excel(writer, sheet_name='Time_Slots', index=False)
         pd.DataFrame(days_data).to_excel(writer, sheet_name='Days', index=False)
 
-    print("✓ Database generated successfully: university_database.xlsx")
+    print(f"✓ Database generated successfully: {output_file}")
     print(f"  - {len(rooms_data)} Rooms (Z103-Z120, Z203-Z220, A103-A120, A203-A220, P1-P9)")
     print(f"  - {len(labs_data)} Labs with types")
     print(f"  - {len(teachers_data)} Teachers")
@@ -1,5 +1,6 @@
 import pandas as pd
 from collections import defaultdict
+from k_database_loader import iter_workbook
 
 
 def check_duplicate_subjects(excel_file_path):
@@ -14,9 +15,6 @@ def check_duplicate_subjects(excel_file_path):
         Dictionary with results for each section
     """
     try:
-        # Read all sheets from the Excel file
-        excel_file = pd.ExcelFile(excel_file_path)
-
         results = {}
         issues_found = False
 
@@ -25,22 +23,17 @@ def check_duplicate_subjects(excel_file_path):
         print("=" * 80)
         print()
 
-        # Process each sheet (section)
-        for sheet_name in excel_file.sheet_names:
+        # Process each sheet (section) - the workbook is read once, sheet by sheet
+        for sheet_name, rows in iter_workbook(excel_file_path):
             print(f"Checking Section: {sheet_name}")
             print("-" * 80)
 
-            # Read the sheet
-            df = pd.read_excel(excel_file_path, sheet_name=sheet_name)
-
-            # Get the day column (usually first column)
-            day_column = df.columns[0]
-
             section_issues = []
 
             # Iterate through each row (each day)
-            for idx, row in df.iterrows():
-                day = row[day_column]
+            for row in rows:
+                # Day is the first column, time slots follow
+                day, *cells = row.values()
 
                 # Skip if day is NaN or empty
                 if pd.isna(day) or str(day).strip() == '':
@@ -48,9 +41,7 @@ def check_duplicate_subjects(excel_file_path):
 
                 # Extract all subjects for this day with their time slot positions
                 time_slots = []
-                for col_idx, col in enumerate(df.columns[1:], start=1):  # Skip the day column
-                    cell_value = row[col]
-
+                for cell_value in cells:
                     # Skip empty cells
                     if pd.isna(cell_value) or str(cell_value).strip() == '':
                         time_slots.append(None)
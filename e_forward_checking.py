@@ -0,0 +1,1057 @@
+import heapq
+from array import array
+from collections import defaultdict, deque
+
+
+def merge_conflict(conflict, other):
+    """
+    Merge conflict set other into conflict (both {level: time_only}).
+    A level stays time_only only if every failure blamed just its time
+    (day/slot) and not its room, so any room at that time fails the same way.
+    """
+    for level, time_only in other.items():
+        conflict[level] = conflict.get(level, True) and time_only
+    return conflict
+
+
+class ForwardChecker:
+    """
+    Forward-checking engine used by the CSP backtracking search.
+
+    Instead of rebuilding every variable's domain on every search step, the
+    engine keeps each variable's live domain up to date. When a class is
+    assigned, only the values touched by the affected (day, slot), teacher,
+    section and room are pruned. Every change is pushed onto a trail so that
+    undoing an assignment just replays the trail backwards.
+
+    A domain value is split into a "time" (day + slot, or day + slot pair for
+    labs) and a resource (room or lab). For every variable we track:
+        block[ti]  -> number of reasons time ti is unusable
+                      (section busy, teacher busy, course already that day)
+        free[ti]   -> number of suitable resources free during time ti
+                      (two-phase theory classes: how many more fit, see
+                      ROOM CAPACITY)
+        size       -> live domain size = sum of free[ti] where block[ti] == 0
+    """
+
+    def __init__(self, scheduler, variables, domains=True, symmetry_breaking=False, impacts=False,
+                 two_phase=False):
+        """
+        Build the static layout of every variable and initialise the live
+        domains from the scheduler's current tracking structures.
+        variables: list of Variable records built by build_variables
+                   (each one must carry an integer id equal to its position).
+        domains: False skips the live domains and only builds the layouts and
+                 suitable resources (all the local search needs).
+        symmetry_breaking: order the theory sessions of an assignment by day
+                           and offer one room/lab per equivalence class
+                           (see SYMMETRY BREAKING below).
+        impacts: keep the demand counts used to rank values by impact
+                 (least-constraining-value ordering, see value_impacts).
+        two_phase: theory classes take a time without a room; the rooms of
+                   each (day, slot) are an aggregate capacity (see ROOM
+                   CAPACITY below) and are matched once the search is over.
+        """
+        self.scheduler = scheduler
+
+        # ==================== TIME LAYOUTS ====================
+        # Variables of the same kind share one layout (list of times)
+        theory_times = [(day, slot) for day in scheduler.day_list
+                        for slot in scheduler.slot_list]
+        two_hour_times = [(day, 'S4') for day in scheduler.day_list
+                          if 'S4' in scheduler.slot_index]
+        lab_times = [(day, s1, s2) for day in scheduler.day_list
+                     for s1, s2 in scheduler.get_consecutive_slot_pairs()]
+        self.layouts = {
+            'theory': self._build_layout(theory_times),
+            '2hour': self._build_layout(two_hour_times),
+            'lab': self._build_layout(lab_times),
+        }
+
+        # ==================== PER-VARIABLE STATE ====================
+        count = len(variables)
+        self.variables = variables
+        self.layout = [None] * count
+        self.resources = [None] * count
+        self.block = [None] * count
+        self.free = [None] * count
+        self.size = [0] * count
+
+        # Watchers: which variables are affected by a section/teacher/room/course
+        self.by_section = defaultdict(list)
+        self.by_teacher = defaultdict(list)
+        self.by_resource = defaultdict(list)
+        self.by_course = defaultdict(list)
+        self.room_type = [None] * count  # Two-phase theory variables: index of their room set
+        room_types = {}  # {suitable rooms: room type index}
+
+        free_cache = {}  # Free counts per (layout, rooms): nothing is placed during setup
+        for var in variables:
+            v = var.id
+            assignment = var.assignment
+            section_id = assignment.section_id
+            course_id = assignment.course_id
+            course = scheduler.course_dict[course_id]
+
+            if var.kind == 'theory':
+                layout = self.layouts['2hour' if course['Is_2Hour_Special'] else 'theory']
+                resources = scheduler.find_suitable_rooms(assignment.student_count,
+                                                          course['Needs_Multimedia'])
+            else:
+                layout = self.layouts['lab']
+                resources = self._suitable_lab_resources(assignment, course)
+
+            self.layout[v] = layout
+            self.resources[v] = resources
+            self.by_section[section_id].append(v)
+            self.by_teacher[assignment.teacher_id].append(v)
+            self.by_course[(section_id, course_id)].append(v)
+            if two_phase and var.kind == 'theory':
+                self.room_type[v] = room_types.setdefault(tuple(resources), len(room_types))
+            else:
+                for resource in resources:
+                    self.by_resource[resource].append(v)
+
+            if domains:
+                self._init_domain(v, free_cache)
+
+        # ==================== CONSTRAINT GRAPH ====================
+        # neighbors[v] = [(w, same_course)] for every variable sharing v's
+        # section or teacher (they can't overlap in time); same_course marks
+        # pairs that also can't share a day (one session per day per course)
+        self.neighbors = [None] * count
+        for var in variables:
+            v = var.id
+            assignment = var.assignment
+            course_vars = set(self.by_course[(assignment.section_id, assignment.course_id)])
+            linked = set(self.by_section[assignment.section_id])
+            linked.update(self.by_teacher[assignment.teacher_id])
+            linked.discard(v)
+            self.neighbors[v] = [(w, w in course_vars) for w in sorted(linked)]
+
+        # ==================== SYMMETRY BREAKING ====================
+        # The theory sessions of one assignment are interchangeable (they only
+        # differ by index), so session i must fall on an earlier day than
+        # session i + 1: siblings[v] = [(w, w_first)] with w_first when w must
+        # come before v. Rooms with the same Strength and Multimedia are
+        # interchangeable too, so at each time only the first free member of a
+        # class is offered: theory classes take a single cell, so two rooms
+        # free at that cell can swap their future classes there. Labs take two
+        # cells, so labs with the same Lab_Type and Strength only count as
+        # equivalent while they are busy at exactly the same cells of that day
+        # (otherwise a later lab may fit one but not the other).
+        self.day_order = {day: idx for idx, day in enumerate(scheduler.day_list)}
+        self.siblings = [()] * count
+        self.resource_class = {}  # {resource: equivalence class key}
+        self.day_mask = {}  # {day: bitmask of its cells} (lab equivalence)
+        self.day_cells = defaultdict(list)  # {day: [(day, slot), ...]}
+        self.sibling_groups = 0
+        self.rooms_skipped = 0  # Values left out because an equivalent room was offered
+        if symmetry_breaking:
+            groups = defaultdict(list)
+            for var in variables:
+                if var.kind == 'theory':
+                    groups[id(var.assignment)].append(var)
+            for group in groups.values():
+                if len(group) < 2:
+                    continue
+                self.sibling_groups += 1
+                for var in group:
+                    self.siblings[var.id] = [(other.id, other.index < var.index)
+                                                for other in group if other is not var]
+
+            for name, room in scheduler.room_dict.items():
+                self.resource_class[name] = ('room', room.get('Strength', 0), bool(room['Multimedia']))
+            for name, lab in scheduler.lab_dict.items():
+                self.resource_class[name] = ('lab', lab.get('Lab_Type'), lab.get('Strength', 0))
+            for cell, bit in scheduler.cell_bit.items():
+                self.day_mask[cell[0]] = self.day_mask.get(cell[0], 0) | bit
+                self.day_cells[cell[0]].append(cell)
+
+        # ==================== ROOM CAPACITY (TWO-PHASE) ====================
+        # In phase one a theory class only takes a (day, slot); rooms are
+        # counted, not chosen. A room type is one set of suitable rooms (a
+        # strength threshold, plus multimedia or not), so the rooms any group
+        # of types can use are the union of at most two type sets - one with
+        # and one without multimedia. The classes of a cell can be given
+        # rooms (Hall's condition) if no such union is needed by more classes
+        # than it has free rooms: cap[cell][u] keeps that slack per union,
+        # and free[ti] of a theory variable is the slack of its type - how
+        # many more classes of the type fit at that time.
+        self.type_rooms = [set(rooms) for rooms in room_types]
+        self.by_room_type = [[] for _ in room_types]
+        self.unions = []  # [(rooms, types using only those rooms)]
+        self.covering = [[] for _ in room_types]  # {type: unions holding its rooms}
+        self.cap = {}
+        self.cell_levels = defaultdict(list)  # {cell: levels of the classes counted there}
+        if room_types:
+            for v, t in enumerate(self.room_type):
+                if t is not None:
+                    self.by_room_type[t].append(v)
+            seen = set()
+            for i, rooms in enumerate(self.type_rooms):
+                for other in self.type_rooms[i:]:
+                    union = frozenset(rooms | other)
+                    if union in seen:
+                        continue
+                    seen.add(union)
+                    u = len(self.unions)
+                    inside = [t for t, t_rooms in enumerate(self.type_rooms) if t_rooms <= union]
+                    self.unions.append((union, inside))
+                    for t in inside:
+                        self.covering[t].append(u)
+            for cell, bit in scheduler.cell_bit.items():
+                self.cap[cell] = [sum(1 for room in union if not scheduler.room_busy.get(room, 0) & bit)
+                                  for union, _ in self.unions]
+
+        self.assigned = [False] * count
+        self.pruned = 0  # Values removed by the last propagate() call
+        self.changed = set()  # Variables whose counters changed (VariableHeap refreshes them)
+        self.earliest = [None] * count  # Cached earliest_slot, cleared when a time appears/disappears
+
+        # ==================== VALUE IMPACT (LCV) ====================
+        # demand counts the live times (unblocked, with a free resource) of
+        # unassigned variables per owner:
+        #   ('section'|'teacher', owner, cell) -> live times covering the cell
+        #   ('course', section, course, day)   -> live times on that day
+        # and room_demand[cell][resource] the live times covering the cell
+        # that could take the resource, each spread over the variable's
+        # suitable resources (taking one of many rooms rarely costs the time).
+        # Kept up to date by the counter updates, so the time options a choice
+        # would take from its neighbours are a few lookups away.
+        self.demand = None
+        self.room_demand = None
+        if impacts and domains:
+            self.demand = defaultdict(int)
+            self.room_demand = {cell: defaultdict(float) for cell in scheduler.cell_bit}
+            for v in range(count):
+                self._drop_demand(v, 1)
+
+        # ==================== CONFLICT TRACKING (BACKJUMPING) ====================
+        # Decision level = position in the assignment stack.
+        # occupant records which level made a section/teacher/room busy in a
+        # cell, course_day_level which level first put a course on a day -
+        # enough to explain any value forward checking removed.
+        self.level = [-1] * count
+        self.current = {}  # {var_id: value} of assigned variables
+        self.occupant = {}  # {('section'|'teacher'|'room', owner, cell): level}
+        self.course_day_level = {}  # {(section_id, course_id, day): level}
+
+        # Values removed by AC during search can't be explained from occupancy:
+        # reasons[v] = [(level, reason)] with reason = ((level, time_only), ...).
+        # AC pre-pass pruning happens before any decision and has no reason.
+        self.reasons = [[] for _ in range(count)]
+        self.touched = []  # Per level: variables that got a reason at that level
+        self.wiped = None  # Variable wiped out by the last failed propagate()
+
+        # ==================== TRAIL ====================
+        # One int per change, packed as ((variable id << time_bits) | time index) << 1 | kind:
+        # kind 1 = a resource was taken (free -1), kind 0 = a reason was added (block +1).
+        # A flat array of ints instead of tuples keeps deep searches small.
+        self.time_bits = max(len(layout['times']) for layout in self.layouts.values()).bit_length()
+        self.trail = array('q')
+        # Stack of (trail mark, var, value) - one per assignment
+        self.stack = []
+
+    # ==================== SETUP HELPERS ====================
+
+    def _build_layout(self, times):
+        """
+        Precompute lookup tables for a list of times.
+        Returns dict with:
+            times  -> list of time tuples (day, slot) or (day, slot1, slot2)
+            cells  -> list of (day, slot) cells covered by each time
+            masks  -> occupancy bitmask window of each time
+            by_cell -> {(day, slot): [time indices covering it]}
+            by_day  -> {day: [time indices on that day]}
+            index   -> {time: time index}
+        """
+        cells = [tuple((t[0], slot) for slot in t[1:]) for t in times]
+        by_cell = defaultdict(list)
+        by_day = defaultdict(list)
+        for ti, time_cells in enumerate(cells):
+            for cell in time_cells:
+                by_cell[cell].append(ti)
+            by_day[times[ti][0]].append(ti)
+        return {
+            'times': times,
+            'cells': cells,
+            'masks': [self.scheduler.get_window_mask(t[0], t[1:]) for t in times],
+            'by_cell': dict(by_cell),
+            'by_day': dict(by_day),
+            'index': {t: ti for ti, t in enumerate(times)},
+        }
+
+    def _suitable_lab_resources(self, assignment, course):
+        """
+        Labs a lab variable may use. Mirrors get_lab_domain: classrooms are
+        never valid for labs, so the classroom fallback is not included.
+        """
+        scheduler = self.scheduler
+        lab_type = course.get('Lab_Type')
+        if not lab_type:
+            return scheduler.find_labs_with_capacity(assignment.student_count)
+        labs = scheduler.find_suitable_labs(lab_type, assignment.student_count)
+        return [lab for lab in labs if scheduler.is_actual_lab(lab)]
+
+    def _free_counts(self, layout, resources):
+        """
+        Number of the resources free during each time of the layout. Uses the
+        scheduler's NumPy engine when it has one (domain_engine='numpy').
+        """
+        engine = self.scheduler.tensor_engine
+        if engine is not None:
+            return engine.free_counts(resources, layout['times'])
+        return [sum(1 for resource in resources if self._resource_free(resource, mask))
+                for mask in layout['masks']]
+
+    def _init_domain(self, v, free_cache=None):
+        """
+        Compute block/free counters of one variable from the current schedule.
+        free_cache: {(layout id, resources): free counts} shared by the
+        variables set up together (many share their layout and rooms).
+        """
+        scheduler = self.scheduler
+        assignment = self.variables[v].assignment
+        section_id = assignment.section_id
+        teacher_id = assignment.teacher_id
+        course_days = scheduler.section_course_day.get(
+            (section_id, assignment.course_id), ())
+        layout = self.layout[v]
+        resources = self.resources[v]
+
+        section_busy = scheduler.section_busy.get(section_id, 0)
+        teacher_busy = scheduler.teacher_busy.get(teacher_id, 0)
+
+        if free_cache is None:
+            free = self._free_counts(layout, resources)
+        else:
+            key = (id(layout), tuple(resources))
+            if key not in free_cache:
+                free_cache[key] = self._free_counts(layout, resources)
+            free = list(free_cache[key])
+
+        block = []
+        size = 0
+        for ti, mask in enumerate(layout['masks']):
+            # One reason per busy cell of the section and of the teacher
+            reasons = (1 if layout['times'][ti][0] in course_days else 0)
+            reasons += (section_busy & mask).bit_count() + (teacher_busy & mask).bit_count()
+            block.append(reasons)
+            if reasons == 0:
+                size += free[ti]
+
+        self.block[v] = block
+        self.free[v] = free
+        self.size[v] = size
+
+    def _slack(self, cell, t):
+        """Classes of room type t that still fit at a cell (ROOM CAPACITY)."""
+        cap = self.cap[cell]
+        return min(cap[u] for u in self.covering[t])
+
+    def _take_capacity(self, cell, t, level):
+        """Count a phase one class of room type t at a cell and lower the slack it uses up."""
+        before = [self._slack(cell, s) for s in range(len(self.type_rooms))]
+        cap = self.cap[cell]
+        for u in self.covering[t]:
+            cap[u] -= 1
+        self.cell_levels[cell].append(level)
+
+        trail = self.trail
+        shift = self.time_bits
+        for s, slack in enumerate(before):
+            if self._slack(cell, s) == slack:
+                continue
+            for w in self.by_room_type[s]:
+                for ti in self.layout[w]['by_cell'].get(cell, ()):
+                    self._change_free(w, ti, -1)
+                    trail.append(((w << shift | ti) << 1) | 1)
+
+    def _return_capacity(self, cell, t):
+        """Reverse _take_capacity (the trail restores the free counters)."""
+        cap = self.cap[cell]
+        for u in self.covering[t]:
+            cap[u] += 1
+        self.cell_levels[cell].pop()
+
+    def _resource_free(self, resource, mask):
+        """True if the room/lab is free during every cell of the bitmask window."""
+        return not self.scheduler.room_busy.get(resource, 0) & mask
+
+    # ==================== COUNTER UPDATES ====================
+
+    def _change_block(self, v, ti, delta):
+        """Add delta blocking reasons to time ti of variable v."""
+        self.changed.add(v)
+        block = self.block[v]
+        before = block[ti]
+        block[ti] = before + delta
+        if before == 0:
+            self.size[v] -= self.free[v][ti]  # time becomes unusable
+            if self.free[v][ti]:
+                self.earliest[v] = None
+                if self.demand is not None and not self.assigned[v]:
+                    self._change_demand(v, ti, -1)
+        elif block[ti] == 0:
+            self.size[v] += self.free[v][ti]  # time becomes usable again
+            if self.free[v][ti]:
+                self.earliest[v] = None
+                if self.demand is not None and not self.assigned[v]:
+                    self._change_demand(v, ti, 1)
+
+    def _change_free(self, v, ti, delta):
+        """Add delta free resources to time ti of variable v."""
+        self.changed.add(v)
+        free = self.free[v]
+        before = free[ti]
+        free[ti] = before + delta
+        if self.block[v][ti] == 0:
+            self.size[v] += delta
+            if (before == 0) != (free[ti] == 0):
+                self.earliest[v] = None  # Time appears or disappears
+                if self.demand is not None and not self.assigned[v]:
+                    self._change_demand(v, ti, 1 if before == 0 else -1)
+
+    def _change_demand(self, v, ti, delta):
+        """Add a live time of variable v (delta 1) to the demand counts or take it out (-1)."""
+        demand = self.demand
+        assignment = self.variables[v].assignment
+        section_id = assignment.section_id
+        teacher_id = assignment.teacher_id
+        time_cells = self.layout[v]['cells'][ti]
+        resources = self.resources[v]
+        share = delta / len(resources)
+        demand[('course', section_id, assignment.course_id, time_cells[0][0])] += delta
+        for cell in time_cells:
+            demand[('section', section_id, cell)] += delta
+            demand[('teacher', teacher_id, cell)] += delta
+            room_demand = self.room_demand[cell]
+            for resource in resources:
+                room_demand[resource] += share
+
+    def _drop_demand(self, v, sign):
+        """Take a variable's live times out of the demand counts (sign -1) or put them back (1)."""
+        block = self.block[v]
+        free = self.free[v]
+        for ti in range(len(block)):
+            if block[ti] == 0 and free[ti]:
+                self._change_demand(v, ti, sign)
+
+    # ==================== CONFLICT EXPLANATION ====================
+
+    def _add_reason(self, v, reason):
+        """Record that the current decision level removed values of v (AC only)."""
+        if not self.stack:
+            return  # Pruned before search: holds unconditionally
+        level = len(self.stack) - 1
+        reasons = self.reasons[v]
+        if reasons and reasons[-1] == (level, reason):
+            return
+        if not reasons or reasons[-1][0] != level:
+            self.touched[level].append(v)
+        reasons.append((level, reason))
+
+    def conflict_set(self, var):
+        """
+        Decision levels whose assignments removed values from this variable's
+        domain (its conflict set for conflict-directed backjumping).
+        Returns {level: time_only}.
+
+        Built from the current state: a blocked time is blamed on the earliest
+        decision that blocks it (its time alone is enough - time_only), and a
+        room lost at an open time is blamed on the decision occupying it.
+        Busy cells with no level (fixed before search) hold unconditionally.
+        A time ruled out by the day order of sibling sessions is blamed on the
+        sibling that rules it out. With symmetry breaking, a lab skipped as
+        equivalent was only equivalent given the other classes in the labs on
+        that day, so every class in the variable's labs that day is blamed.
+        """
+        v = var.id
+        assignment = var.assignment
+        section_id = assignment.section_id
+        teacher_id = assignment.teacher_id
+        course_id = assignment.course_id
+        layout = self.layout[v]
+        block = self.block[v]
+        occupant = self.occupant
+        lab_days = self.day_cells if var.kind == 'lab' and self.resource_class else None
+
+        conflict = {}
+        for ti, time_cells in enumerate(layout['cells']):
+            if block[ti] > 0:
+                # Earliest decision blocking this time (AC blocks have no occupant)
+                blockers = [self.course_day_level.get((section_id, course_id, time_cells[0][0]))]
+                for cell in time_cells:
+                    blockers.append(occupant.get(('section', section_id, cell)))
+                    blockers.append(occupant.get(('teacher', teacher_id, cell)))
+                day = self.day_order[time_cells[0][0]]
+                for w, w_first in self.siblings[v]:
+                    if self.assigned[w]:
+                        w_day = self.day_order[self.current[w][0]]
+                        if day <= w_day if w_first else day >= w_day:
+                            blockers.append(self.level[w])
+                blockers = [l for l in blockers if l is not None]
+                if blockers:
+                    merge_conflict(conflict, {min(blockers): True})
+                continue
+
+            # Open time: blame whoever occupies the rooms it lost (in phase
+            # one, every class counted at the cell uses up the capacity)
+            if self.room_type[v] is not None:
+                if self.free[v][ti] == 0:
+                    for cell in time_cells:
+                        merge_conflict(conflict, {l: False for l in self.cell_levels[cell]})
+                continue
+            for resource in self.resources[v]:
+                holders = [occupant.get(('room', resource, cell)) for cell in time_cells]
+                holders = [l for l in holders if l is not None]
+                if holders:
+                    merge_conflict(conflict, {min(holders): False})
+                if lab_days is not None:
+                    for cell in lab_days[time_cells[0][0]]:
+                        holder = occupant.get(('room', resource, cell))
+                        if holder is not None:
+                            merge_conflict(conflict, {holder: False})
+
+        for _, reason in self.reasons[v]:
+            merge_conflict(conflict, dict(reason))
+        return conflict
+
+    def assignment_at(self, level):
+        """(var, value) assigned at a decision level."""
+        _, var, value = self.stack[level]
+        return var, value
+
+    # ==================== ASSIGN / UNDO ====================
+
+    def assign(self, var, value):
+        """
+        Assign a domain value to a variable and prune the live domains of
+        every variable sharing its section, teacher, course or resource.
+        value: (day, slot, room) for theory, (day, slot1, slot2, lab) for labs
+        """
+        scheduler = self.scheduler
+        assignment = var.assignment
+        section_id = assignment.section_id
+        course_id = assignment.course_id
+        day = value[0]
+        resource = value[-1]
+        cells = [(day, slot) for slot in value[1:-1]]
+
+        mark = len(self.trail)
+        level = len(self.stack)
+        self.stack.append((mark, var, value))
+        self.assigned[var.id] = True
+        if self.demand is not None:
+            self._drop_demand(var.id, -1)
+        self.level[var.id] = level
+        self.current[var.id] = value
+        self.touched.append([])
+        trail = self.trail
+        shift = self.time_bits
+
+        # Find times that lose this resource (must check before occupying it;
+        # a phase one theory class has no room yet and uses up capacity instead)
+        room_changes = []
+        for w in self.by_resource[resource]:
+            layout = self.layout[w]
+            touched = set()
+            for cell in cells:
+                touched.update(layout['by_cell'].get(cell, ()))
+            for ti in touched:
+                if self._resource_free(resource, layout['masks'][ti]):
+                    room_changes.append((w, ti))
+
+        new_course_day = day not in scheduler.section_course_day.get(
+            (section_id, course_id), ())
+
+        # Update the scheduler's tracking structures
+        scheduler.assign_variable(var, value)
+
+        # Remember which decision made each owner busy (for backjumping)
+        for cell in cells:
+            self.occupant[('section', section_id, cell)] = level
+            self.occupant[('teacher', assignment.teacher_id, cell)] = level
+            if resource is not None:
+                self.occupant[('room', resource, cell)] = level
+        if new_course_day:
+            self.course_day_level[(section_id, course_id, day)] = level
+
+        # Prune: resource now occupied
+        for w, ti in room_changes:
+            self._change_free(w, ti, -1)
+            trail.append(((w << shift | ti) << 1) | 1)
+        if self.room_type[var.id] is not None:
+            for cell in cells:
+                self._take_capacity(cell, self.room_type[var.id], level)
+
+        # Prune: section and teacher now busy during these cells
+        for w in self.by_section[section_id] + self.by_teacher[assignment.teacher_id]:
+            by_cell = self.layout[w]['by_cell']
+            for cell in cells:
+                for ti in by_cell.get(cell, ()):
+                    self._change_block(w, ti, 1)
+                    trail.append((w << shift | ti) << 1)
+
+        # Prune: course cannot appear again on this day for this section
+        if new_course_day:
+            for w in self.by_course[(section_id, course_id)]:
+                for ti in self.layout[w]['by_day'].get(day, ()):
+                    self._change_block(w, ti, 1)
+                    trail.append((w << shift | ti) << 1)
+
+        # Prune: earlier sibling sessions need an earlier day, later ones a later day
+        if self.siblings[var.id]:
+            day_idx = self.day_order[day]
+            for w, w_first in self.siblings[var.id]:
+                if self.assigned[w]:
+                    continue
+                for other_day, times in self.layout[w]['by_day'].items():
+                    other_idx = self.day_order[other_day]
+                    if other_idx >= day_idx if w_first else other_idx <= day_idx:
+                        for ti in times:
+                            self._change_block(w, ti, 1)
+                            trail.append((w << shift | ti) << 1)
+
+    def undo(self):
+        """Undo the most recent assignment by replaying the trail backwards."""
+        level = len(self.stack) - 1
+        for w in self.touched.pop():
+            reasons = self.reasons[w]
+            while reasons and reasons[-1][0] == level:
+                reasons.pop()
+
+        mark, var, value = self.stack.pop()
+        self.level[var.id] = -1
+        del self.current[var.id]
+
+        assignment = var.assignment
+        day = value[0]
+        for slot in value[1:-1]:
+            cell = (day, slot)
+            del self.occupant[('section', assignment.section_id, cell)]
+            del self.occupant[('teacher', assignment.teacher_id, cell)]
+            if self.room_type[var.id] is not None:
+                self._return_capacity(cell, self.room_type[var.id])
+            else:
+                del self.occupant[('room', value[-1], cell)]
+        course_key = (assignment.section_id, assignment.course_id, day)
+        if self.course_day_level.get(course_key) == level:
+            del self.course_day_level[course_key]
+        trail = self.trail
+        shift = self.time_bits
+        time_mask = (1 << shift) - 1
+        while len(trail) > mark:
+            code = trail.pop()
+            entry = code >> 1
+            if code & 1:
+                self._change_free(entry >> shift, entry & time_mask, 1)
+            else:
+                self._change_block(entry >> shift, entry & time_mask, -1)
+        # Unassigned only now: the replay restored its counters as they were
+        self.assigned[var.id] = False
+        if self.demand is not None:
+            self._drop_demand(var.id, 1)
+        self.scheduler.unassign_variable(var, value)
+
+    # ==================== ARC CONSISTENCY (AC-3 / MAC) ====================
+
+    def _live_times(self, v):
+        """(mask, day) of every time that still has at least one live value."""
+        layout = self.layout[v]
+        block = self.block[v]
+        free = self.free[v]
+        return [(layout['masks'][ti], layout['times'][ti][0])
+                for ti in range(len(block)) if block[ti] == 0 and free[ti] > 0]
+
+    def _revise(self, x, y, same_course):
+        """
+        Remove times of x that have no compatible time left in y.
+        Two times conflict if they overlap (shared section/teacher) or, for
+        sessions of the same course, if they fall on the same day.
+        Returns the number of times removed from x.
+        """
+        y_live = self._live_times(y)
+
+        # Cheap support tests: a time overlaps at most 3 times of another
+        # variable, and a course conflict needs all of y on a single day
+        if same_course:
+            if len({day for _, day in y_live}) > 1:
+                return 0
+        elif len(y_live) > 3:
+            return 0
+
+        layout = self.layout[x]
+        block = self.block[x]
+        free = self.free[x]
+        removed = 0
+        for ti in range(len(block)):
+            if block[ti] != 0 or free[ti] == 0:
+                continue
+            x_mask = layout['masks'][ti]
+            x_day = layout['times'][ti][0]
+            for y_mask, y_day in y_live:
+                if not (x_mask & y_mask) and not (same_course and x_day == y_day):
+                    break  # supported
+            else:
+                self._change_block(x, ti, 1)
+                self.trail.append((x << self.time_bits | ti) << 1)
+                removed += 1
+
+        if removed and self.stack:
+            # x lost values because of y's domain: blame whatever pruned y,
+            # plus the current decision that triggered propagation
+            conflict = self.conflict_set(self.variables[y])
+            merge_conflict(conflict, {len(self.stack) - 1: False})
+            self._add_reason(x, tuple(sorted(conflict.items())))
+        return removed
+
+    def propagate(self, var=None):
+        """
+        AC-3 over the time constraints between unassigned variables
+        (teacher/section mutual exclusion and one session per day per course).
+        var=None runs the full pre-pass over every arc; passing the variable
+        that was just assigned re-establishes consistency around it (MAC).
+        Pruned values go on the trail, so undo() restores them.
+        Room exclusion is already enforced by forward checking on occupancy.
+        Returns False if some variable's domain was wiped out.
+        """
+        assigned = self.assigned
+        queue = deque()
+        queued = set()
+
+        def push(x, y, same_course):
+            if (x, y) not in queued and not assigned[x] and not assigned[y]:
+                queued.add((x, y))
+                queue.append((x, y, same_course))
+
+        self.wiped = None
+        if var is None:
+            sources = [v for v in range(len(assigned)) if not assigned[v]]
+        else:
+            sources = [w for w, _ in self.neighbors[var.id] if not assigned[w]]
+
+        for y in sources:
+            if self.size[y] == 0:
+                self.wiped = self.variables[y]
+                return False
+            for x, same_course in self.neighbors[y]:
+                push(x, y, same_course)
+
+        self.pruned = 0
+        while queue:
+            x, y, same_course = queue.popleft()
+            queued.discard((x, y))
+            if assigned[x] or assigned[y]:
+                continue
+            removed = self._revise(x, y, same_course)
+            if removed:
+                self.pruned += removed
+                if self.size[x] == 0:
+                    self.wiped = self.variables[x]
+                    return False  # Domain wipe-out
+                for z, z_same_course in self.neighbors[x]:
+                    if z != y:
+                        push(z, x, z_same_course)
+        return True
+
+    def capacity_report(self):
+        """
+        Counting checks that binary arc consistency can't see.
+        Returns a list of messages, e.g. a teacher or section with more
+        sessions than free slots, or a lab type with too little capacity.
+        """
+        scheduler = self.scheduler
+        cells_per_week = len(scheduler.day_list) * len(scheduler.slot_list)
+        teacher_need = defaultdict(int)
+        section_need = defaultdict(int)
+        lab_type_need = defaultdict(int)
+
+        for var in self.variables:
+            if self.assigned[var.id]:
+                continue
+            assignment = var.assignment
+            cells = 2 if var.kind == 'lab' else 1
+            teacher_need[assignment.teacher_id] += cells
+            section_need[assignment.section_id] += cells
+            if var.kind == 'lab':
+                lab_type_need[scheduler.course_dict[assignment.course_id].get('Lab_Type')] += cells
+
+        messages = []
+        for owner, need, busy in (('Teacher', teacher_need, scheduler.teacher_busy),
+                                  ('Section', section_need, scheduler.section_busy)):
+            for owner_id, cells in need.items():
+                available = cells_per_week - busy.get(owner_id, 0).bit_count()
+                if cells > available:
+                    messages.append(f"{owner} {owner_id} needs {cells} slots but only {available} are free")
+
+        for lab_type, cells in lab_type_need.items():
+            if not lab_type:
+                continue
+            labs = scheduler.labs_by_type.get(lab_type, [])
+            available = sum(cells_per_week - scheduler.room_busy.get(lab, 0).bit_count()
+                            for lab in labs)
+            if cells > available:
+                messages.append(f"Lab type {lab_type} needs {cells} lab slots but only {available} are free")
+        return messages
+
+    # ==================== DOMAIN QUERIES ====================
+
+    def domain_size(self, var):
+        """Number of live values in the variable's domain."""
+        return self.size[var.id]
+
+    def earliest_slot(self, var):
+        """Slot index of the earliest live value (999 if domain is empty)."""
+        v = var.id
+        if self.earliest[v] is not None:
+            return self.earliest[v]
+        block = self.block[v]
+        free = self.free[v]
+        slot_index = self.scheduler.slot_index
+        best = 999
+        for ti, time in enumerate(self.layout[v]['times']):
+            if block[ti] == 0 and free[ti] > 0:
+                idx = slot_index[time[1]]
+                if idx < best:
+                    best = idx
+        self.earliest[v] = best
+        return best
+
+    def get_values(self, var):
+        """
+        List the live domain values of a variable.
+        Returns (day, slot, room) tuples for theory, (day, slot1, slot2, lab) for labs.
+        With symmetry breaking, only the first free room/lab of each
+        equivalence class is listed per time (labs also need the same busy
+        cells on that day).
+        """
+        v = var.id
+        block = self.block[v]
+        free = self.free[v]
+        layout = self.layout[v]
+        classes = self.resource_class
+        room_busy = self.scheduler.room_busy
+        values = []
+        for ti, time in enumerate(layout['times']):
+            if block[ti] != 0 or free[ti] == 0:
+                continue
+            mask = layout['masks'][ti]
+            day_mask = self.day_mask.get(time[0], 0)
+            offered = set()
+            for resource in self.resources[v]:
+                if self._resource_free(resource, mask):
+                    if classes:
+                        key = classes[resource]
+                        if key[0] == 'lab':
+                            key += (room_busy.get(resource, 0) & day_mask,)
+                        if key in offered:
+                            self.rooms_skipped += 1
+                            continue
+                        offered.add(key)
+                    values.append(time + (resource,))
+        return values
+
+    def value_impacts(self, var, values):
+        """
+        For each value, the estimated number of time options assigning it
+        would take from the other unassigned variables: times of classes
+        sharing its section or teacher during its cells, of its course on
+        its day, the days sibling sessions lose to the day order, and the
+        times of classes that could use its resource during its cells (each
+        spread over that class's suitable resources).
+        Needs impacts=True. A neighbour sharing several owners counts once
+        per owner.
+        """
+        v = var.id
+        assignment = var.assignment
+        section_id = assignment.section_id
+        teacher_id = assignment.teacher_id
+        course_id = assignment.course_id
+        layout = self.layout[v]
+        demand = self.demand
+        day_order = self.day_order
+
+        def live_by_day(w):
+            """{day: live times of w on that day}"""
+            block = self.block[w]
+            free = self.free[w]
+            return {day: sum(1 for ti in times if block[ti] == 0 and free[ti])
+                    for day, times in self.layout[w]['by_day'].items()}
+
+        def own_live(cell):
+            """Live times of the variable itself covering a cell."""
+            return sum(1 for ti in layout['by_cell'][cell] if block[ti] == 0 and free[ti])
+
+        block = self.block[v]
+        free = self.free[v]
+        own_by_day = live_by_day(v)
+        own_share = 1 / len(self.resources[v])
+        siblings = [(live_by_day(w), w_first) for w, w_first in self.siblings[v]
+                    if not self.assigned[w]]
+
+        day_impact = {}  # Course-day and sibling order part, per day
+        time_impact = {}  # Section, teacher and own part, per time
+        impacts = []
+        for value in values:
+            day = value[0]
+            if day not in day_impact:
+                impact = demand.get(('course', section_id, course_id, day), 0) - own_by_day[day]
+                for sibling_days, w_first in siblings:
+                    for other_day, count in sibling_days.items():
+                        if (day_order[other_day] > day_order[day] if w_first
+                                else day_order[other_day] < day_order[day]):
+                            impact += count
+                day_impact[day] = impact
+
+            time = value[:-1]
+            time_cells = layout['cells'][layout['index'][time]]
+            if time not in time_impact:
+                impact = 0
+                for cell in time_cells:
+                    impact += (demand.get(('section', section_id, cell), 0)
+                               + demand.get(('teacher', teacher_id, cell), 0)
+                               - 3 * own_live(cell))
+                time_impact[time] = impact
+
+            impact = day_impact[day] + time_impact[time]
+            for cell in time_cells:
+                impact += self.room_demand[cell].get(value[-1], 0) - own_live(cell) * own_share
+            impacts.append(impact)
+        return impacts
+
+    def get_time_values(self, var):
+        """
+        One live value per time, with no room: (day, slot, None). Used by
+        two-phase solving, which branches on times only and counts the rooms
+        (see ROOM CAPACITY); RoomMatcher.seat_classes picks them afterwards.
+        """
+        v = var.id
+        block = self.block[v]
+        free = self.free[v]
+        return [time + (None,) for ti, time in enumerate(self.layout[v]['times'])
+                if block[ti] == 0 and free[ti] > 0]
+
+
+class NogoodStore:
+    """
+    Learned nogoods for conflict-directed backjumping.
+
+    A nogood is a set of (variable id, key) members that can't all hold at
+    once. key is either the full value or, when only the time mattered, the
+    value without its room - then the member matches any room at that time.
+    Nogoods are indexed by each of their members, so checking a candidate
+    value only looks at nogoods that mention it.
+    """
+
+    def __init__(self, max_size=8, max_count=20000):
+        """
+        max_size: longest nogood worth keeping (long ones rarely fire again)
+        max_count: stop learning once this many nogoods are stored
+        """
+        self.max_size = max_size
+        self.max_count = max_count
+        self.count = 0
+        self.index = {}  # {(var_id, key): [nogood, ...]}
+
+    def learn(self, nogood):
+        """Store a nogood given as a tuple of (var_id, key) members."""
+        if len(nogood) > self.max_size or self.count >= self.max_count:
+            return
+        for member in nogood:
+            self.index.setdefault(member, []).append(nogood)
+        self.count += 1
+
+    @staticmethod
+    def _matches(current_value, key):
+        """True if an assigned value equals the key (full value or time only)."""
+        return current_value is not None and (current_value == key or current_value[:-1] == key)
+
+    def violated_by(self, var_id, value, current):
+        """
+        Find a nogood that would be completed by assigning value to var_id.
+        current: {var_id: value} of the variables assigned right now.
+        Returns the other members of that nogood, or None.
+        """
+        for key in (value, value[:-1]):
+            for nogood in self.index.get((var_id, key), ()):
+                others = [(v, k) for v, k in nogood if v != var_id]
+                if all(self._matches(current.get(v), k) for v, k in others):
+                    return others
+        return None
+
+
+class VariableHeap:
+    """
+    Unassigned variables ordered by a heuristic rank, for variable selection.
+
+    Ranks only depend on a variable's block/free counters, so after an
+    assignment or undo just the variables the forward checker marked as
+    changed are re-ranked and pushed again; entries for older ranks (or
+    assigned variables) are skipped when they reach the top. Selecting a
+    variable costs O(log V) instead of a scan over every unassigned one.
+    """
+
+    def __init__(self, checker, rank, variables):
+        """
+        checker: the ForwardChecker whose 'changed' set drives the updates
+        rank: function var -> sortable key (smallest first)
+        variables: the unassigned variables to start with
+        """
+        self.checker = checker
+        self.rank = rank
+        self.heap = []  # (key, var id, version)
+        self.version = [0] * len(checker.variables)
+        self.active = [False] * len(checker.variables)
+        self.count = 0
+        self.refreshed = 0  # Ranks computed so far
+        for var in variables:
+            self.add(var)
+        checker.changed.clear()
+
+    def __len__(self):
+        return self.count
+
+    def _push(self, v):
+        """(Re-)rank an active variable; its older heap entries become stale."""
+        self.version[v] += 1
+        self.refreshed += 1
+        heapq.heappush(self.heap, (self.rank(self.checker.variables[v]), v, self.version[v]))
+
+    def add(self, var):
+        """Make a variable unassigned again (e.g. after it was undone)."""
+        v = var.id
+        if not self.active[v]:
+            self.active[v] = True
+            self.count += 1
+            self._push(v)
+
+    def remove(self, var):
+        """Take a variable out (it is about to be assigned)."""
+        v = var.id
+        if self.active[v]:
+            self.active[v] = False
+            self.version[v] += 1
+            self.count -= 1
+
+    def best(self):
+        """Unassigned variable with the smallest rank (None if there is none)."""
+        changed = self.checker.changed
+        for v in changed:
+            if self.active[v]:
+                self._push(v)
+        changed.clear()
+
+        heap = self.heap
+        if len(heap) > 4 * self.count + 64:
+            # Mostly stale entries: rebuild from the live ones
+            heap[:] = [entry for entry in heap
+                       if self.active[entry[1]] and entry[2] == self.version[entry[1]]]
+            heapq.heapify(heap)
+        while heap:
+            _, v, version = heap[0]
+            if self.active[v] and version == self.version[v]:
+                return self.checker.variables[v]
+            heapq.heappop(heap)
+        return None
@@ -2,7 +2,7 @@ import pandas as pd
 import random
 
 
-def generate_large_database():
+def generate_large_database(output_file='university_database_large.xlsx'):
     """Generate expanded university database with more rooms, labs, teachers, courses, and sections"""
 
     # 1. ROOMS - Expanded: Z103-Z140, Z203-Z240, A103-A140, A203-A240, B103-B140, P1-P20
@@ -656,7 +656,7 @@ def generate_large_database():
     ]
 
     # Create Excel file with multiple sheets
-    with pd.ExcelWriter('university_database_large.xlsx', engine='openpyxl') as writer:
+    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
         pd.DataFrame(rooms_data).to_excel(writer, sheet_name='Rooms', index=False)
         pd.DataFrame(labs_data).to_excel(writer, sheet_name='Labs', index=False)
         pd.DataFrame(teachers_data).to_excel(writer, sheet_name='Teachers', index=False)
@@ -666,7 +666,7 @@ def generate_large_database():
         pd.DataFrame(time_slots_data).to_excel(writer, sheet_name='Time_Slots', index=False)
         pd.DataFrame(days_data).to_excel(writer, sheet_name='Days', index=False)
 
-    print("✓ Large database generated successfully: university_database_large.xlsx")
+    print(f"✓ Large database generated successfully: {output_file}")
     print(f"  - {len(rooms_data)} Rooms (Buildings Z, A, B, and P with expanded ranges)")
     print(f"  - {len(labs_data)} Labs (28 labs across 7 types)")
     print(f"  - {len(teachers_data)} Teachers")
@@ -0,0 +1,71 @@
+class ScheduleStore:
+    """
+    Indexed storage for scheduled classes.
+
+    Every class is stored under the key (day, slot, section, course), so adding
+    and removing a class are O(1) instead of rebuilding a list. A reference
+    count per (section, course, day) tells in O(1) whether a course still has
+    a class on a day after one is removed (labs use two slots on the same day).
+
+    Classes are r_records.ScheduledClass records. Iterating the store yields
+    them in insertion order, and they read like the schedule row dicts of the
+    old list-of-dicts schedule (cls['Day'] etc.), so the store can be used
+    anywhere that list was used:
+        {'Assignment_ID', 'Section_ID', 'Course_ID', 'Teacher_ID',
+         'Day', 'Slot', 'Room_or_Lab', 'Type'}
+    """
+
+    def __init__(self):
+        self.entries = {}  # {(day, slot, section_id, course_id): ScheduledClass}
+        self.course_day_count = {}  # {(section_id, course_id, day): classes on that day}
+
+    def add(self, entry):
+        """
+        Store one scheduled class (a ScheduledClass record). A class already
+        stored at the same (day, slot, section, course) is replaced and is
+        not counted twice.
+        """
+        key = (entry.day, entry.slot, entry.section_id, entry.course_id)
+        replaced = key in self.entries
+        self.entries[key] = entry
+        if replaced:
+            return
+
+        count_key = (entry.section_id, entry.course_id, entry.day)
+        self.course_day_count[count_key] = self.course_day_count.get(count_key, 0) + 1
+
+    def remove(self, day, slot, section_id, course_id):
+        """
+        Remove the class stored at (day, slot, section, course).
+        Returns the number of classes this course still has on that day.
+        """
+        entry = self.entries.pop((day, slot, section_id, course_id), None)
+        count_key = (section_id, course_id, day)
+        if entry is None:
+            return self.course_day_count.get(count_key, 0)
+
+        remaining = self.course_day_count[count_key] - 1
+        if remaining:
+            self.course_day_count[count_key] = remaining
+        else:
+            del self.course_day_count[count_key]
+        return remaining
+
+    def classes_on_day(self, section_id, course_id, day):
+        """Number of classes of this course the section has on this day."""
+        return self.course_day_count.get((section_id, course_id, day), 0)
+
+    def to_list(self):
+        """List-of-dicts view of the schedule (schedule row dicts, in insertion order)."""
+        return [entry.to_dict() for entry in self.entries.values()]
+
+    def clear(self):
+        """Remove every scheduled class."""
+        self.entries.clear()
+        self.course_day_count.clear()
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
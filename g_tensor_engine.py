@@ -0,0 +1,182 @@
+import numpy as np
+
+
+class TensorDomainEngine:
+    """
+    Optional NumPy engine for domain generation.
+
+    Keeps occupancy as boolean arrays:
+        section_occ  -> sections x days x slots
+        teacher_occ  -> teachers x days x slots
+        room_occ     -> rooms/labs x days x slots
+    and computes a variable's whole candidate set as one broadcasted mask
+    instead of looping over days x slots x rooms in Python.
+
+    Domains come back in the same order as the pure-Python path
+    (day, then slot, then resource in the order given). The forward checker
+    takes its free-resource counts per time from free_counts.
+    """
+
+    def __init__(self, scheduler):
+        """Create empty occupancy arrays sized from the scheduler's data."""
+        self.day_list = scheduler.day_list
+        self.slot_list = scheduler.slot_list
+        # Object arrays so names can be gathered with fancy indexing
+        self.day_names = np.array(self.day_list, dtype=object)
+        self.slot_names = np.array(self.slot_list, dtype=object)
+        self.day_index = {day: idx for idx, day in enumerate(self.day_list)}
+        self.slot_index = scheduler.slot_index
+
+        # ==================== OWNER INDICES ====================
+        self.section_index = {s['Section_ID']: idx for idx, s in enumerate(scheduler.sections)}
+        self.teacher_index = {t['Teacher_ID']: idx for idx, t in enumerate(scheduler.teachers)}
+        resources = [r['Room_Number'] for r in scheduler.rooms] + [l['Lab_Name'] for l in scheduler.labs]
+        self.resource_index = {name: idx for idx, name in enumerate(resources)}
+
+        # ==================== OCCUPANCY ARRAYS ====================
+        shape = (len(self.day_list), len(self.slot_list))
+        self.section_occ = np.zeros((len(self.section_index),) + shape, dtype=bool)
+        self.teacher_occ = np.zeros((len(self.teacher_index),) + shape, dtype=bool)
+        self.room_occ = np.zeros((len(self.resource_index),) + shape, dtype=bool)
+
+        # Cache of resource-name tuples -> (index array, names array)
+        self.resource_cache = {}
+
+    # ==================== OCCUPANCY UPDATES ====================
+
+    def set_busy(self, day, slot, section_id, teacher_id, resource, busy):
+        """
+        Mark (or clear) one (day, slot) cell for a section, teacher and room/lab
+        (resource None: a phase one class of two-phase solving, no room yet).
+        """
+        d = self.day_index[day]
+        t = self.slot_index[slot]
+        self.section_occ[self.section_index[section_id], d, t] = busy
+        self.teacher_occ[self.teacher_index[teacher_id], d, t] = busy
+        if resource is not None:
+            self.room_occ[self.resource_index[resource], d, t] = busy
+
+    def block(self, kind, owner_id, day, slot):
+        """Mark a teacher ('teacher') or room/lab ('room') as unavailable at one cell."""
+        d = self.day_index[day]
+        t = self.slot_index[slot]
+        if kind == 'teacher':
+            self.teacher_occ[self.teacher_index[owner_id], d, t] = True
+        else:
+            self.room_occ[self.resource_index[owner_id], d, t] = True
+
+    # ==================== DOMAIN GENERATION ====================
+
+    def _resources(self, resources):
+        """Index array and name array for a tuple of resource names (cached)."""
+        key = tuple(resources)
+        cached = self.resource_cache.get(key)
+        if cached is None:
+            cached = (np.array([self.resource_index[r] for r in key], dtype=np.intp),
+                      np.array(key, dtype=object))
+            self.resource_cache[key] = cached
+        return cached
+
+    def _day_mask(self, blocked_days):
+        """Boolean array over days: True where the course may still be scheduled."""
+        allowed = np.ones(len(self.day_list), dtype=bool)
+        for day in blocked_days:
+            allowed[self.day_index[day]] = False
+        return allowed
+
+    def _slot_columns(self, slot_options):
+        """Column indices of the given slots (unknown slots are ignored)."""
+        return np.array([self.slot_index[s] for s in slot_options if s in self.slot_index],
+                        dtype=np.intp)
+
+    def theory_mask(self, section_id, teacher_id, resources, slot_options, blocked_days=()):
+        """
+        Boolean mask (days x slot_options x resources) of free theory options.
+        Cheap to count (mask.sum()) without building any tuples.
+        blocked_days: days on which the course is already scheduled for the section
+        """
+        slot_cols = self._slot_columns(slot_options)
+        room_idx, _ = self._resources(resources)
+
+        # days x slots: section and teacher both free
+        people_free = ~(self.section_occ[self.section_index[section_id]] |
+                        self.teacher_occ[self.teacher_index[teacher_id]])[:, slot_cols]
+        people_free &= self._day_mask(blocked_days)[:, None]
+
+        # rooms x days x slots -> days x slots x rooms
+        room_free = ~self.room_occ[room_idx][:, :, slot_cols].transpose(1, 2, 0)
+
+        return people_free[:, :, None] & room_free
+
+    def theory_domain(self, section_id, teacher_id, resources, slot_options, blocked_days=()):
+        """
+        All free (day, slot, room) combinations for a theory class.
+        slot_options: slots the class may use (unknown slots are ignored)
+        blocked_days: days on which the course is already scheduled for the section
+        """
+        slot_cols = self._slot_columns(slot_options)
+        _, room_names = self._resources(resources)
+        if len(slot_cols) == 0 or len(room_names) == 0:
+            return []
+
+        mask = self.theory_mask(section_id, teacher_id, resources, slot_options, blocked_days)
+        days, slots, rooms = np.nonzero(mask)
+
+        # Gather names column-wise and let zip build the tuples
+        return list(zip(self.day_names[days].tolist(),
+                        self.slot_names[slot_cols[slots]].tolist(),
+                        room_names[rooms].tolist()))
+
+    def lab_mask(self, section_id, teacher_id, resources, blocked_days=()):
+        """
+        Boolean mask (days x slot pairs x resources) of free lab options.
+        Consecutive-slot windows are a shifted AND over the slot axis.
+        """
+        lab_idx, _ = self._resources(resources)
+
+        people_busy = (self.section_occ[self.section_index[section_id]] |
+                       self.teacher_occ[self.teacher_index[teacher_id]])
+        # days x pairs: free in slot i and slot i+1
+        people_free = ~(people_busy[:, :-1] | people_busy[:, 1:])
+        people_free &= self._day_mask(blocked_days)[:, None]
+
+        lab_busy = self.room_occ[lab_idx]
+        lab_free = ~(lab_busy[:, :, :-1] | lab_busy[:, :, 1:]).transpose(1, 2, 0)
+
+        return people_free[:, :, None] & lab_free
+
+    def lab_domain(self, section_id, teacher_id, resources, blocked_days=()):
+        """All free (day, slot1, slot2, lab) combinations for a lab session."""
+        _, lab_names = self._resources(resources)
+        if len(self.slot_list) < 2 or len(lab_names) == 0:
+            return []
+
+        mask = self.lab_mask(section_id, teacher_id, resources, blocked_days)
+        days, pairs, labs = np.nonzero(mask)
+
+        return list(zip(self.day_names[days].tolist(),
+                        self.slot_names[pairs].tolist(),
+                        self.slot_names[pairs + 1].tolist(),
+                        lab_names[labs].tolist()))
+
+    def free_counts(self, resources, times):
+        """
+        Number of the given rooms/labs free during each time, as a list.
+        times: (day, slot, ...) tuples as in the forward checker's layouts;
+        a resource counts only if it is free in every slot of the time.
+        Used by ForwardChecker to set up its free-resource counters.
+        """
+        room_idx, _ = self._resources(resources)
+        if len(times) == 0:
+            return []
+        if len(room_idx) == 0:
+            return [0] * len(times)
+
+        # resources x times, one gather per slot position of the window
+        occ = self.room_occ[room_idx]
+        days = np.array([self.day_index[t[0]] for t in times], dtype=np.intp)
+        busy = np.zeros((len(room_idx), len(times)), dtype=bool)
+        for k in range(1, len(times[0])):
+            slots = np.array([self.slot_index[t[k]] for t in times], dtype=np.intp)
+            busy |= occ[:, days, slots]
+        return (~busy).sum(axis=0).tolist()
@@ -0,0 +1,188 @@
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+import traceback
+
+
+class PortfolioSolver:
+    """
+    Parallel portfolio of timetable searches.
+
+    The search's run time depends heavily on the variable shuffle and the
+    random tie-breaking, so instead of one long run, N worker processes each
+    solve the same loaded instance with their own seed and variable ordering
+    heuristic (see CSPTimetableScheduler.HEURISTICS). The first complete
+    timetable wins and the other workers are cancelled; if the time limit is
+    reached first, the most complete partial timetable is kept.
+
+    Where the OS supports fork, workers inherit the already loaded scheduler;
+    otherwise each worker reloads the instance from the scheduler's Excel file.
+    """
+
+    # Extra seconds to wait for workers to report after their time limit
+    REPORT_GRACE = 10
+
+    def __init__(self, scheduler, workers=None, configs=None, **options):
+        """
+        scheduler: a loaded CSPTimetableScheduler (receives the winning timetable)
+        workers: number of processes (default: one per CPU, or len(configs))
+        configs: list of {'seed': int, 'heuristic': str}, one per worker
+        options: passed on to generate_timetable in every worker; a heuristic
+                 given here is used by every config that doesn't name one
+                 (and by all default configs)
+        """
+        self.scheduler = scheduler
+        if 'time_limit' in options:
+            raise ValueError("Pass time_limit to solve(), not as a generate_timetable option")
+        self.heuristic = options.pop('heuristic', None)
+        self.options = options
+
+        if configs is None:
+            workers = workers or os.cpu_count() or 1
+            configs = self.default_configs(workers)
+        self.configs = list(configs)
+        for config in [{'heuristic': self.heuristic}] + self.configs:
+            if self.heuristic_of(config) not in scheduler.HEURISTICS:
+                raise ValueError(f"Unknown heuristic: {config['heuristic']!r} "
+                                 f"(use one of {scheduler.HEURISTICS})")
+
+        self.results = []  # Reports received from workers
+        self.best = None  # Report whose timetable was kept
+
+    def default_configs(self, workers):
+        """
+        One config per worker: seeds counting up, heuristics taken in turn
+        (or the heuristic given in the options for all of them).
+        """
+        base_seed = random.randrange(2 ** 32)
+        heuristics = self.scheduler.HEURISTICS if self.heuristic is None else (self.heuristic,)
+        return [{'seed': base_seed + i, 'heuristic': heuristics[i % len(heuristics)]}
+                for i in range(workers)]
+
+    def heuristic_of(self, config):
+        """Heuristic a config runs with."""
+        return config.get('heuristic') or self.heuristic or 'earliest-slot'
+
+    # ==================== WORKER PROCESS ====================
+
+    @staticmethod
+    def _run_worker(worker_id, scheduler, excel_file, domain_engine, config, options,
+                    time_limit, results):
+        """
+        Solve with one config and put a report on the results queue
+        (options already hold the config's heuristic). An exception is
+        reported as {'worker', 'error'} with its traceback.
+        """
+        # Keep the console readable: only the parent prints
+        sys.stdout = open(os.devnull, 'w')
+
+        try:
+            if scheduler is None:
+                from b_CSPTimetableScheduler import CSPTimetableScheduler
+                scheduler = CSPTimetableScheduler(excel_file, domain_engine)
+
+            random.seed(config['seed'])
+            start_time = time.perf_counter()
+            success_count, failed = scheduler.generate_timetable(time_limit=time_limit, **options)
+        except Exception:
+            results.put({'worker': worker_id, 'error': traceback.format_exc()})
+            return
+
+        results.put({
+            'worker': worker_id,
+            'config': config,
+            'success_count': success_count,
+            'failed': len(failed),
+            'classes': len(scheduler.schedule),
+            'time': time.perf_counter() - start_time,
+            'schedule': scheduler.schedule.to_list()
+        })
+
+    # ==================== PORTFOLIO SEARCH ====================
+
+    def solve(self, time_limit=None):
+        """
+        Start the workers and wait for the first complete timetable, or until
+        every worker has reported (each stops itself at time_limit).
+        The best timetable is loaded into the scheduler; returns its report
+        (None if no worker reported).
+        """
+        scheduler = self.scheduler
+        print("=" * 80)
+        print(f"PORTFOLIO SEARCH WITH {len(self.configs)} WORKERS")
+        print("=" * 80)
+        for worker_id, config in enumerate(self.configs):
+            print(f"  Worker {worker_id}: seed {config['seed']}, {self.heuristic_of(config)}")
+        print()
+
+        # Fork shares the loaded instance; other start methods reload it
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+            shared = scheduler
+        else:
+            context = multiprocessing.get_context()
+            shared = None
+
+        results = context.Queue()
+        processes = [context.Process(target=self._run_worker,
+                                     args=(worker_id, shared, scheduler.excel_file,
+                                           scheduler.domain_engine, config,
+                                           {**self.options, 'heuristic': self.heuristic_of(config)},
+                                           time_limit, results),
+                                     daemon=True)
+                     for worker_id, config in enumerate(self.configs)]
+        sys.stdout.flush()  # Don't let forked workers inherit buffered output
+        for process in processes:
+            process.start()
+
+        deadline = None if time_limit is None else time.perf_counter() + time_limit + self.REPORT_GRACE
+        self.results = []
+        errors = []  # (worker, traceback) of workers that raised
+        try:
+            while len(self.results) + len(errors) < len(processes):
+                timeout = 1 if deadline is None else min(1, deadline - time.perf_counter())
+                if timeout <= 0:
+                    break  # Workers that haven't reported by now are dropped
+                try:
+                    report = results.get(timeout=timeout)
+                except queue.Empty:
+                    if not any(p.is_alive() for p in processes) and results.empty():
+                        break  # Every worker died without reporting
+                    continue
+
+                if 'error' in report:
+                    errors.append((report['worker'], report['error']))
+                    print(f"  Worker {report['worker']} failed:\n{report['error']}")
+                    continue
+
+                self.results.append(report)
+                print(f"  Worker {report['worker']} finished: {report['success_count']} assignments "
+                      f"scheduled, {report['failed']} failed ({report['time']:.2f}s)")
+                if report['failed'] == 0:
+                    break  # Complete timetable - no need to wait for the others
+        finally:
+            # Cancel whoever is still searching
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+
+        if not self.results and errors:
+            worker_id, error = errors[0]
+            raise RuntimeError(f"Every reporting portfolio worker failed; worker {worker_id}:\n{error}")
+        if not self.results:
+            print("No worker reported a timetable\n")
+            self.best = None
+            return None
+
+        # Most scheduled assignments, then most classes, then fastest
+        self.best = max(self.results,
+                        key=lambda r: (r['success_count'], r['classes'], -r['time']))
+        scheduler.load_schedule(self.best['schedule'])
+        print(f"\nUsing timetable of worker {self.best['worker']} "
+              f"(seed {self.best['config']['seed']}, {self.heuristic_of(self.best['config'])})\n")
+        return self.best
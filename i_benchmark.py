@@ -0,0 +1,261 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from b_CSPTimetableScheduler import CSPTimetableScheduler
+from c_exceldata import generate_database
+from exceldata_large import generate_large_database
+
+# ==================== BENCHMARK SETUP ====================
+
+# Base instance generators (each writes a full university workbook)
+GENERATORS = {
+    'small': generate_database,
+    'large': generate_large_database
+}
+
+# Sheets copied once per scale factor; ID columns get a suffix per copy so
+# every copy is an independent set of sections, teachers, rooms and labs
+SCALED_SHEETS = ('Rooms', 'Labs', 'Teachers', 'Sections', 'Course_Assignments')
+ID_COLUMNS = ('Room_Number', 'Lab_Name', 'Teacher_ID', 'Section_ID', 'Assignment_ID')
+
+# Scheduler configurations: domain_engine goes to the constructor,
+# everything else to generate_timetable ('python' and 'numpy' search the
+# same way and differ only in domain generation time; 'lcv' pays off on
+# tight instances, e.g. generated with few days, not on roomy ones)
+CONFIGS = {
+    'python': {'domain_engine': 'python'},
+    'numpy': {'domain_engine': 'numpy'},
+    'mrv': {'heuristic': 'mrv'},
+    'chronological': {'backjumping': False},
+    'mac': {'maintain_arc_consistency': True},
+    'two-phase': {'two_phase': True},
+    'no-symmetry': {'symmetry_breaking': False},
+    'lcv': {'value_order': 'lcv'}
+}
+
+
+def scale_database(source, factor, output_file):
+    """
+    Write a copy of the workbook with factor times as many sections,
+    teachers, rooms and labs (courses, days and time slots are shared).
+    """
+    sheets = pd.read_excel(source, sheet_name=None)
+
+    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        for name, df in sheets.items():
+            if name in SCALED_SHEETS:
+                copies = []
+                for copy in range(factor):
+                    part = df.copy()
+                    if copy:
+                        for column in ID_COLUMNS:
+                            if column in part:
+                                part[column] = part[column].astype(str) + f'_{copy}'
+                    copies.append(part)
+                df = pd.concat(copies, ignore_index=True)
+            df.to_excel(writer, sheet_name=name, index=False)
+
+
+def make_instance(generator, scale, seed, directory):
+    """
+    Path of the seeded instance (generated on first use and reused after).
+    Instances are named <generator>_x<scale>_s<seed>.xlsx.
+    """
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{generator}_x1_s{seed}.xlsx")
+    if not os.path.exists(base):
+        random.seed(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            GENERATORS[generator](base)
+
+    if scale == 1:
+        return base
+    path = os.path.join(directory, f"{generator}_x{scale}_s{seed}.xlsx")
+    if not os.path.exists(path):
+        scale_database(base, scale, path)
+    return path
+
+
+# ==================== RUNNING ====================
+
+def run_case(path, config, seed, time_limit=None, measure_memory=True):
+    """
+    Load and solve one instance with one configuration.
+    Returns a result dict (times in seconds, memory in MB).
+    """
+    options = dict(CONFIGS[config])
+    domain_engine = options.pop('domain_engine', 'python')
+
+    def solve():
+        load_start = time.perf_counter()
+        scheduler = CSPTimetableScheduler(path, domain_engine)
+        load_time = time.perf_counter() - load_start
+
+        random.seed(seed)
+        start = time.perf_counter()
+        success_count, failed = scheduler.generate_timetable(time_limit=time_limit, **options)
+        return scheduler, success_count, load_time, time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler, success_count, load_time, wall_time = solve()
+
+        # Second, identical run under tracemalloc (it slows Python down,
+        # so it must not be the run that is timed)
+        peak_memory = None
+        if measure_memory:
+            tracemalloc.start()
+            try:
+                solve()
+                peak_memory = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            finally:
+                tracemalloc.stop()
+
+    total = len(scheduler.assignments)
+    return {
+        'config': config,
+        'load_time': round(load_time, 4),
+        'wall_time': round(wall_time, 4),
+        'nodes': scheduler.stats.counters['nodes'],
+        'backtracks': scheduler.stats.counters['backtracks'],
+        'peak_memory_mb': None if peak_memory is None else round(peak_memory, 2),
+        'assignments': total,
+        'success_rate': round(success_count / total, 4) if total else 1.0,
+        'classes': len(scheduler.schedule),
+        'phases': {name: timer['seconds'] for name, timer in scheduler.stats.to_dict()['timers'].items()}
+    }
+
+
+def run_benchmarks(generators=('small', 'large'), scales=(1, 2), seeds=(0,),
+                   configs=('python', 'numpy'), time_limit=60,
+                   directory='benchmark_instances', measure_memory=True):
+    """Run every configuration on every generated instance. Returns the report dict."""
+    results = []
+    for generator in generators:
+        for scale in scales:
+            for seed in seeds:
+                path = make_instance(generator, scale, seed, directory)
+                instance = os.path.splitext(os.path.basename(path))[0]
+                for config in configs:
+                    try:
+                        result = run_case(path, config, seed, time_limit, measure_memory)
+                    except ImportError as error:
+                        # e.g. the numpy engine without NumPy installed
+                        print(f"  {instance:<22} {config:<14} skipped ({error})")
+                        continue
+                    result = {'instance': instance, 'generator': generator,
+                              'scale': scale, 'seed': seed, **result}
+                    results.append(result)
+                    print_result(result)
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time_limit': time_limit,
+        'results': results
+    }
+
+
+def print_result(result):
+    """One line of the results table."""
+    memory = result['peak_memory_mb']
+    memory = '-' if memory is None else f"{memory:.1f}MB"
+    print(f"  {result['instance']:<22} {result['config']:<14} "
+          f"{result['wall_time']:>8.2f}s {result['nodes']:>8} nodes "
+          f"{result['backtracks']:>7} backtracks {memory:>9} "
+          f"{result['success_rate'] * 100:>6.1f}%")
+
+
+# ==================== BASELINE COMPARISON ====================
+
+def compare_reports(report, baseline, tolerance=0.25, min_seconds=0.1):
+    """
+    Compare a report against a baseline report.
+    A run regresses when its success rate drops, or its time, nodes or peak
+    memory grow by more than tolerance (times also by at least min_seconds).
+    Returns a list of messages (empty = no regressions).
+    """
+    baseline_runs = {(r['instance'], r['config']): r for r in baseline['results']}
+    regressions = []
+
+    for result in report['results']:
+        old = baseline_runs.get((result['instance'], result['config']))
+        if old is None:
+            continue
+        name = f"{result['instance']} [{result['config']}]"
+
+        if result['success_rate'] < old['success_rate']:
+            regressions.append(f"{name}: success rate {old['success_rate']:.1%} -> "
+                               f"{result['success_rate']:.1%}")
+        if (result['wall_time'] > old['wall_time'] * (1 + tolerance)
+                and result['wall_time'] - old['wall_time'] >= min_seconds):
+            regressions.append(f"{name}: wall time {old['wall_time']:.2f}s -> "
+                               f"{result['wall_time']:.2f}s")
+        if result['nodes'] > old['nodes'] * (1 + tolerance):
+            regressions.append(f"{name}: nodes {old['nodes']} -> {result['nodes']}")
+        if (result['peak_memory_mb'] is not None and old['peak_memory_mb'] is not None
+                and result['peak_memory_mb'] > old['peak_memory_mb'] * (1 + tolerance)):
+            regressions.append(f"{name}: peak memory {old['peak_memory_mb']:.1f}MB -> "
+                               f"{result['peak_memory_mb']:.1f}MB")
+
+    return regressions
+
+
+# ==================== MAIN PROGRAM ====================
+
+def main():
+    """Command line entry point: run, save the report, compare with a baseline."""
+    parser = argparse.ArgumentParser(description="Benchmark the timetable scheduler")
+    parser.add_argument('--generators', nargs='+', default=['small', 'large'], choices=list(GENERATORS))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 2])
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0])
+    parser.add_argument('--configs', nargs='+', default=['python', 'numpy'], choices=list(CONFIGS))
+    parser.add_argument('--time-limit', type=float, default=60,
+                        help="seconds per search before it stops (counts as partial success)")
+    parser.add_argument('--instances-dir', default='benchmark_instances')
+    parser.add_argument('--output', default='benchmark_report.json')
+    parser.add_argument('--baseline', help="report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative growth before a run counts as a regression")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory run")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("TIMETABLE SCHEDULER BENCHMARK")
+    print("=" * 80)
+    report = run_benchmarks(args.generators, args.scales, args.seeds, args.configs,
+                            args.time_limit, args.instances_dir, not args.no_memory)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+
+        print("\n" + "=" * 80)
+        print(f"COMPARISON WITH {args.baseline}")
+        print("=" * 80)
+        for message in regressions:
+            print(f"  ✗ {message}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) found\n")
+            sys.exit(1)
+        print("  ✓ No regressions\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class Instrumentation:
+    """
+    Counters and per-phase timers for the scheduler.
+
+    counters -> {name: count}            e.g. nodes, backtracks, nogoods_learned
+    timers   -> {name: [seconds, calls]} e.g. load, select_variable, assign
+    backtracks_by_depth -> {search depth: dead ends hit at that depth}
+    dead_ends -> {(section, course, kind): dead ends caused by that class}
+
+    Every update is a dict increment or a perf_counter() pair, so it is cheap
+    enough to leave on. Read it with to_dict()/to_json() after a run; with
+    enable_snapshots() the search also emits a snapshot every few seconds.
+    """
+
+    # Search loop iterations between two clock checks for snapshots
+    TICK_EVERY = 256
+
+    def __init__(self):
+        self.counters = Counter()
+        self.timers = {}
+        self.backtracks_by_depth = Counter()
+        self.dead_ends = Counter()
+
+        self.snapshot_interval = None  # Seconds between snapshots (None = off)
+        self.snapshot_callback = None
+        self.next_snapshot = None
+        self.ticks = 0
+        self.started = time.perf_counter()
+
+    def reset(self, keep=()):
+        """Clear everything except the timers named in keep (e.g. 'load')."""
+        self.counters.clear()
+        self.timers = {name: self.timers[name] for name in keep if name in self.timers}
+        self.backtracks_by_depth.clear()
+        self.dead_ends.clear()
+        self.ticks = 0
+        self.started = time.perf_counter()
+        if self.snapshot_interval is not None:
+            self.next_snapshot = self.started + self.snapshot_interval
+
+    # ==================== RECORDING ====================
+
+    def count(self, name, amount=1):
+        """Add amount to a counter."""
+        self.counters[name] += amount
+
+    def add_time(self, name, seconds):
+        """Add one timed call of a phase."""
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [seconds, 1]
+        else:
+            timer[0] += seconds
+            timer[1] += 1
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block:  with stats.phase('export'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def record_dead_end(self, depth, var):
+        """Count a dead end at this search depth, blamed on this variable."""
+        self.counters['backtracks'] += 1
+        self.backtracks_by_depth[depth] += 1
+        assignment = var.assignment
+        self.dead_ends[(assignment.section_id, assignment.course_id, var.kind)] += 1
+
+    def merge(self, recorded):
+        """
+        Add what another run recorded (e.g. a worker process) to this one.
+        recorded: {'counters', 'timers', 'backtracks_by_depth', 'dead_ends'}
+        as plain dicts of the same shape as the attributes. Counts and
+        seconds are summed (timers can add up to more than the wall time);
+        depth and max_depth keep the deepest value.
+        """
+        for name, count in recorded['counters'].items():
+            if name in ('depth', 'max_depth'):
+                self.counters[name] = max(self.counters[name], count)
+            else:
+                self.counters[name] += count
+        for name, (seconds, calls) in recorded['timers'].items():
+            timer = self.timers.setdefault(name, [0.0, 0])
+            timer[0] += seconds
+            timer[1] += calls
+        self.backtracks_by_depth.update(recorded['backtracks_by_depth'])
+        self.dead_ends.update(recorded['dead_ends'])
+
+    # ==================== SNAPSHOTS ====================
+
+    def enable_snapshots(self, interval=5.0, callback=None):
+        """
+        Emit a snapshot every interval seconds during the search.
+        callback(snapshot dict) defaults to printing a one-line summary.
+        """
+        self.snapshot_interval = interval
+        self.snapshot_callback = callback or self.print_snapshot
+        self.next_snapshot = time.perf_counter() + interval
+
+    def tick(self):
+        """Called once per search step; checks the clock every TICK_EVERY steps."""
+        self.ticks += 1
+        if self.next_snapshot is None or self.ticks % self.TICK_EVERY:
+            return
+        now = time.perf_counter()
+        if now >= self.next_snapshot:
+            self.next_snapshot = now + self.snapshot_interval
+            self.snapshot_callback(self.snapshot())
+
+    def snapshot(self):
+        """Small progress summary of the running search."""
+        return {
+            'elapsed': round(time.perf_counter() - self.started, 3),
+            'nodes': self.counters['nodes'],
+            'backtracks': self.counters['backtracks'],
+            'depth': self.counters['depth'],
+            'max_depth': self.counters['max_depth']
+        }
+
+    @staticmethod
+    def print_snapshot(snapshot):
+        """Default snapshot callback."""
+        print(f"  [{snapshot['elapsed']:.1f}s] nodes {snapshot['nodes']}, "
+              f"backtracks {snapshot['backtracks']}, depth {snapshot['depth']} "
+              f"(max {snapshot['max_depth']})")
+
+    # ==================== OUTPUT ====================
+
+    def to_dict(self, top_dead_ends=10):
+        """Everything recorded, as plain JSON-compatible types."""
+        return {
+            'counters': dict(self.counters),
+            'timers': {name: {'seconds': round(seconds, 6), 'calls': calls}
+                       for name, (seconds, calls) in self.timers.items()},
+            'backtracks_by_depth': {str(depth): n for depth, n in sorted(self.backtracks_by_depth.items())},
+            'top_dead_ends': [{'section': section, 'course': course, 'kind': kind, 'count': n}
+                              for (section, course, kind), n in self.dead_ends.most_common(top_dead_ends)]
+        }
+
+    def to_json(self, indent=2):
+        """to_dict() as a JSON string."""
+        return json.dumps(self.to_dict(), indent=indent)
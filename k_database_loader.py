@@ -0,0 +1,132 @@
+import hashlib
+import os
+import pickle
+
+from openpyxl import load_workbook
+
+# Sheets of the university database workbook
+DATABASE_SHEETS = ('Rooms', 'Labs', 'Teachers', 'Courses', 'Sections',
+                   'Course_Assignments', 'Time_Slots', 'Days')
+
+# Bump when the cached layout changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+# Value of empty cells (same as pandas, so existing pd.isna checks still work)
+MISSING = float('nan')
+
+
+def iter_workbook(excel_file, sheets=None):
+    """
+    Open the workbook once in streaming read-only mode and yield
+    (sheet name, list of row dicts) for every sheet (or only the named ones).
+    The first row of a sheet is its header; blank rows are skipped.
+    """
+    wb = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        names = wb.sheetnames if sheets is None else sheets
+        for name in names:
+            if name not in wb.sheetnames:
+                raise ValueError(f"Worksheet named '{name}' not found in {excel_file}")
+
+            rows = wb[name].iter_rows(values_only=True)
+            header = next(rows, ())
+            columns = []
+            for idx, col in enumerate(header):
+                col = f"Unnamed: {idx}" if col is None else col
+                # Repeated headers get a suffix (like pandas) so no column is lost
+                name_taken, copy = col, 0
+                while name_taken in columns:
+                    copy += 1
+                    name_taken = f"{col}.{copy}"
+                columns.append(name_taken)
+
+            records = []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                values = [MISSING if value is None else value for value in row[:len(columns)]]
+                values += [MISSING] * (len(columns) - len(values))
+                records.append(dict(zip(columns, values)))
+            yield name, records
+    finally:
+        wb.close()
+
+
+def read_workbook(excel_file, sheets=DATABASE_SHEETS):
+    """Parse the workbook in a single pass and return {sheet name: list of row dicts}."""
+    return dict(iter_workbook(excel_file, sheets))
+
+
+def cache_path(excel_file):
+    """Cache file stored next to the workbook."""
+    return excel_file + '.cache'
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_database(excel_file, use_cache=True):
+    """
+    Load the university database as {sheet name: list of row dicts}.
+
+    With use_cache, the parsed workbook is pickled to <excel_file>.cache,
+    keyed by the workbook's size, mtime and SHA-256. The cache is used when
+    size and mtime match (no hashing needed), or when only the mtime changed
+    but the content hash still matches; otherwise the workbook is parsed
+    again and the cache rewritten. A missing, unreadable or unwritable
+    cache just falls back to parsing the workbook.
+    """
+    if not use_cache:
+        return read_workbook(excel_file)
+
+    stat = os.stat(excel_file)
+    path = cache_path(excel_file)
+
+    # ==================== TRY THE CACHE ====================
+    cached = None
+    try:
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('version') != CACHE_VERSION:
+            cached = None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        cached = None
+
+    content_hash = None
+    if cached is not None and cached['size'] == stat.st_size:
+        if cached['mtime'] == stat.st_mtime_ns:
+            return cached['data']
+        # Touched but maybe not changed: compare contents
+        content_hash = file_hash(excel_file)
+        if cached['hash'] == content_hash:
+            write_cache(path, cached['data'], stat, content_hash)
+            return cached['data']
+
+    # ==================== REBUILD ====================
+    data = read_workbook(excel_file)
+    write_cache(path, data, stat, content_hash or file_hash(excel_file))
+    return data
+
+
+def write_cache(path, data, stat, content_hash):
+    """Write the cache file (skipped silently if the folder is read-only)."""
+    cached = {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'hash': content_hash,
+        'data': data
+    }
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)  # Never leave a half-written cache behind
+    except OSError:
+        pass
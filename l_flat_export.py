@@ -0,0 +1,128 @@
+import json
+
+import pandas as pd
+
+# Columns of the flat schedule, in output order
+FLAT_COLUMNS = ['Assignment_ID', 'Section_ID', 'Course_ID', 'Course_Name',
+                'Teacher_ID', 'Teacher_Name', 'Day', 'Slot', 'Slot_Time',
+                'Room_or_Lab', 'Type']
+
+# Rows per chunk when streaming JSON Lines
+JSONL_CHUNK_ROWS = 10000
+
+
+def _json_value(value):
+    """json.dumps fallback for NumPy scalars (e.g. IDs read as int64)."""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def flat_rows(scheduler):
+    """
+    Yield the flat schedule one row dict at a time (FLAT_COLUMNS), sorted
+    by day, slot and section, with course name, teacher name and slot time
+    looked up from the scheduler's dictionaries. Only the sorted references
+    to the scheduled classes are held at once.
+    """
+    course_dict = scheduler.course_dict
+    teacher_dict = scheduler.teacher_dict
+    day_order = {day: idx for idx, day in enumerate(scheduler.day_list)}
+    entries = sorted(scheduler.schedule,
+                     key=lambda e: (day_order[e.day], scheduler.slot_index[e.slot], str(e.section_id)))
+    for entry in entries:
+        course = course_dict.get(entry.course_id)
+        teacher = teacher_dict.get(entry.teacher_id)
+        yield {
+            'Assignment_ID': entry.assignment_id,
+            'Section_ID': entry.section_id,
+            'Course_ID': entry.course_id,
+            'Course_Name': None if course is None else course['Course_Name'],
+            'Teacher_ID': entry.teacher_id,
+            'Teacher_Name': None if teacher is None else teacher['Teacher_Name'],
+            'Day': entry.day,
+            'Slot': entry.slot,
+            'Slot_Time': scheduler.slot_times.get(entry.slot),
+            'Room_or_Lab': entry.room_or_lab,
+            'Type': entry.type
+        }
+
+
+def schedule_frame(scheduler):
+    """
+    The schedule as one flat DataFrame (one row per scheduled slot), sorted
+    by day, slot and section. Built from flat_rows, so every format gets the
+    same rows in the same order.
+    """
+    return pd.DataFrame(flat_rows(scheduler), columns=FLAT_COLUMNS)
+
+
+def export_csv(scheduler, output_file='generated_timetable.csv'):
+    """Write the flat schedule as CSV. Returns the number of rows written."""
+    df = schedule_frame(scheduler)
+    df.to_csv(output_file, index=False)
+    return len(df)
+
+
+def export_jsonl(scheduler, output_file='generated_timetable.jsonl'):
+    """
+    Write the flat schedule as JSON Lines (one class per line). Rows are
+    streamed from the schedule (see flat_rows) and written in chunks of
+    JSONL_CHUNK_ROWS lines, so beyond the schedule itself memory stays
+    bounded by one chunk. Returns the number of rows written.
+    """
+    rows = 0
+    chunk = []
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for row in flat_rows(scheduler):
+            chunk.append(json.dumps(row, ensure_ascii=False, separators=(',', ':'),
+                                    default=_json_value))
+            rows += 1
+            if len(chunk) == JSONL_CHUNK_ROWS:
+                f.write('\n'.join(chunk) + '\n')
+                chunk.clear()
+        if chunk:
+            f.write('\n'.join(chunk) + '\n')
+    return rows
+
+
+def export_parquet(scheduler, output_file='generated_timetable.parquet'):
+    """
+    Write the flat schedule as Parquet. Needs pyarrow or fastparquet
+    (raises ImportError without them). Returns the number of rows written.
+    """
+    df = schedule_frame(scheduler)
+    df.to_parquet(output_file, index=False)
+    return len(df)
+
+
+# ==================== READING BACK ====================
+
+def read_flat_schedule(scheduler, input_file):
+    """
+    Read a schedule written by export_csv/export_jsonl/export_parquet back
+    into schedule rows (the format of scheduler.schedule). IDs are matched
+    to the scheduler's own values, so e.g. numeric IDs come back as numbers.
+    """
+    if input_file.endswith('.jsonl'):
+        df = pd.read_json(input_file, orient='records', lines=True, dtype=False)
+    elif input_file.endswith('.parquet'):
+        df = pd.read_parquet(input_file)
+    else:
+        df = pd.read_csv(input_file, dtype=str, keep_default_na=False)
+
+    # str(ID) -> ID as loaded from the database
+    ids = {
+        'Assignment_ID': [a['Assignment_ID'] for a in scheduler.assignments],
+        'Section_ID': list(scheduler.section_dict),
+        'Course_ID': list(scheduler.course_dict),
+        'Teacher_ID': list(scheduler.teacher_dict),
+        'Room_or_Lab': list(scheduler.room_dict) + list(scheduler.lab_dict)
+    }
+    for column, values in ids.items():
+        lookup = {str(value): value for value in values}
+        df[column] = df[column].astype(str).map(lambda value: lookup.get(value, value))
+
+    columns = ['Assignment_ID', 'Section_ID', 'Course_ID', 'Teacher_ID',
+               'Day', 'Slot', 'Room_or_Lab', 'Type']
+    return df[columns].to_dict('records')
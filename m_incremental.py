@@ -0,0 +1,319 @@
+import math
+import numbers
+import random
+import time
+from collections import Counter, defaultdict
+
+from e_forward_checking import ForwardChecker
+from r_records import ScheduledClass
+
+
+class IncrementalRescheduler:
+    """
+    Repairs an existing timetable after a small change instead of
+    regenerating it from scratch.
+
+    A change set is a dict with any of:
+        'remove_assignments' -> [Assignment_ID, ...]
+        'add_assignments'    -> [Course_Assignments row dicts, ...]
+        'block_teacher'      -> [(teacher_id, day, slot), ...]
+        'block_room'         -> [(room or lab name, day, slot), ...]
+
+    Only the sessions the change touches are unscheduled (new sessions,
+    sessions sitting on a newly blocked cell, sessions that were already
+    missing) and searched for again while every other class stays fixed.
+    If that fails, the neighbourhood grows round by round to the classes
+    sharing a section or teacher with the sessions still unplaced. Sessions
+    with no possible value at all (e.g. their teacher is blocked all week)
+    are left out from the start, since no neighbourhood can help them. If
+    the last round still fails, the neighbours go back where they were. The
+    work is proportional to the size of the change, not of the university.
+    """
+
+    def __init__(self, scheduler):
+        """scheduler: a CSPTimetableScheduler holding the current timetable"""
+        self.scheduler = scheduler
+
+    # ==================== CURRENT TIMETABLE AS VARIABLES ====================
+
+    def current_variables(self, prune=True):
+        """
+        Match the scheduled classes to the variables of every assignment.
+        Returns (placed, unplaced): placed is a list of (var, value) with
+        values as in assign_variable, unplaced the variables with no class.
+        prune: remove scheduled classes that fit no variable from the
+        schedule (False = only read the placements)
+        """
+        scheduler = self.scheduler
+        day_order = {day: idx for idx, day in enumerate(scheduler.day_list)}
+
+        # Classes of each assignment, in week order
+        by_assignment = defaultdict(list)
+        for entry in scheduler.schedule:
+            by_assignment[entry.assignment_id].append(entry)
+        for entries in by_assignment.values():
+            entries.sort(key=lambda e: (day_order[e.day], scheduler.slot_index[e.slot]))
+
+        placed = []
+        unplaced = []
+        used = set()  # id() of matched classes
+        for var in scheduler.build_variables(scheduler.assignments):
+            entries = by_assignment.get(var.assignment.assignment_id, ())
+            value = None
+
+            if var.kind == 'theory':
+                theory = [e for e in entries if 'Lab' not in e.type]
+                if var.index < len(theory):
+                    entry = theory[var.index]
+                    value = (entry.day, entry.slot, entry.room_or_lab)
+                    used.add(id(entry))
+            else:
+                # Two consecutive slots of the same lab on the same day
+                labs = [e for e in entries if 'Lab' in e.type]
+                for first, second in zip(labs, labs[1:]):
+                    if (first.day == second.day and first.room_or_lab == second.room_or_lab
+                            and scheduler.slot_index[second.slot] == scheduler.slot_index[first.slot] + 1):
+                        value = (first.day, first.slot, second.slot, first.room_or_lab)
+                        used.update((id(first), id(second)))
+                        break
+
+            if value is None:
+                unplaced.append(var)
+            else:
+                placed.append((var, value))
+
+        # Leftover classes (e.g. extra sessions) would only get in the way
+        if not prune:
+            return placed, unplaced
+        for entry in list(scheduler.schedule):
+            if id(entry) not in used:
+                scheduler.unassign_class(entry.day, entry.slot, entry.section_id,
+                                         entry.teacher_id, entry.room_or_lab, entry.course_id)
+        return placed, unplaced
+
+    # ==================== CHANGE SET ====================
+
+    def _check_changes(self, changes):
+        """
+        Raise ValueError for changes that refer to unknown data, before
+        anything is changed. Added rows need every Course_Assignments column,
+        a numeric Student_Count and a new Assignment_ID.
+        """
+        scheduler = self.scheduler
+        known = {'remove_assignments', 'add_assignments', 'block_teacher', 'block_room'}
+        unknown = set(changes) - known
+        if unknown:
+            raise ValueError(f"Unknown change types: {sorted(unknown)} (use {sorted(known)})")
+
+        removed = set(changes.get('remove_assignments', ()))
+        assignment_ids = {a['Assignment_ID'] for a in scheduler.assignments} - removed
+        columns = ('Assignment_ID', 'Section_ID', 'Course_ID', 'Teacher_ID', 'Student_Count')
+        for assignment in changes.get('add_assignments', ()):
+            missing = [column for column in columns if column not in assignment]
+            if missing:
+                raise ValueError(f"Added assignment is missing {missing}: {assignment!r}")
+            student_count = assignment['Student_Count']
+            if (not isinstance(student_count, numbers.Real) or isinstance(student_count, bool)
+                    or math.isnan(student_count)):
+                raise ValueError(f"Student_Count of assignment {assignment['Assignment_ID']!r} "
+                                 f"is not a number: {student_count!r}")
+            if assignment['Assignment_ID'] in assignment_ids:
+                raise ValueError(f"Duplicate Assignment_ID: {assignment['Assignment_ID']!r}")
+            assignment_ids.add(assignment['Assignment_ID'])
+            if assignment['Course_ID'] not in scheduler.course_dict:
+                raise ValueError(f"Unknown course: {assignment['Course_ID']!r}")
+            if assignment['Teacher_ID'] not in scheduler.teacher_dict:
+                raise ValueError(f"Unknown teacher: {assignment['Teacher_ID']!r}")
+            if assignment['Section_ID'] not in scheduler.section_dict:
+                raise ValueError(f"Unknown section: {assignment['Section_ID']!r}")
+
+        for kind, owners in (('block_teacher', scheduler.teacher_dict),
+                             ('block_room', {**scheduler.room_dict, **scheduler.lab_dict})):
+            for owner_id, day, slot in changes.get(kind, ()):
+                if owner_id not in owners:
+                    raise ValueError(f"Unknown {kind[6:]}: {owner_id!r}")
+                if (day, slot) not in scheduler.cell_bit:
+                    raise ValueError(f"Unknown day/slot: {day!r} {slot!r}")
+
+    # ==================== REPAIR ====================
+
+    def _without_options(self, variables):
+        """
+        Variables with no value even in an empty timetable: every time is
+        blocked for the teacher or has no usable room/lab.
+        """
+        scheduler = self.scheduler
+        for var_id, var in enumerate(variables):
+            var.id = var_id
+        checker = ForwardChecker(scheduler, variables, domains=False)
+
+        hopeless = []
+        for var in variables:
+            teacher_blocked = scheduler.teacher_blocked.get(var.assignment.teacher_id, 0)
+            resources = checker.resources[var.id]
+            if not any(not teacher_blocked & mask
+                       and any(not scheduler.room_blocked.get(r, 0) & mask for r in resources)
+                       for mask in checker.layout[var.id]['masks']):
+                hopeless.append(var)
+        return hopeless
+
+    def _unplaced(self, variables):
+        """
+        The variables that have no class in the schedule. Sessions of one
+        assignment are interchangeable, so it is enough to count classes.
+        """
+        wanted = {var.assignment.assignment_id for var in variables}
+        scheduled = Counter()
+        for entry in self.scheduler.schedule:
+            if entry.assignment_id in wanted:
+                # A lab session takes two classes
+                scheduled[entry.assignment_id, 'Lab' in entry.type] += 1
+        for key in scheduled:
+            if key[1]:
+                scheduled[key] //= 2
+
+        unplaced = []
+        for var in variables:
+            key = (var.assignment.assignment_id, var.kind == 'lab')
+            if scheduled[key]:
+                scheduled[key] -= 1
+            else:
+                unplaced.append(var)
+        return unplaced
+
+    def _new_classes(self, base):
+        """Scheduled classes that are not one of the base entries."""
+        known = {id(entry) for entry in base}
+        return [entry for entry in self.scheduler.schedule if id(entry) not in known]
+
+    def _clear_new(self, base):
+        """Unschedule every class that is not one of the base entries."""
+        scheduler = self.scheduler
+        for entry in self._new_classes(base):
+            scheduler.unassign_class(entry.day, entry.slot, entry.section_id,
+                                     entry.teacher_id, entry.room_or_lab, entry.course_id)
+
+    def apply(self, changes, max_rounds=3, time_limit=None, **options):
+        """
+        Apply a change set and repair the timetable around it.
+        max_rounds: searches to try, each with a wider neighbourhood
+        time_limit: seconds for the whole repair (None = no limit)
+        options: passed on to solve_variables (e.g. heuristic='mrv');
+                 node_limit=N is shared by all rounds
+        Returns a report dict (affected, impossible, freed, rounds, moved,
+        unscheduled, time).
+        Raises ValueError for an invalid change set, before anything changes.
+        """
+        scheduler = self.scheduler
+        self._check_changes(changes)
+        start = time.perf_counter()
+        deadline = None if time_limit is None else start + time_limit
+        before = {(e.assignment_id, e.day, e.slot, e.room_or_lab) for e in scheduler.schedule}
+
+        print("=" * 80)
+        print("INCREMENTAL RESCHEDULING")
+        print("=" * 80 + "\n")
+
+        # ==================== REMOVED / ADDED ASSIGNMENTS ====================
+        removed = set(changes.get('remove_assignments', ()))
+        if removed:
+            scheduler.assignments = [a for a in scheduler.assignments
+                                     if a['Assignment_ID'] not in removed]
+        scheduler.assignments.extend(dict(a) for a in changes.get('add_assignments', ()))
+
+        # Classes of removed assignments match no variable and are dropped here
+        placed, affected = self.current_variables()
+
+        # ==================== BLOCKED CELLS ====================
+        blocked = {'teacher': set(), 'room': set()}
+        for teacher_id, day, slot in changes.get('block_teacher', ()):
+            blocked['teacher'].add((teacher_id, day, slot))
+        for room, day, slot in changes.get('block_room', ()):
+            blocked['room'].add((room, day, slot))
+
+        fixed = []
+        for var, value in placed:
+            teacher_id = var.assignment.teacher_id
+            cells = [(value[0], slot) for slot in value[1:-1]]
+            if any((teacher_id,) + cell in blocked['teacher'] or (value[-1],) + cell in blocked['room']
+                   for cell in cells):
+                scheduler.unassign_variable(var, value)
+                affected.append(var)
+            else:
+                fixed.append((var, value))
+
+        # Block only once nothing occupies those cells any more
+        for kind, cells in blocked.items():
+            for owner_id, day, slot in cells:
+                scheduler.block_cell(kind, owner_id, day, slot)
+
+        # ==================== LOCAL SEARCH ROUNDS ====================
+        impossible = self._without_options(affected)
+        if impossible:
+            print(f"{len(impossible)} sessions have no possible time/room - left unscheduled\n")
+        impossible_ids = {id(var) for var in impossible}
+        free = [var for var in affected if id(var) not in impossible_ids]
+        displaced = []  # (var, value) unscheduled to make room, restored on failure
+        base = list(scheduler.schedule)  # Classes fixed in the current round
+        first_round = []  # Classes placed by the first round (only the change set free)
+        stats = scheduler.stats
+        node_limit = options.pop('node_limit', None)
+        node_stop = None if node_limit is None else stats.counters['nodes'] + node_limit
+        rounds = 0
+        success = not free
+        print(f"{len(affected)} sessions affected by the change, {len(fixed)} kept in place\n")
+
+        while free and rounds < max_rounds:
+            rounds += 1
+            random.shuffle(free)
+            remaining = None if node_stop is None else max(0, node_stop - stats.counters['nodes'])
+            success = scheduler.solve_variables(free, deadline=deadline, node_limit=remaining,
+                                                keep_best=True, **options)
+            if rounds == 1:
+                first_round = [entry.to_dict() for entry in self._new_classes(base)]
+            if success or scheduler.budget_exhausted or rounds == max_rounds:
+                break
+
+            # Widen: classes sharing a section or teacher with a session still unplaced
+            unplaced = self._unplaced(free)
+            sections = {var.assignment.section_id for var in unplaced}
+            teachers = {var.assignment.teacher_id for var in unplaced}
+            neighbours = [(var, value) for var, value in fixed
+                          if var.assignment.section_id in sections
+                          or var.assignment.teacher_id in teachers]
+            if not neighbours:
+                break
+            print(f"Round {rounds} failed - also rescheduling {len(neighbours)} neighbouring sessions\n")
+            self._clear_new(base)
+            neighbour_ids = {id(var) for var, _ in neighbours}
+            fixed = [(var, value) for var, value in fixed if id(var) not in neighbour_ids]
+            for var, value in neighbours:
+                scheduler.unassign_variable(var, value)
+                free.append(var)
+            displaced.extend(neighbours)
+            base = list(scheduler.schedule)
+
+        if not success and displaced and not scheduler.budget_exhausted:
+            # Put the neighbours back, with what the first round could place
+            # around them (it searched with every one of them fixed)
+            self._clear_new(base)
+            for var, value in displaced:
+                scheduler.assign_variable(var, value)
+            for row in first_round:
+                scheduler.add_class(ScheduledClass.from_row(row))
+
+        # ==================== REPORT ====================
+        after = {(e.assignment_id, e.day, e.slot, e.room_or_lab) for e in scheduler.schedule}
+        _, unplaced = self.current_variables()
+        report = {
+            'affected': len(affected),
+            'impossible': len(impossible),
+            'freed': len(affected) + len(displaced),
+            'rounds': rounds,
+            'moved': len(before - after),
+            'unscheduled': len(unplaced),
+            'time': round(time.perf_counter() - start, 4)
+        }
+        print(f"Rescheduled in {report['rounds']} round(s): {report['moved']} classes moved or removed, "
+              f"{report['unscheduled']} sessions left unscheduled ({report['time']:.2f}s)\n")
+        return report
@@ -0,0 +1,321 @@
+import random
+import time
+
+from e_forward_checking import ForwardChecker
+from m_incremental import IncrementalRescheduler
+
+
+class MinConflictsRepair:
+    """
+    Min-conflicts local search that completes a partial timetable.
+
+    Starting from the classes already in the schedule, every missing session
+    is placed at its least conflicting value even if that double-books a
+    section, teacher or room (or repeats a course on the same day). Then, step
+    by step, a random conflicting session is moved to the value with the
+    fewest conflicts until none are left:
+        tabu        -> a session can't go back to a value it just left for
+                       tabu_tenure steps (unless that value has no conflicts)
+        random walk -> with walk_probability the session moves to a random
+                       value instead, to get out of local minima
+
+    Blocked teacher/room cells are never used. When the steps or the time run
+    out, the best state seen is kept and the sessions still in conflict are
+    dropped, so the written-back schedule is always valid. It never keeps
+    fewer sessions than the schedule it started from.
+
+    Conflicts are counted with occupancy sets keyed by
+        ('section', section, cell), ('teacher', teacher, cell),
+        ('room', room, cell) and ('course', section, course, day)
+    so a session's conflicts are the other sessions sharing one of its keys.
+    A bitmask of occupied cells per room lets free rooms be skipped quickly.
+    """
+
+    def __init__(self, scheduler):
+        """scheduler: a CSPTimetableScheduler holding the partial timetable"""
+        self.scheduler = scheduler
+
+    # ==================== SETUP ====================
+
+    def _build_options(self, checker):
+        """
+        Values each variable may take, ignoring other classes:
+        options[v] = [(time index, [resources]), ...] without blocked cells.
+        """
+        scheduler = self.scheduler
+        options = []
+        for var in self.variables:
+            v = var.id
+            layout = checker.layout[v]
+            resources = checker.resources[v]
+            teacher_blocked = scheduler.teacher_blocked.get(var.assignment.teacher_id, 0)
+
+            var_options = []
+            for ti, mask in enumerate(layout['masks']):
+                if teacher_blocked & mask:
+                    continue
+                usable = resources
+                if scheduler.room_blocked:
+                    usable = [r for r in resources if not scheduler.room_blocked.get(r, 0) & mask]
+                if usable:
+                    var_options.append((ti, usable))
+            options.append(var_options)
+        return options
+
+    # ==================== OCCUPANCY ====================
+
+    def _keys(self, v, ti, resource):
+        """Occupancy keys a variable holds when placed at (time ti, resource)."""
+        assignment = self.variables[v].assignment
+        layout = self.layout[v]
+        section_id = assignment.section_id
+        teacher_id = assignment.teacher_id
+
+        keys = [('course', section_id, assignment.course_id, layout['times'][ti][0])]
+        for cell in layout['cells'][ti]:
+            keys.append(('section', section_id, cell))
+            keys.append(('teacher', teacher_id, cell))
+            keys.append(('room', resource, cell))
+        return keys
+
+    def _place(self, v, value):
+        """Put a variable at value = (time index, resource)."""
+        ti, resource = value
+        keys = self._keys(v, ti, resource)
+        for key in keys:
+            self.occupants.setdefault(key, set()).add(v)
+        self.room_mask[resource] = self.room_mask.get(resource, 0) | self.layout[v]['masks'][ti]
+        self.held[v] = keys
+        self.current[v] = value
+
+    def _remove(self, v):
+        """Take a placed variable out. Returns the variables it shared keys with."""
+        neighbours = set()
+        for key in self.held[v]:
+            members = self.occupants[key]
+            members.discard(v)
+            if members:
+                neighbours.update(members)
+            else:
+                del self.occupants[key]
+                if key[0] == 'room':
+                    self.room_mask[key[1]] &= ~self.scheduler.cell_bit[key[2]]
+        self.held[v] = ()
+        self.current[v] = None
+        return neighbours
+
+    def _violations(self, v):
+        """Number of other sessions clashing with v (0 if v is not placed)."""
+        return sum(len(self.occupants[key]) - 1 for key in self.held[v])
+
+    def _update(self, v):
+        """Keep the conflicted list (with O(1) random choice) in sync for v."""
+        conflicted, position = self.conflicted, self.position
+        in_conflict = self.current[v] is not None and self._violations(v) > 0
+        if in_conflict and v not in position:
+            position[v] = len(conflicted)
+            conflicted.append(v)
+        elif not in_conflict and v in position:
+            last = conflicted.pop()
+            idx = position.pop(v)
+            if last != v:
+                conflicted[idx] = last
+                position[last] = idx
+
+    # ==================== VALUE CHOICE ====================
+
+    def _min_conflicts_value(self, v, step, tabu):
+        """
+        Least conflicting value of a removed variable, ties broken at random.
+        Times are tried in random order and the first conflict-free value
+        is taken at once (rooms come best fit first). Values left less than
+        tabu_tenure steps ago are skipped unless they have no conflicts at
+        all. Returns None if nothing is allowed.
+        """
+        assignment = self.variables[v].assignment
+        layout = self.layout[v]
+        section_id = assignment.section_id
+        teacher_id = assignment.teacher_id
+        course_id = assignment.course_id
+        occupants = self.occupants
+        room_mask = self.room_mask
+
+        best_cost = None
+        best = []
+        options = self.options[v]
+        for ti, resources in random.sample(options, len(options)):
+            cells = layout['cells'][ti]
+            time_cost = len(occupants.get(('course', section_id, course_id, layout['times'][ti][0]), ()))
+            for cell in cells:
+                time_cost += (len(occupants.get(('section', section_id, cell), ()))
+                              + len(occupants.get(('teacher', teacher_id, cell), ())))
+            if best_cost is not None and time_cost > best_cost:
+                continue
+
+            mask = layout['masks'][ti]
+            for resource in resources:
+                cost = time_cost
+                if room_mask.get(resource, 0) & mask:
+                    for cell in cells:
+                        cost += len(occupants.get(('room', resource, cell), ()))
+                if not cost:
+                    return ti, resource
+                if tabu.get((v, ti, resource), 0) > step:
+                    continue
+                if best_cost is None or cost < best_cost:
+                    best_cost = cost
+                    best = [(ti, resource)]
+                elif cost == best_cost:
+                    best.append((ti, resource))
+
+        return random.choice(best) if best else None
+
+    def _random_value(self, v):
+        """Any allowed value of the variable (random walk step)."""
+        ti, resources = random.choice(self.options[v])
+        return ti, random.choice(resources)
+
+    # ==================== SEARCH ====================
+
+    def run(self, max_steps=20000, time_limit=None, tabu_tenure=10, walk_probability=0.1):
+        """
+        Complete the current schedule with min-conflicts local search.
+        max_steps: moves before giving up
+        time_limit: seconds before giving up (None = only max_steps)
+        tabu_tenure: steps a session may not return to a value it left
+        walk_probability: chance of a random move instead of the best one
+        Returns a report dict (placed_before, placed, unscheduled, dropped,
+        steps, time).
+        """
+        scheduler = self.scheduler
+        stats = scheduler.stats
+        start = time.perf_counter()
+        deadline = None if time_limit is None else start + time_limit
+
+        print("=" * 80)
+        print("MIN-CONFLICTS LOCAL SEARCH REPAIR")
+        print("=" * 80 + "\n")
+
+        # ==================== START FROM THE CURRENT SCHEDULE ====================
+        placed, unplaced = IncrementalRescheduler(scheduler).current_variables()
+        self.variables = [var for var, _ in placed] + unplaced
+        for var_id, var in enumerate(self.variables):
+            var.id = var_id
+
+        with stats.phase('domain_generation'):
+            checker = ForwardChecker(scheduler, self.variables, domains=False)
+        self.layout = checker.layout
+        self.options = self._build_options(checker)
+
+        count = len(self.variables)
+        self.occupants = {}
+        self.room_mask = {}  # resource -> bitmask of cells with at least one class
+        self.held = [()] * count
+        self.current = [None] * count
+        self.conflicted = []
+        self.position = {}
+
+        time_index = {}  # id(layout) -> {time: time index}
+        for layout in checker.layouts.values():
+            time_index[id(layout)] = {t: ti for ti, t in enumerate(layout['times'])}
+
+        kept_before = 0
+        for var, value in placed:
+            v = var.id
+            ti = time_index[id(self.layout[v])].get(value[:-1])
+            if ti is None:
+                unplaced.append(var)  # e.g. a loaded class outside its usual slots
+                continue
+            self._place(v, (ti, value[-1]))
+            kept_before += 1
+
+        # Missing sessions go to their least conflicting value
+        random.shuffle(unplaced)
+        for var in unplaced:
+            value = self._min_conflicts_value(var.id, 0, {})
+            if value is not None:
+                self._place(var.id, value)
+        for v in range(count):
+            self._update(v)
+        print(f"{kept_before} sessions kept, {len(unplaced)} placed with "
+              f"{len(self.conflicted)} sessions in conflict\n")
+
+        # ==================== MIN-CONFLICTS STEPS ====================
+        tabu = {}  # (v, time index, resource) -> step until which it is tabu
+        best_conflicted = len(self.conflicted)
+        best_state = list(self.current)
+        step = 0
+        with stats.phase('local_search'):
+            while self.conflicted and step < max_steps:
+                if deadline is not None and step % 64 == 0 and time.perf_counter() > deadline:
+                    break
+                step += 1
+                stats.tick()
+
+                v = random.choice(self.conflicted)
+                old = self.current[v]
+                affected = self._remove(v)
+
+                if random.random() < walk_probability:
+                    value = self._random_value(v)
+                    stats.count('random_walks')
+                else:
+                    value = self._min_conflicts_value(v, step, tabu) or old
+                tabu[(v,) + old] = step + tabu_tenure
+
+                self._place(v, value)
+                affected.add(v)
+                for key in self.held[v]:
+                    affected.update(self.occupants[key])
+                for w in affected:
+                    self._update(w)
+
+                if len(self.conflicted) < best_conflicted:
+                    best_conflicted = len(self.conflicted)
+                    best_state = list(self.current)
+        stats.count('local_search_steps', step)
+
+        # ==================== KEEP A VALID SCHEDULE ====================
+        # Back to the best state, then drop the most conflicting sessions
+        if best_state != self.current:
+            for v in range(count):
+                if self.current[v] is not None:
+                    self._remove(v)
+            for v, value in enumerate(best_state):
+                if value is not None:
+                    self._place(v, value)
+            self.conflicted, self.position = [], {}
+            for v in range(count):
+                self._update(v)
+
+        dropped = 0
+        while self.conflicted:
+            v = max(self.conflicted, key=self._violations)
+            affected = self._remove(v)
+            affected.add(v)
+            for w in affected:
+                self._update(w)
+            dropped += 1
+
+        kept = sum(value is not None for value in self.current)
+        if kept > kept_before:
+            scheduler.load_schedule([])
+            for v, value in enumerate(self.current):
+                if value is not None:
+                    ti, resource = value
+                    scheduler.assign_variable(self.variables[v], self.layout[v]['times'][ti] + (resource,))
+        else:
+            kept = kept_before  # No better than before: leave the schedule as it was
+
+        report = {
+            'placed_before': kept_before,
+            'placed': kept,
+            'unscheduled': count - kept,
+            'dropped': dropped,
+            'steps': step,
+            'time': round(time.perf_counter() - start, 4)
+        }
+        print(f"Local search: {report['steps']} steps, {report['placed']} of {count} sessions placed "
+              f"({report['placed'] - kept_before:+d}), {report['unscheduled']} left unscheduled "
+              f"({report['time']:.2f}s)\n")
+        return report
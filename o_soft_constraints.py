@@ -0,0 +1,320 @@
+import math
+import random
+import time
+
+from e_forward_checking import ForwardChecker
+from m_incremental import IncrementalRescheduler
+
+# Default weight of each soft constraint in the objective
+DEFAULT_WEIGHTS = {
+    'section_gaps': 3,   # free slots between a section's first and last class of a day
+    'day_load': 1,       # sum of squared classes per section per day (even spread)
+    'teacher_idle': 1,   # free slots between a teacher's first and last class of a day
+    'late_slots': 2,     # classes in the last late_slots slots of the day
+    'room_changes': 1    # back-to-back classes of a section in different rooms
+}
+
+
+def day_mask_tables(slots_per_day, late_slots):
+    """
+    Unweighted cost of every occupancy pattern of one day (bit i = slot i),
+    so a row is scored with a list lookup. Returns {term: list by mask}.
+    """
+    gaps, load, late = [], [], []
+    late_bits = ((1 << late_slots) - 1) << max(slots_per_day - late_slots, 0)
+    for mask in range(1 << slots_per_day):
+        count = mask.bit_count()
+        span = mask.bit_length() - ((mask & -mask).bit_length() - 1) if mask else 0
+        gaps.append(span - count)
+        load.append(count * count)
+        late.append((mask & late_bits).bit_count())
+    return {'gaps': gaps, 'load': load, 'late': late}
+
+
+class SoftConstraintOptimizer:
+    """
+    Simulated annealing over a feasible timetable to improve its quality.
+
+    The objective is a weighted sum of soft constraints (see DEFAULT_WEIGHTS).
+    Every term is a sum over "rows" - one section on one day, or one teacher
+    on one day - so a move only changes the (at most four) rows of the days it
+    leaves and enters. Each row is kept as a bitmask of its slots (plus the
+    room of each slot for sections) and scored from precomputed tables,
+    which makes the delta of a move O(1) instead of a full re-evaluation.
+
+    A move takes one scheduled session to another time and/or room that
+    keeps every hard constraint satisfied. Worse moves are accepted with
+    probability exp(-delta / T) while T cools down over the time box. The
+    best timetable seen is the one left in the scheduler.
+    """
+
+    # Iterations between two clock checks
+    CHECK_EVERY = 256
+
+    def __init__(self, scheduler, weights=None, late_slots=2):
+        """
+        scheduler: a CSPTimetableScheduler holding a (partial) timetable
+        weights: overrides for DEFAULT_WEIGHTS
+        late_slots: how many of the last slots of the day count as late
+        """
+        unknown = set(weights or ()) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown soft constraints: {sorted(unknown)} (use {sorted(DEFAULT_WEIGHTS)})")
+        self.scheduler = scheduler
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+        slots_per_day = len(scheduler.slot_list)
+        self.slots_per_day = slots_per_day
+        self.tables = day_mask_tables(slots_per_day, late_slots)
+
+        # Weighted row costs by mask (room changes are added separately)
+        w = self.weights
+        tables = self.tables
+        self.section_table = [w['section_gaps'] * tables['gaps'][m] + w['day_load'] * tables['load'][m]
+                              + w['late_slots'] * tables['late'][m] for m in range(1 << slots_per_day)]
+        self.teacher_table = [w['teacher_idle'] * tables['gaps'][m] for m in range(1 << slots_per_day)]
+
+    # ==================== ROWS ====================
+
+    def _build_rows(self, placed):
+        """Per-day slot bitmasks of every section and teacher, and section rooms."""
+        self.section_mask = {}  # (section, day) -> bitmask of slots
+        self.section_rooms = {}  # (section, day) -> [room or None per slot]
+        self.teacher_mask = {}  # (teacher, day) -> bitmask of slots
+        for var, value in placed:
+            self._occupy(var, value, True)
+
+    def _occupy(self, var, value, add):
+        """Add (or remove) a session to/from its section and teacher rows."""
+        assignment = var.assignment
+        day = value[0]
+        resource = value[-1]
+        section_key = (assignment.section_id, day)
+        teacher_key = (assignment.teacher_id, day)
+        bits = 0
+        for slot in value[1:-1]:
+            bits |= 1 << self.scheduler.slot_index[slot]
+
+        rooms = self.section_rooms.get(section_key)
+        if rooms is None:
+            rooms = self.section_rooms[section_key] = [None] * self.slots_per_day
+        for slot in value[1:-1]:
+            rooms[self.scheduler.slot_index[slot]] = resource if add else None
+
+        if add:
+            self.section_mask[section_key] = self.section_mask.get(section_key, 0) | bits
+            self.teacher_mask[teacher_key] = self.teacher_mask.get(teacher_key, 0) | bits
+        else:
+            self.section_mask[section_key] &= ~bits
+            self.teacher_mask[teacher_key] &= ~bits
+
+    @staticmethod
+    def _room_changes(rooms):
+        """Back-to-back classes of one section-day held in different rooms."""
+        return sum(1 for first, second in zip(rooms, rooms[1:])
+                   if first is not None and second is not None and first != second)
+
+    def _section_cost(self, mask, rooms):
+        return self.section_table[mask] + self.weights['room_changes'] * self._room_changes(rooms)
+
+    # ==================== OBJECTIVE ====================
+
+    def evaluate(self):
+        """Full (non-incremental) objective: {term: unweighted value, 'total': weighted sum}."""
+        tables = self.tables
+        terms = dict.fromkeys(DEFAULT_WEIGHTS, 0)
+        for key, mask in self.section_mask.items():
+            terms['section_gaps'] += tables['gaps'][mask]
+            terms['day_load'] += tables['load'][mask]
+            terms['late_slots'] += tables['late'][mask]
+            terms['room_changes'] += self._room_changes(self.section_rooms[key])
+        for mask in self.teacher_mask.values():
+            terms['teacher_idle'] += tables['gaps'][mask]
+        terms['total'] = sum(self.weights[name] * terms[name] for name in DEFAULT_WEIGHTS)
+        return terms
+
+    def delta(self, var, old, new):
+        """Change of the weighted objective if var moves from value old to new."""
+        assignment = var.assignment
+        section_id = assignment.section_id
+        teacher_id = assignment.teacher_id
+        slot_index = self.scheduler.slot_index
+        old_day, new_day = old[0], new[0]
+
+        old_bits = 0
+        for slot in old[1:-1]:
+            old_bits |= 1 << slot_index[slot]
+        new_bits = 0
+        for slot in new[1:-1]:
+            new_bits |= 1 << slot_index[slot]
+
+        # Rows of the old day (and new day if different) before and after
+        change = 0
+        for day in {old_day, new_day}:
+            section_key = (section_id, day)
+            mask = self.section_mask.get(section_key, 0)
+            rooms = self.section_rooms.get(section_key) or [None] * self.slots_per_day
+            teacher_before = self.teacher_mask.get((teacher_id, day), 0)
+            new_mask, new_rooms, teacher_after = mask, list(rooms), teacher_before
+            if day == old_day:
+                new_mask &= ~old_bits
+                teacher_after &= ~old_bits
+                for slot in old[1:-1]:
+                    new_rooms[slot_index[slot]] = None
+            if day == new_day:
+                new_mask |= new_bits
+                teacher_after |= new_bits
+                for slot in new[1:-1]:
+                    new_rooms[slot_index[slot]] = new[-1]
+
+            change += self._section_cost(new_mask, new_rooms) - self._section_cost(mask, rooms)
+            change += self.teacher_table[teacher_after] - self.teacher_table[teacher_before]
+        return change
+
+    # ==================== MOVES ====================
+
+    def _is_feasible(self, var, old, new):
+        """True if var can move from old to new without breaking a hard constraint."""
+        scheduler = self.scheduler
+        assignment = var.assignment
+        old_window = scheduler.get_window_mask(old[0], old[1:-1])
+        new_window = scheduler.get_window_mask(new[0], new[1:-1])
+
+        if scheduler.section_busy.get(assignment.section_id, 0) & ~old_window & new_window:
+            return False
+        if scheduler.teacher_busy.get(assignment.teacher_id, 0) & ~old_window & new_window:
+            return False
+        own = old_window if new[-1] == old[-1] else 0
+        if scheduler.room_busy.get(new[-1], 0) & ~own & new_window:
+            return False
+        # One class of a course per day (the session's own day is fine)
+        course_days = scheduler.section_course_day.get(
+            (assignment.section_id, assignment.course_id), ())
+        return new[0] == old[0] or new[0] not in course_days
+
+    def _move(self, var, old, new):
+        """Move a session in the scheduler and in the rows."""
+        self.scheduler.unassign_variable(var, old)
+        self._occupy(var, old, False)
+        self.scheduler.assign_variable(var, new)
+        self._occupy(var, new, True)
+
+    def _random_move(self):
+        """(v, new value) for a random session and a random value of its domain, or None."""
+        v = random.randrange(len(self.variables))
+        resources = self.resources[v]
+        if not resources:
+            return None
+        times = self.times[v]
+        new = times[random.randrange(len(times))] + (resources[random.randrange(len(resources))],)
+        if new == self.values[v] or not self._is_feasible(self.variables[v], self.values[v], new):
+            return None
+        return v, new
+
+    # ==================== ANNEALING ====================
+
+    def run(self, time_limit=10.0, max_iterations=None, initial_temperature=None, cooling=1e-3):
+        """
+        Improve the current timetable for time_limit seconds (or max_iterations).
+        initial_temperature: starting T (None = estimated from sample moves)
+        cooling: final T as a fraction of the initial one (geometric schedule)
+        Returns a report dict (before, after, iterations, accepted, time).
+        """
+        if time_limit is None and max_iterations is None:
+            raise ValueError("Give a time_limit or max_iterations")
+        scheduler = self.scheduler
+        stats = scheduler.stats
+        start = time.perf_counter()
+
+        print("=" * 80)
+        print("SOFT CONSTRAINT OPTIMIZATION (SIMULATED ANNEALING)")
+        print("=" * 80 + "\n")
+
+        # Classes that fit no variable stay where they are (and keep their cells busy)
+        placed, _ = IncrementalRescheduler(scheduler).current_variables(prune=False)
+        self.variables = [var for var, _ in placed]
+        self.values = [value for _, value in placed]
+        for var_id, var in enumerate(self.variables):
+            var.id = var_id
+        self._build_rows(placed)
+
+        checker = ForwardChecker(scheduler, self.variables, domains=False)
+        self.times = [checker.layout[v]['times'] for v in range(len(self.variables))]
+        self.resources = checker.resources
+
+        before = self.evaluate()
+        current = best = before['total']
+        since_best = []  # (v, old value) of moves made after the best state
+
+        # ==================== STARTING TEMPERATURE ====================
+        # Accept an average uphill move with probability 1/2 at the start
+        if initial_temperature is None and self.variables:
+            uphill = []
+            for _ in range(2000):
+                move = self._random_move()
+                if move is not None:
+                    d = self.delta(self.variables[move[0]], self.values[move[0]], move[1])
+                    if d > 0:
+                        uphill.append(d)
+                    if len(uphill) >= 200:
+                        break
+            initial_temperature = (sum(uphill) / len(uphill) / math.log(2)) if uphill else 1.0
+        temperature = initial_temperature
+
+        # ==================== SEARCH ====================
+        iterations = accepted = 0
+        progress = 0.0
+        with stats.phase('optimize'):
+            while self.variables:
+                if max_iterations is not None and iterations >= max_iterations:
+                    break
+                if iterations % self.CHECK_EVERY == 0:
+                    elapsed = time.perf_counter() - start
+                    if time_limit is not None and elapsed >= time_limit:
+                        break
+                    progress = elapsed / time_limit if time_limit else 0.0
+                    if max_iterations:
+                        progress = max(progress, iterations / max_iterations)
+                    temperature = initial_temperature * cooling ** progress
+                iterations += 1
+
+                move = self._random_move()
+                if move is None:
+                    continue
+                v, new = move
+                var, old = self.variables[v], self.values[v]
+                d = self.delta(var, old, new)
+                if d > 0 and random.random() >= math.exp(-d / temperature):
+                    continue
+
+                self._move(var, old, new)
+                self.values[v] = new
+                current += d
+                accepted += 1
+                since_best.append((v, old))
+                if current < best:
+                    best = current
+                    since_best.clear()
+
+            # Walk back to the best timetable seen
+            for v, old in reversed(since_best):
+                self._move(self.variables[v], self.values[v], old)
+                self.values[v] = old
+        stats.count('optimize_iterations', iterations)
+        stats.count('optimize_moves', accepted)
+
+        # ==================== REPORT ====================
+        after = self.evaluate()
+        report = {
+            'before': before,
+            'after': after,
+            'iterations': iterations,
+            'accepted': accepted,
+            'time': round(time.perf_counter() - start, 4)
+        }
+        print(f"{'Soft constraint':<16} {'Weight':>6} {'Before':>8} {'After':>8}")
+        for name, weight in self.weights.items():
+            print(f"{name:<16} {weight:>6} {before[name]:>8} {after[name]:>8}")
+        print(f"{'total':<16} {'':>6} {before['total']:>8} {after['total']:>8}")
+        print(f"\n{iterations} iterations, {accepted} moves accepted ({report['time']:.2f}s)\n")
+        return report
@@ -0,0 +1,254 @@
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+from collections import defaultdict
+
+from e_forward_checking import ForwardChecker
+from m_incremental import IncrementalRescheduler
+
+
+class DecompositionSolver:
+    """
+    Splits the timetable into independent parts and solves them in parallel.
+
+    Two assignments interact when they share a section or a teacher; the
+    connected components of that graph can only clash through rooms and
+    labs. Every room/lab suitable for a single component goes to it; rooms
+    shared by several components are handed out one by one to the component
+    with the most demand left for that kind of room (classroom or lab type),
+    scarcest rooms first. With rooms fixed, the components are fully
+    independent, so each one is solved in a worker process as if it were the
+    whole university (seeing only its own rooms) and the sub-timetables are
+    merged. Solve time then follows the largest component, not the instance.
+
+    A sharing of rooms that turns out too tight for a component only costs
+    the sessions it left out: after merging, those are searched for again on
+    the full timetable with every room available.
+    """
+
+    # Extra seconds to wait for workers to report after their time limits
+    REPORT_GRACE = 10
+
+    def __init__(self, scheduler, workers=None, **options):
+        """
+        scheduler: a loaded CSPTimetableScheduler (receives the merged timetable)
+        workers: number of processes (default: one per CPU, at most one per component)
+        options: passed on to generate_timetable for every component
+        """
+        self.scheduler = scheduler
+        self.workers = workers
+        self.options = options
+        self.components = []  # [{'assignments': [...], 'resources': set(...)}]
+
+    # ==================== INTERACTION GRAPH ====================
+
+    def find_components(self):
+        """
+        Group the assignments into components (shared section or teacher)
+        and give every room/lab to one component. Returns the components,
+        largest first.
+        """
+        scheduler = self.scheduler
+
+        # Union-find over section and teacher nodes
+        parent = {}
+
+        def find(node):
+            root = parent.setdefault(node, node)
+            while root != parent[root]:
+                root = parent[root]
+            while node != root:  # Path compression
+                parent[node], node = root, parent[node]
+            return root
+
+        for assignment in scheduler.assignments:
+            parent[find(('section', assignment['Section_ID']))] = find(('teacher', assignment['Teacher_ID']))
+
+        groups = defaultdict(list)
+        for assignment in scheduler.assignments:
+            groups[find(('section', assignment['Section_ID']))].append(assignment)
+        components = sorted(groups.values(), key=len, reverse=True)
+
+        # ==================== ROOM DEMAND ====================
+        # Suitable resources of every session, from the forward checker's layouts
+        variables = scheduler.build_variables(scheduler.assignments)
+        for var_id, var in enumerate(variables):
+            var.id = var_id
+        checker = ForwardChecker(scheduler, variables, domains=False)
+        component_of = {a['Assignment_ID']: c for c, assignments in enumerate(components) for a in assignments}
+
+        def pool(resource):
+            """Kind of room: classrooms or one lab type."""
+            lab = scheduler.lab_dict.get(resource)
+            return 'room' if lab is None else ('lab', lab['Lab_Type'])
+
+        users = defaultdict(set)  # resource -> components that can use it
+        demand = defaultdict(int)  # (component, pool) -> cells needed
+        for var in variables:
+            c = component_of[var.assignment.assignment_id]
+            resources = checker.resources[var.id]
+            cells = 1 if var.kind == 'theory' else 2
+            for kind in {pool(r) for r in resources}:
+                demand[(c, kind)] += cells
+            for resource in resources:
+                users[resource].add(c)
+
+        # ==================== SHARE ROOMS ====================
+        cells_per_week = len(scheduler.cell_bit)
+        supply = defaultdict(int)  # (component, pool) -> cells given
+        allowed = [set() for _ in components]
+        for resource in sorted(users, key=lambda r: (len(users[r]), str(r))):
+            kind = pool(resource)
+            c = max(sorted(users[resource]),
+                    key=lambda c: demand[(c, kind)] / (supply[(c, kind)] + 1))
+            allowed[c].add(resource)
+            supply[(c, kind)] += cells_per_week - scheduler.room_blocked.get(resource, 0).bit_count()
+
+        self.components = [{'assignments': assignments, 'resources': resources}
+                           for assignments, resources in zip(components, allowed)]
+        return self.components
+
+    # ==================== WORKER PROCESS ====================
+
+    @staticmethod
+    def _run_worker(scheduler, excel_file, domain_engine, jobs, options, time_limit, results):
+        """
+        Solve each job (one component) in turn and put a report per job on
+        the queue, with the search statistics of that job.
+        """
+        # Keep the console readable: only the parent prints
+        sys.stdout = open(os.devnull, 'w')
+
+        if scheduler is None:
+            from b_CSPTimetableScheduler import CSPTimetableScheduler
+            scheduler = CSPTimetableScheduler(excel_file, domain_engine)
+
+        all_rooms, all_labs = scheduler.rooms, scheduler.labs
+        for job in jobs:
+            # The component alone, seeing only its own rooms and labs
+            scheduler.assignments = job['assignments']
+            scheduler.rooms = [r for r in all_rooms if r['Room_Number'] in job['resources']]
+            scheduler.labs = [l for l in all_labs if l['Lab_Name'] in job['resources']]
+            scheduler.labs_by_type = defaultdict(list)
+            for lab in scheduler.labs:
+                scheduler.labs_by_type[lab['Lab_Type']].append(lab['Lab_Name'])
+            scheduler.build_capacity_index()
+            scheduler.load_schedule([])
+
+            random.seed(job['seed'])
+            start_time = time.perf_counter()
+            success_count, failed = scheduler.generate_timetable(time_limit=time_limit, **options)
+
+            results.put({
+                'component': job['component'],
+                'success_count': success_count,
+                'failed': len(failed),
+                'classes': len(scheduler.schedule),
+                'time': time.perf_counter() - start_time,
+                'schedule': scheduler.schedule.to_list(),
+                'stats': {
+                    'counters': dict(scheduler.stats.counters),
+                    # Loading is the parent's (or was done once per worker)
+                    'timers': {name: timer for name, timer in scheduler.stats.timers.items()
+                               if name != 'load'},
+                    'backtracks_by_depth': dict(scheduler.stats.backtracks_by_depth),
+                    'dead_ends': dict(scheduler.stats.dead_ends)
+                }
+            })
+
+    # ==================== DECOMPOSED SEARCH ====================
+
+    def solve(self, time_limit=None):
+        """
+        Solve every component (time_limit applies to each one), merge the
+        sub-timetables into the scheduler and search again for any session
+        left out. The workers' search statistics are added to scheduler.stats.
+        Returns the list of component reports.
+        """
+        scheduler = self.scheduler
+        components = self.find_components()
+        print("=" * 80)
+        print(f"DECOMPOSED SEARCH: {len(components)} INDEPENDENT COMPONENTS")
+        print("=" * 80)
+        for c, component in enumerate(components):
+            print(f"  Component {c}: {len(component['assignments'])} assignments, "
+                  f"{len(component['resources'])} rooms/labs")
+        print()
+
+        # ==================== DISTRIBUTE COMPONENTS ====================
+        # Largest component first to the least loaded worker
+        workers = max(1, min(self.workers or os.cpu_count() or 1, len(components)))
+        jobs = [[] for _ in range(workers)]
+        load = [0] * workers
+        base_seed = random.randrange(2 ** 32)
+        for c, component in enumerate(components):
+            w = load.index(min(load))
+            jobs[w].append({'component': c, 'seed': base_seed + c, **component})
+            load[w] += len(component['assignments'])
+
+        # Fork shares the loaded instance; other start methods reload it
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+            shared = scheduler
+        else:
+            context = multiprocessing.get_context()
+            shared = None
+
+        results = context.Queue()
+        processes = [context.Process(target=self._run_worker,
+                                     args=(shared, scheduler.excel_file, scheduler.domain_engine,
+                                           worker_jobs, self.options, time_limit, results),
+                                     daemon=True)
+                     for worker_jobs in jobs]
+        sys.stdout.flush()  # Don't let forked workers inherit buffered output
+        for process in processes:
+            process.start()
+
+        deadline = None
+        if time_limit is not None:
+            most_jobs = max(len(worker_jobs) for worker_jobs in jobs)
+            deadline = time.perf_counter() + time_limit * most_jobs + self.REPORT_GRACE
+        reports = []
+        try:
+            while len(reports) < len(components):
+                timeout = 1 if deadline is None else min(1, deadline - time.perf_counter())
+                if timeout <= 0:
+                    break  # Components that haven't reported by now are dropped
+                try:
+                    report = results.get(timeout=timeout)
+                except queue.Empty:
+                    if not any(p.is_alive() for p in processes) and results.empty():
+                        break  # Every worker died without reporting
+                    continue
+
+                reports.append(report)
+                scheduler.stats.merge(report['stats'])
+                print(f"  Component {report['component']} finished: {report['success_count']} "
+                      f"assignments scheduled, {report['failed']} failed ({report['time']:.2f}s)")
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+
+        # ==================== MERGE ====================
+        scheduler.load_schedule([entry for report in reports for entry in report['schedule']])
+        print(f"\nMerged {len(reports)} sub-timetables: {len(scheduler.schedule)} classes\n")
+
+        # Sessions a component could not place get one more chance with every room
+        _, unplaced = IncrementalRescheduler(scheduler).current_variables()
+        if unplaced:
+            print(f"Searching again for {len(unplaced)} sessions with all rooms available\n")
+            search_options = {name: value for name, value in self.options.items()
+                              if name != 'local_search'}
+            random.shuffle(unplaced)
+            solve_deadline = None if time_limit is None else time.perf_counter() + time_limit
+            solved = scheduler.solve_variables(unplaced, deadline=solve_deadline, **search_options)
+            if not solved and self.options.get('local_search'):
+                from n_local_search import MinConflictsRepair
+                MinConflictsRepair(scheduler).run(time_limit=time_limit)
+        return reports
@@ -0,0 +1,216 @@
+import random
+from collections import deque
+
+from m_incremental import IncrementalRescheduler
+from r_records import Assignment
+
+
+class RoomMatcher:
+    """
+    Second phase of two-phase solving: rooms as a bipartite matching.
+
+    In phase one (solve_variables with two_phase=True) the search branches on
+    the time of each theory class only; the forward checker counts how many
+    classes of each room type still fit per (day, slot) (aggregate room
+    capacity), but picks no room. Once times are fixed, the theory classes of
+    one (day, slot) and the classrooms form a bipartite graph (class ->
+    suitable rooms): seat_classes gives every class a room, and any class
+    phase one could not place is fitted in by finding an augmenting path:
+    classes already at that time may move to another suitable room to free
+    one up, without changing any time.
+
+    Sessions that still fit nowhere re-open phase one for just those
+    sessions (with everything else fixed), then matching runs again.
+    Labs keep their concrete labs in phase one and are not re-matched.
+    """
+
+    def __init__(self, scheduler):
+        """scheduler: a CSPTimetableScheduler holding the phase one timetable"""
+        self.scheduler = scheduler
+        self.assignment_by_id = {a['Assignment_ID']: Assignment.from_row(a) for a in scheduler.assignments}
+        self.reseated = 0  # Classes moved to another room by augmenting paths
+
+    # ==================== BIPARTITE GRAPH ====================
+
+    def _suitable_rooms(self, assignment):
+        """Rooms a theory class of this assignment may use (best fit first)."""
+        course = self.scheduler.course_dict[assignment.course_id]
+        return self.scheduler.find_suitable_rooms(assignment.student_count,
+                                                  course['Needs_Multimedia'])
+
+    def _build_cells(self):
+        """{(day, slot): {room: theory class}} from the current schedule."""
+        cells = {}
+        for entry in self.scheduler.schedule:
+            if 'Lab' not in entry.type and entry.room_or_lab is not None:
+                cells.setdefault((entry.day, entry.slot), {})[entry.room_or_lab] = entry
+        return cells
+
+    def _augmenting_path(self, assignment, cell, seated):
+        """
+        Shortest augmenting path for a new class at this cell (BFS over rooms).
+        seated: {room: ScheduledClass} of the theory classes at the cell.
+        Returns rooms [r0, r1, ..., rk]: the new class takes r0, the class in
+        r(i) moves to r(i+1) and rk is free; None if no matching exists.
+        """
+        scheduler = self.scheduler
+        bit = scheduler.cell_bit[cell]
+
+        def usable(room):
+            # Free, or held by a theory class that could move (not a lab/blocked cell)
+            return room in seated or not scheduler.room_busy.get(room, 0) & bit
+
+        previous = {}
+        queue = deque()
+        for room in self._suitable_rooms(assignment):
+            if room not in previous and usable(room):
+                previous[room] = None
+                queue.append(room)
+
+        while queue:
+            room = queue.popleft()
+            occupant = seated.get(room)
+            if occupant is None:
+                path = [room]
+                while previous[path[-1]] is not None:
+                    path.append(previous[path[-1]])
+                path.reverse()
+                return path
+            for other in self._suitable_rooms(self.assignment_by_id[occupant.assignment_id]):
+                if other not in previous and usable(other):
+                    previous[other] = room
+                    queue.append(other)
+        return None
+
+    def _reseat(self, cell, seated, path):
+        """Shift the classes along an augmenting path; path[0] ends up free."""
+        scheduler = self.scheduler
+        day, slot = cell
+        for i in range(len(path) - 2, -1, -1):
+            entry = seated.pop(path[i])
+            scheduler.unassign_class(day, slot, entry.section_id, entry.teacher_id,
+                                     path[i], entry.course_id)
+            scheduler.assign_class(day, slot, entry.section_id, entry.teacher_id,
+                                   path[i + 1], entry)
+            seated[path[i + 1]] = scheduler.schedule.entries[(day, slot, entry.section_id,
+                                                              entry.course_id)]
+            self.reseated += 1
+
+    # ==================== PHASE TWO ====================
+
+    def seat_classes(self):
+        """
+        Give a room to every theory class phase one placed without one.
+        Each class is fitted in by an augmenting path at its (day, slot), so
+        the seated classes form a maximum matching and, with phase one
+        keeping every cell within its room capacity, all of them get a room.
+        Returns the classes left without one (taken out of the schedule).
+        """
+        scheduler = self.scheduler
+        waiting = [entry for entry in scheduler.schedule if entry.room_or_lab is None]
+        cells = self._build_cells()
+        reseated = self.reseated
+        unseated = []
+
+        for entry in waiting:
+            cell = (entry.day, entry.slot)
+            scheduler.unassign_class(entry.day, entry.slot, entry.section_id, entry.teacher_id,
+                                     None, entry.course_id)
+            seated = cells.setdefault(cell, {})
+            path = self._augmenting_path(self.assignment_by_id[entry.assignment_id], cell, seated)
+            if path is None:
+                unseated.append(entry)
+                continue
+            self._reseat(cell, seated, path)
+            scheduler.assign_class(entry.day, entry.slot, entry.section_id, entry.teacher_id,
+                                   path[0], entry)
+            seated[path[0]] = scheduler.schedule.entries[cell + (entry.section_id, entry.course_id)]
+
+        scheduler.stats.count('rooms_reseated', self.reseated - reseated)
+        if unseated:
+            print(f"Room matching: {len(unseated)} of {len(waiting)} classes found no room\n")
+        return unseated
+
+    def match_unplaced(self, variables):
+        """
+        Fit unplaced theory variables in by re-seating classes per (day, slot).
+        Times are tried morning first, then least loaded day (like sort_key).
+        Returns the variables still unplaced.
+        """
+        scheduler = self.scheduler
+        cells = self._build_cells()
+        left = []
+
+        for var in variables:
+            if var.kind != 'theory':
+                left.append(var)
+                continue
+            assignment = var.assignment
+            section_id = assignment.section_id
+            teacher_id = assignment.teacher_id
+            course = scheduler.course_dict[assignment.course_id]
+            slots = ['S4'] if course['Is_2Hour_Special'] else scheduler.slot_list
+            course_days = scheduler.section_course_day.get((section_id, assignment.course_id), ())
+
+            times = [(day, slot) for day in scheduler.day_list if day not in course_days
+                     for slot in slots if (day, slot) in scheduler.cell_bit]
+            times.sort(key=lambda t: (scheduler.slot_index[t[1]],
+                                      scheduler.section_day_load[section_id][t[0]], random.random()))
+
+            for cell in times:
+                bit = scheduler.cell_bit[cell]
+                if scheduler.section_busy.get(section_id, 0) & bit or scheduler.teacher_busy.get(teacher_id, 0) & bit:
+                    continue
+                seated = cells.setdefault(cell, {})
+                path = self._augmenting_path(assignment, cell, seated)
+                if path is None:
+                    continue
+                self._reseat(cell, seated, path)
+                scheduler.assign_variable(var, cell + (path[0],))
+                seated[path[0]] = scheduler.schedule.entries[cell + (section_id, assignment.course_id)]
+                break
+            else:
+                left.append(var)
+        return left
+
+    def run(self, max_rounds=3, deadline=None, node_limit=None, **options):
+        """
+        Alternate phase two (matching) and phase one (time search) on the
+        sessions that are still unplaced, until none are left, nothing
+        improves, max_rounds is reached or the search budget runs out.
+        node_limit: assignments all re-opened phase one rounds may try together
+        options: passed on to solve_variables (e.g. heuristic='mrv')
+        Returns True if every session is placed.
+        """
+        scheduler = self.scheduler
+        stats = scheduler.stats
+        node_stop = None if node_limit is None else stats.counters['nodes'] + node_limit
+        reseated = self.reseated
+        _, unplaced = IncrementalRescheduler(scheduler).current_variables()
+        rounds = 0
+        print(f"Room matching: {len(unplaced)} sessions left by phase one\n")
+
+        while unplaced and rounds < max_rounds:
+            rounds += 1
+            before = len(unplaced)
+            with stats.phase('room_matching'):
+                unplaced = self.match_unplaced(unplaced)
+            print(f"  Round {rounds}: matching placed {before - len(unplaced)} sessions "
+                  f"({self.reseated} classes re-seated so far)")
+            if not unplaced or scheduler.budget_exhausted:
+                break  # Done, or the search budget is used up
+
+            # Re-open phase one for what is left, everything else stays fixed
+            random.shuffle(unplaced)
+            nodes_left = None if node_stop is None else max(0, node_stop - stats.counters['nodes'])
+            if scheduler.solve_variables(unplaced, deadline=deadline, node_limit=nodes_left,
+                                         two_phase=True, keep_best=True, **options):
+                unplaced = []
+                break
+            _, unplaced = IncrementalRescheduler(scheduler).current_variables()
+            if len(unplaced) >= before:
+                break
+
+        stats.count('rooms_reseated', self.reseated - reseated)
+        print(f"\nTwo-phase solving: {len(unplaced)} sessions left unplaced\n")
+        return not unplaced
@@ -0,0 +1,110 @@
+class Assignment:
+    """
+    One course assignment (a Course_Assignments row) as the solver uses it.
+
+    Built once per row by build_variables and shared by every session
+    variable of that assignment, so sibling sessions can be told apart from
+    other assignments by identity. Fields are plain attributes (__slots__)
+    instead of string keys looked up in the innermost search loops.
+    """
+
+    __slots__ = ('assignment_id', 'section_id', 'course_id', 'teacher_id', 'student_count')
+
+    def __init__(self, assignment_id, section_id, course_id, teacher_id, student_count):
+        self.assignment_id = assignment_id
+        self.section_id = section_id
+        self.course_id = course_id
+        self.teacher_id = teacher_id
+        self.student_count = student_count
+
+    @classmethod
+    def from_row(cls, row):
+        """Record of a Course_Assignments row dict."""
+        return cls(row['Assignment_ID'], row['Section_ID'], row['Course_ID'],
+                   row['Teacher_ID'], row['Student_Count'])
+
+    def __repr__(self):
+        return (f"Assignment({self.assignment_id!r}, {self.section_id!r}, {self.course_id!r}, "
+                f"{self.teacher_id!r}, {self.student_count!r})")
+
+
+class Variable:
+    """
+    One class session to schedule (a CSP variable).
+        kind       -> 'theory' or 'lab'
+        assignment -> the Assignment record it belongs to
+        index      -> number of the theory class in the week (None for labs)
+        id         -> position in the variable list of the current search
+    """
+
+    __slots__ = ('kind', 'assignment', 'index', 'id')
+
+    def __init__(self, kind, assignment, index=None):
+        self.kind = kind
+        self.assignment = assignment
+        self.index = index
+        self.id = None
+
+    def __repr__(self):
+        return f"Variable({self.kind!r}, {self.assignment.assignment_id!r}, index={self.index!r})"
+
+
+class ScheduledClass:
+    """
+    One scheduled class (one slot of one session) in compact form.
+
+    Reads like a schedule row dict for the export and reporting code:
+    cls['Day'], cls.get('Type'), cls.keys() and to_dict() use the column
+    names below.
+    """
+
+    __slots__ = ('assignment_id', 'section_id', 'course_id', 'teacher_id',
+                 'day', 'slot', 'room_or_lab', 'type')
+
+    # Schedule row column -> attribute
+    COLUMNS = {
+        'Assignment_ID': 'assignment_id',
+        'Section_ID': 'section_id',
+        'Course_ID': 'course_id',
+        'Teacher_ID': 'teacher_id',
+        'Day': 'day',
+        'Slot': 'slot',
+        'Room_or_Lab': 'room_or_lab',
+        'Type': 'type',
+    }
+
+    def __init__(self, assignment_id, section_id, course_id, teacher_id, day, slot,
+                 room_or_lab, class_type):
+        self.assignment_id = assignment_id
+        self.section_id = section_id
+        self.course_id = course_id
+        self.teacher_id = teacher_id
+        self.day = day
+        self.slot = slot
+        self.room_or_lab = room_or_lab
+        self.type = class_type
+
+    @classmethod
+    def from_row(cls, row):
+        """Record of a schedule row dict (or another ScheduledClass)."""
+        return cls(row['Assignment_ID'], row['Section_ID'], row['Course_ID'], row['Teacher_ID'],
+                   row['Day'], row['Slot'], row['Room_or_Lab'], row['Type'])
+
+    # ==================== DICT VIEW ====================
+
+    def __getitem__(self, column):
+        return getattr(self, self.COLUMNS[column])
+
+    def get(self, column, default=None):
+        attribute = self.COLUMNS.get(column)
+        return default if attribute is None else getattr(self, attribute)
+
+    def keys(self):
+        return self.COLUMNS.keys()
+
+    def to_dict(self):
+        """The class as a schedule row dict."""
+        return {column: getattr(self, attribute) for column, attribute in self.COLUMNS.items()}
+
+    def __repr__(self):
+        return f"ScheduledClass({self.to_dict()!r})"
@@ -0,0 +1,121 @@
+import os
+import sys
+
+import pytest
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from b_CSPTimetableScheduler import CSPTimetableScheduler
+from k_database_loader import DATABASE_SHEETS
+
+DAY_NAMES = {'MON': 'Monday', 'TUE': 'Tuesday', 'WED': 'Wednesday', 'THU': 'Thursday', 'FRI': 'Friday'}
+
+
+def course(course_id, theory=1, lab_type=None, multimedia=False, two_hour=False):
+    """Courses row: theory classes per week, plus a lab of lab_type if given."""
+    return {'Course_ID': course_id, 'Course_Name': f"Course {course_id}",
+            'Theory_Classes_Per_Week': theory, 'Has_Lab': lab_type is not None,
+            'Lab_Type': lab_type, 'Needs_Multimedia': multimedia, 'Is_2Hour_Special': two_hour}
+
+
+def assignment(assignment_id, section_id, course_id, teacher_id, students=30):
+    """Course_Assignments row."""
+    return {'Assignment_ID': assignment_id, 'Section_ID': section_id, 'Course_ID': course_id,
+            'Teacher_ID': teacher_id, 'Student_Count': students}
+
+
+def write_database(path, rooms=(), labs=(), courses=(), assignments=(), days=('MON',), slots=4):
+    """
+    Write a small university workbook. Teachers and sections are taken from
+    the assignments; rooms are (name, strength, multimedia) and labs
+    (name, strength, lab type).
+    """
+    sheets = {
+        'Rooms': [{'Room_Number': name, 'Strength': strength, 'Multimedia': multimedia}
+                  for name, strength, multimedia in rooms],
+        'Labs': [{'Lab_Name': name, 'Strength': strength, 'Lab_Type': lab_type}
+                 for name, strength, lab_type in labs],
+        'Teachers': [{'Teacher_ID': t, 'Teacher_Name': f"Teacher {t}"}
+                     for t in dict.fromkeys(a['Teacher_ID'] for a in assignments)],
+        'Courses': list(courses),
+        'Sections': [{'Section_ID': s, 'Student_Count': 30}
+                     for s in dict.fromkeys(a['Section_ID'] for a in assignments)],
+        'Course_Assignments': list(assignments),
+        'Time_Slots': [{'Slot_ID': f"S{i + 1}", 'Start_Time': f"{8 + 2 * i:02d}:00",
+                        'End_Time': f"{9 + 2 * i:02d}:30", 'Duration_Minutes': 90}
+                       for i in range(slots)],
+        'Days': [{'Day_ID': day, 'Day_Name': DAY_NAMES.get(day, day), 'Order': idx + 1}
+                 for idx, day in enumerate(days)],
+    }
+    columns = {
+        'Rooms': ['Room_Number', 'Strength', 'Multimedia'],
+        'Labs': ['Lab_Name', 'Strength', 'Lab_Type'],
+        'Teachers': ['Teacher_ID', 'Teacher_Name'],
+        'Courses': ['Course_ID', 'Course_Name', 'Theory_Classes_Per_Week', 'Has_Lab',
+                    'Lab_Type', 'Needs_Multimedia', 'Is_2Hour_Special'],
+        'Sections': ['Section_ID', 'Student_Count'],
+        'Course_Assignments': ['Assignment_ID', 'Section_ID', 'Course_ID', 'Teacher_ID',
+                               'Student_Count'],
+        'Time_Slots': ['Slot_ID', 'Start_Time', 'End_Time', 'Duration_Minutes'],
+        'Days': ['Day_ID', 'Day_Name', 'Order'],
+    }
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    for name in DATABASE_SHEETS:
+        ws = wb.create_sheet(name)
+        ws.append(columns[name])
+        for row in sheets[name]:
+            ws.append([row.get(column) for column in columns[name]])
+    wb.save(path)
+    return str(path)
+
+
+def small_university():
+    """Three sections sharing teachers, theory classes and labs over three days."""
+    courses = [course('C1', theory=2, lab_type='Computer'), course('C2', theory=2),
+               course('C3', theory=1, multimedia=True), course('C4', theory=1, lab_type='Physics')]
+    assignments = []
+    for s_idx, section in enumerate(['SA', 'SB', 'SC']):
+        for c_idx, course_id in enumerate(['C1', 'C2', 'C3', 'C4']):
+            assignments.append(assignment(f"A{s_idx}{c_idx}", section, course_id,
+                                          f"T{(s_idx + c_idx) % 4}"))
+    return {
+        'rooms': [('R1', 40, True), ('R2', 40, False), ('R3', 60, True)],
+        'labs': [('CL1', 40, 'Computer'), ('CL2', 40, 'Computer'), ('PL1', 40, 'Physics')],
+        'courses': courses,
+        'assignments': assignments,
+        'days': ('MON', 'TUE', 'WED'),
+        'slots': 4,
+    }
+
+
+@pytest.fixture
+def make_scheduler(tmp_path):
+    """Factory: make_scheduler(**write_database options) -> loaded scheduler."""
+    def make(domain_engine='python', **database):
+        path = write_database(tmp_path / f"db{len(list(tmp_path.iterdir()))}.xlsx", **database)
+        return CSPTimetableScheduler(path, domain_engine=domain_engine, use_cache=False)
+    return make
+
+
+def check_timetable(scheduler):
+    """Assert the hard constraints on the scheduler's current timetable."""
+    seen = set()
+    course_days = {}
+    for cls in scheduler.schedule:
+        for owner in (('section', cls.section_id), ('teacher', cls.teacher_id), ('room', cls.room_or_lab)):
+            key = owner + (cls.day, cls.slot)
+            assert key not in seen, f"double booking: {key}"
+            seen.add(key)
+        course_days.setdefault((cls.section_id, cls.course_id, cls.day), []).append(cls)
+        bit = scheduler.cell_bit[(cls.day, cls.slot)]
+        assert not scheduler.teacher_blocked.get(cls.teacher_id, 0) & bit
+        assert not scheduler.room_blocked.get(cls.room_or_lab, 0) & bit
+    for classes in course_days.values():
+        # A course appears at most once per day: one theory class or one lab (two slots)
+        if len(classes) > 1:
+            first, second = sorted(classes, key=lambda c: scheduler.slot_index[c.slot])
+            assert 'Lab' in first.type and first.room_or_lab == second.room_or_lab
+            assert scheduler.slot_index[second.slot] == scheduler.slot_index[first.slot] + 1
@@ -0,0 +1,80 @@
+import random
+import time
+
+from conftest import assignment, check_timetable, course, small_university
+
+
+def lab_shortfall(make_scheduler):
+    """One Physics lab for five lab sessions over two 4-slot days: only four fit."""
+    return make_scheduler(
+        rooms=[('R1', 40, False), ('R2', 40, False)],
+        labs=[('P1', 40, 'Physics')],
+        courses=[course('PH', theory=1, lab_type='Physics')],
+        assignments=[assignment(f"A{i}", f"S{i}", 'PH', f"T{i}") for i in range(5)],
+        days=('MON', 'TUE'))
+
+
+def test_capacity_shortfall_still_searches_with_a_time_limit(make_scheduler):
+    scheduler = lab_shortfall(make_scheduler)
+    random.seed(0)
+    success_count, failed = scheduler.generate_timetable(time_limit=5)
+    check_timetable(scheduler)
+    # Every theory class and four of the five labs are placed
+    assert success_count == 4 and len(failed) == 1
+    assert sum('Lab' in cls.type for cls in scheduler.schedule) == 8
+    assert len(scheduler.schedule) == 8 + 5
+
+
+def test_capacity_shortfall_without_budget_terminates(make_scheduler):
+    scheduler = lab_shortfall(make_scheduler)
+    random.seed(0)
+    start = time.perf_counter()
+    success_count, _ = scheduler.generate_timetable()
+    assert time.perf_counter() - start < 30
+    assert success_count == 4
+    check_timetable(scheduler)
+    # The cap on an infeasible search is not a budget the caller gave
+    assert scheduler.infeasible_cap_reached and not scheduler.budget_exhausted
+    assert 'node_limit_reached' not in scheduler.stats.counters
+
+
+def test_budget_is_told_apart_from_the_infeasible_cap(make_scheduler):
+    scheduler = lab_shortfall(make_scheduler)
+    random.seed(0)
+    scheduler.generate_timetable(node_limit=3)
+    assert scheduler.budget_exhausted and not scheduler.infeasible_cap_reached
+    assert scheduler.stats.counters['node_limit_reached'] == 1
+    check_timetable(scheduler)
+
+
+def test_session_without_options_does_not_stop_the_search(make_scheduler):
+    # No lab of the course's type exists at all
+    scheduler = make_scheduler(
+        rooms=[('R1', 40, False)],
+        courses=[course('CH', theory=1, lab_type='Chemistry'), course('MA', theory=2)],
+        assignments=[assignment('A1', 'S1', 'CH', 'T1'), assignment('A2', 'S1', 'MA', 'T2')],
+        days=('MON', 'TUE'))
+    success_count, failed = scheduler.generate_timetable(arc_consistency=False)
+    assert success_count == 1
+    assert [a['Assignment_ID'] for a in failed] == ['A1']
+    assert len(scheduler.schedule) == 3  # CH theory + two MA classes
+
+
+def test_node_limit_keeps_the_most_complete_assignment(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    scheduler.generate_timetable(node_limit=5)
+    assert scheduler.budget_exhausted
+    assert scheduler.stats.counters['node_limit_reached'] == 1
+    assert scheduler.stats.counters['best_assigned'] == 5
+    assert len(scheduler.schedule) >= 5
+    check_timetable(scheduler)
+
+
+def test_feasible_instance_is_solved_within_budget(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    success_count, failed = scheduler.generate_timetable(time_limit=30)
+    assert not scheduler.budget_exhausted
+    assert success_count == len(scheduler.assignments) and not failed
+    check_timetable(scheduler)
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from conftest import assignment, check_timetable, course, small_university
+from e_forward_checking import ForwardChecker
+
+
+def checker_for(scheduler):
+    variables = scheduler.build_variables(scheduler.assignments)
+    for var_id, var in enumerate(variables):
+        var.id = var_id
+    return ForwardChecker(scheduler, variables), variables
+
+
+def shared_section(make_scheduler, extra=()):
+    """Section SA takes C1 (teacher T1) and C2 (teacher T2, who can't teach at S2) in two slots."""
+    scheduler = make_scheduler(rooms=[('R1', 40, False), ('R2', 40, False)],
+                               courses=[course('C1'), course('C2'), course('C3')],
+                               assignments=[assignment('A1', 'SA', 'C1', 'T1'),
+                                            assignment('A2', 'SA', 'C2', 'T2'), *extra],
+                               slots=2)
+    scheduler.block_cell('teacher', 'T2', 'MON', 'S2')
+    return scheduler
+
+
+def test_pre_pass_removes_unsupported_times(make_scheduler):
+    checker, (a1, a2) = checker_for(shared_section(make_scheduler))
+    assert checker.domain_size(a1) == 4  # two slots, two rooms
+    assert checker.propagate()
+    assert checker.pruned == 1
+    assert {value[:2] for value in checker.get_values(a1)} == {('MON', 'S2')}
+    assert {value[:2] for value in checker.get_values(a2)} == {('MON', 'S1')}
+
+
+def test_wipe_out_and_capacity_shortfall(make_scheduler):
+    scheduler = shared_section(make_scheduler, extra=[assignment('A3', 'SA', 'C3', 'T3')])
+    checker, _ = checker_for(scheduler)
+    assert checker.capacity_report() == ["Section SA needs 3 slots but only 2 are free"]
+    assert not checker.propagate()
+    assert checker.wiped is not None
+
+
+def test_mac_prunes_during_search_and_undo_restores(make_scheduler):
+    checker, (a1, a2) = checker_for(shared_section(make_scheduler))
+    before = (list(map(list, checker.block)), checker.size[:])
+    checker.assign(a1, ('MON', 'S1', 'R1'))
+    assert not checker.propagate(a1)  # A2 has nowhere left to go
+    checker.undo()
+    assert (list(map(list, checker.block)), checker.size[:]) == before
+
+
+@pytest.mark.parametrize('options', [{'arc_consistency': False},
+                                     {'arc_consistency': True},
+                                     {'maintain_arc_consistency': True}])
+def test_propagation_keeps_solutions(make_scheduler, options):
+    scheduler = make_scheduler(**small_university())
+    random.seed(4)
+    success_count, failed = scheduler.generate_timetable(**options)
+    assert success_count == len(scheduler.assignments) and not failed
+    check_timetable(scheduler)
@@ -0,0 +1,55 @@
+import random
+
+from conftest import assignment, check_timetable, course, small_university
+from e_forward_checking import ForwardChecker, NogoodStore
+
+
+def test_conflict_set_blames_only_the_cause(make_scheduler):
+    # C can only take MON S1 (its teacher is blocked at S2); A takes that cell
+    # of C's section first, B is an unrelated decision in between
+    scheduler = make_scheduler(rooms=[('R1', 40, False), ('R2', 40, False), ('R3', 40, False)],
+                               courses=[course('C1'), course('C2'), course('C3')],
+                               assignments=[assignment('A', 'SA', 'C1', 'T1'),
+                                            assignment('B', 'SB', 'C2', 'T2'),
+                                            assignment('C', 'SA', 'C3', 'T3')],
+                               slots=2)
+    scheduler.block_cell('teacher', 'T3', 'MON', 'S2')
+    variables = scheduler.build_variables(scheduler.assignments)
+    for var_id, var in enumerate(variables):
+        var.id = var_id
+    checker = ForwardChecker(scheduler, variables)
+    a, b, c = variables
+
+    checker.assign(a, ('MON', 'S1', 'R1'))
+    checker.assign(b, ('MON', 'S2', 'R2'))
+    assert checker.domain_size(c) == 0
+    assert checker.conflict_set(c) == {0: True}  # A's time alone, not B
+
+
+def test_nogoods_match_full_values_and_times():
+    nogoods = NogoodStore(max_size=3)
+    nogoods.learn(((0, ('MON', 'S1')), (1, ('TUE', 'S2', 'R1'))))
+    current = {0: ('MON', 'S1', 'R7')}
+    assert nogoods.violated_by(1, ('TUE', 'S2', 'R1'), current) == [(0, ('MON', 'S1'))]
+    assert nogoods.violated_by(1, ('TUE', 'S2', 'R2'), current) is None
+    assert nogoods.violated_by(1, ('TUE', 'S2', 'R1'), {0: ('MON', 'S2', 'R7')}) is None
+
+    nogoods.learn(tuple((v, ('MON', 'S1')) for v in range(4)))  # longer than max_size
+    assert nogoods.count == 1
+
+
+def test_backjumping_needs_fewer_nodes(make_scheduler):
+    nodes = {}
+    for backjumping in (True, False):
+        nodes[backjumping] = 0
+        for seed in range(6):
+            scheduler = make_scheduler(**small_university())
+            random.seed(seed)
+            success_count, _ = scheduler.generate_timetable(backjumping=backjumping,
+                                                            arc_consistency=False)
+            assert success_count == len(scheduler.assignments)
+            check_timetable(scheduler)
+            nodes[backjumping] += scheduler.stats.counters['nodes']
+            if backjumping:
+                assert scheduler.stats.counters['nogoods_learned'] > 0
+    assert nodes[True] < nodes[False]
@@ -0,0 +1,47 @@
+import random
+import sys
+
+import pytest
+
+from conftest import assignment, check_timetable, course
+
+
+def many_sections(count=80):
+    """count sections of three theory classes each, far more variables than the recursion limit below."""
+    return {
+        'rooms': [(f"R{i}", 40, False) for i in range(count // 2)],
+        'courses': [course('C1', theory=3)],
+        'assignments': [assignment(f"A{i}", f"S{i}", 'C1', f"T{i % (count // 2)}") for i in range(count)],
+        'days': ('MON', 'TUE', 'WED'),
+        'slots': 4,
+    }
+
+
+@pytest.fixture
+def low_recursion_limit():
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(150)
+    yield 150
+    sys.setrecursionlimit(limit)
+
+
+@pytest.mark.parametrize('backjumping', [True, False])
+def test_search_depth_is_not_bounded_by_recursion(make_scheduler, backjumping, low_recursion_limit):
+    scheduler = make_scheduler(**many_sections())
+    random.seed(0)
+    success_count, failed = scheduler.generate_timetable(backjumping=backjumping)
+    assert success_count == 80 and not failed
+    assert scheduler.stats.counters['max_depth'] > low_recursion_limit
+    check_timetable(scheduler)
+
+
+def test_exhausted_search_reports_failure(make_scheduler):
+    # Two sections share one teacher and one slot: only one class fits
+    scheduler = make_scheduler(rooms=[('R1', 40, False), ('R2', 40, False)],
+                               courses=[course('C1')],
+                               assignments=[assignment('A1', 'S1', 'C1', 'T1'),
+                                            assignment('A2', 'S2', 'C1', 'T1')],
+                               slots=1)
+    success_count, failed = scheduler.generate_timetable(arc_consistency=False, backjumping=False)
+    assert success_count == 1 and len(failed) == 1
+    check_timetable(scheduler)
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from conftest import small_university, write_database
+from i_benchmark import compare_reports, run_case, scale_database
+
+
+def result(config='python', wall_time=1.0, nodes=100, memory=10.0, success_rate=1.0):
+    return {'instance': 'small_x1_s0', 'config': config, 'wall_time': wall_time, 'nodes': nodes,
+            'peak_memory_mb': memory, 'success_rate': success_rate}
+
+
+def test_scale_database_copies_people_and_rooms(tmp_path):
+    source = write_database(tmp_path / 'base.xlsx', **small_university())
+    scale_database(source, 3, tmp_path / 'x3.xlsx')
+    base = pd.read_excel(source, sheet_name=None)
+    scaled = pd.read_excel(tmp_path / 'x3.xlsx', sheet_name=None)
+
+    for sheet in ('Rooms', 'Labs', 'Teachers', 'Sections', 'Course_Assignments'):
+        assert len(scaled[sheet]) == 3 * len(base[sheet])
+    for sheet in ('Courses', 'Days', 'Time_Slots'):
+        assert len(scaled[sheet]) == len(base[sheet])
+    sections = set(scaled['Sections']['Section_ID'].astype(str))
+    assert {'SA', 'SA_1', 'SA_2'} <= sections and len(sections) == 9
+    # Copies keep pointing at their own copies
+    rows = scaled['Course_Assignments']
+    copy = rows[rows['Section_ID'] == 'SB_2']
+    assert set(copy['Teacher_ID']) <= {f"T{i}_2" for i in range(4)}
+
+
+def test_run_case_reports_a_solved_instance(tmp_path):
+    path = write_database(tmp_path / 'base.xlsx', **small_university())
+    run = run_case(path, 'mrv', seed=0, time_limit=30, measure_memory=False)
+    assert run['config'] == 'mrv' and run['success_rate'] == 1.0
+    assert run['nodes'] >= run['assignments'] and run['peak_memory_mb'] is None
+    assert 'search' in run['phases']
+
+
+def test_compare_reports_flags_regressions():
+    baseline = {'results': [result(), result('numpy')]}
+    same = {'results': [result(wall_time=1.05), result('numpy')]}
+    assert compare_reports(same, baseline) == []
+
+    worse = {'results': [result(wall_time=2.0, nodes=200, memory=20.0, success_rate=0.5),
+                         result('numpy', wall_time=1.0)]}
+    messages = compare_reports(worse, baseline)
+    assert len(messages) == 4
+    assert all(message.startswith('small_x1_s0 [python]') for message in messages)
+
+
+def test_compare_reports_ignores_tiny_time_changes():
+    baseline = {'results': [result(wall_time=0.01)]}
+    assert compare_reports({'results': [result(wall_time=0.05)]}, baseline) == []
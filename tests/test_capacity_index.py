@@ -0,0 +1,30 @@
+import pytest
+
+from conftest import assignment, course
+
+ROOMS = [('R30', 30, False), ('R45', 45, True), ('R50', 50, False), ('R60', 60, True), ('R80', 80, False)]
+LABS = [('CL20', 20, 'Computer'), ('CL40', 40, 'Computer'), ('CL35', 35, 'Computer'), ('PL50', 50, 'Physics')]
+
+
+@pytest.fixture
+def scheduler(make_scheduler):
+    return make_scheduler(rooms=ROOMS, labs=LABS, courses=[course('C1')],
+                          assignments=[assignment('A1', 'S1', 'C1', 'T1')])
+
+
+@pytest.mark.parametrize('student_count', [0, 29, 30, 31, 45, 55, 60, 79, 80, 81])
+@pytest.mark.parametrize('needs_multimedia', [False, True])
+def test_rooms_match_a_linear_scan(scheduler, student_count, needs_multimedia):
+    expected = [name for name, strength, multimedia in sorted(ROOMS, key=lambda r: r[1])
+                if strength >= student_count and (multimedia or not needs_multimedia)]
+    suitable = scheduler.find_suitable_rooms(student_count, needs_multimedia)
+    assert list(suitable) == expected
+    assert scheduler.find_suitable_rooms(student_count, needs_multimedia) is suitable  # memoized
+
+
+def test_labs_fit_first_then_largest_backup(scheduler):
+    assert scheduler.find_suitable_labs('Computer', 30) == ('CL35', 'CL40', 'CL20')
+    assert scheduler.find_suitable_labs('Computer', 45) == ('CL40', 'CL35', 'CL20')
+    assert scheduler.find_suitable_labs('Physics', 10) == ('PL50',)
+    assert scheduler.find_labs_with_capacity(36) == ('CL40', 'PL50')
+    assert scheduler.find_labs_with_capacity(51) == ()
@@ -0,0 +1,60 @@
+import os
+import pickle
+
+import pytest
+
+import k_database_loader
+from conftest import small_university, write_database
+from k_database_loader import CACHE_VERSION, cache_path, load_database
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return write_database(tmp_path / 'db.xlsx', **small_university())
+
+
+def same(loaded, data):
+    """Equal databases (empty cells are NaN, which never equals itself)."""
+    return repr(loaded) == repr(data)
+
+
+def no_parsing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("workbook parsed again")
+    monkeypatch.setattr(k_database_loader, 'read_workbook', fail)
+
+
+def test_second_load_comes_from_the_cache(workbook, monkeypatch):
+    data = load_database(workbook)
+    assert os.path.exists(cache_path(workbook))
+    no_parsing(monkeypatch)
+    assert same(load_database(workbook), data)
+
+
+def test_touched_workbook_with_same_content_keeps_the_cache(workbook, monkeypatch):
+    data = load_database(workbook)
+    stat = os.stat(workbook)
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    no_parsing(monkeypatch)
+    assert same(load_database(workbook), data)
+    with open(cache_path(workbook), 'rb') as f:
+        assert pickle.load(f)['mtime'] == os.stat(workbook).st_mtime_ns
+
+
+def test_changed_workbook_is_parsed_again(workbook, tmp_path):
+    load_database(workbook)
+    database = small_university()
+    database['rooms'] = database['rooms'][:1]
+    write_database(tmp_path / 'db.xlsx', **database)
+    assert [room['Room_Number'] for room in load_database(workbook)['Rooms']] == ['R1']
+
+
+@pytest.mark.parametrize('content', [b'not a pickle',
+                                     pickle.dumps({'version': CACHE_VERSION - 1})])
+def test_unusable_cache_falls_back_to_the_workbook(workbook, content):
+    data = load_database(workbook, use_cache=False)
+    with open(cache_path(workbook), 'wb') as f:
+        f.write(content)
+    assert same(load_database(workbook), data)
+    with open(cache_path(workbook), 'rb') as f:
+        assert pickle.load(f)['version'] == CACHE_VERSION
@@ -0,0 +1,47 @@
+import math
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from conftest import small_university, write_database
+from k_database_loader import DATABASE_SHEETS, read_workbook
+
+
+def test_rows_match_pandas(tmp_path):
+    path = write_database(tmp_path / 'db.xlsx', **small_university())
+    data = read_workbook(path)
+    assert list(data) == list(DATABASE_SHEETS)
+    for name, df in pd.read_excel(path, sheet_name=None).items():
+        expected = df.to_dict('records')
+        assert len(data[name]) == len(expected)
+        for row, expected_row in zip(data[name], expected):
+            assert list(row) == list(expected_row)
+            for column, value in expected_row.items():
+                if isinstance(value, float) and math.isnan(value):
+                    assert math.isnan(row[column])
+                else:
+                    assert row[column] == value
+
+
+def test_blank_rows_short_rows_and_repeated_headers(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Rooms'
+    ws.append(['Room_Number', 'Strength', 'Strength', None])
+    ws.append(['R1', 40])
+    ws.append([None, None, None, None])
+    ws.append(['R2', 50, 55, 'x'])
+    wb.save(tmp_path / 'odd.xlsx')
+
+    rows = read_workbook(str(tmp_path / 'odd.xlsx'), sheets=('Rooms',))['Rooms']
+    assert len(rows) == 2
+    assert list(rows[0]) == ['Room_Number', 'Strength', 'Strength.1', 'Unnamed: 3']
+    assert rows[0]['Strength'] == 40 and math.isnan(rows[0]['Strength.1'])
+    assert rows[1]['Strength.1'] == 55 and rows[1]['Unnamed: 3'] == 'x'
+
+
+def test_missing_sheet(tmp_path):
+    path = write_database(tmp_path / 'db.xlsx', **small_university())
+    with pytest.raises(ValueError, match="Worksheet named 'Buildings' not found"):
+        read_workbook(path, sheets=('Rooms', 'Buildings'))
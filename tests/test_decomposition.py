@@ -0,0 +1,45 @@
+import random
+
+from conftest import assignment, check_timetable, course
+from p_decomposition import DecompositionSolver
+
+
+def two_departments():
+    """Two groups of sections with their own teachers, sharing the rooms and the lab."""
+    courses = [course('C1', theory=2), course('C2', theory=1, lab_type='Computer')]
+    assignments = []
+    for dept in ('A', 'B'):
+        for s in range(2):
+            for c, course_id in enumerate(('C1', 'C2')):
+                assignments.append(assignment(f"{dept}{s}{c}", f"S{dept}{s}", course_id, f"T{dept}{c}"))
+    return {
+        'rooms': [('R1', 40, False), ('R2', 40, False)],
+        'labs': [('CL1', 40, 'Computer'), ('CL2', 40, 'Computer')],
+        'courses': courses,
+        'assignments': assignments,
+        'days': ('MON', 'TUE', 'WED'),
+        'slots': 4,
+    }
+
+
+def test_components_share_out_the_rooms(make_scheduler):
+    scheduler = make_scheduler(**two_departments())
+    components = DecompositionSolver(scheduler).find_components()
+    assert len(components) == 2
+    assert [len(c['assignments']) for c in components] == [4, 4]
+    assert not components[0]['resources'] & components[1]['resources']
+    assert components[0]['resources'] | components[1]['resources'] == {'R1', 'R2', 'CL1', 'CL2'}
+
+
+def test_decomposed_search_merges_timetables_and_stats(make_scheduler):
+    scheduler = make_scheduler(**two_departments())
+    random.seed(0)
+    success_count, failed = scheduler.generate_timetable_decomposed(workers=2, time_limit=30)
+    assert success_count == 8 and not failed
+    check_timetable(scheduler)
+
+    # Every session was assigned in a worker: their counters made it back
+    stats = scheduler.stats
+    assert stats.counters['variables'] >= 16
+    assert stats.counters['nodes'] >= 16
+    assert stats.timers['search'][1] >= 2
@@ -0,0 +1,55 @@
+import random
+
+from openpyxl import load_workbook
+
+from conftest import DAY_NAMES, small_university
+
+
+def test_timetable_index_groups_classes_by_owner(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    scheduler.generate_timetable()
+    by_section, by_teacher = scheduler.build_timetable_index()
+    assert sum(map(len, by_section.values())) == len(scheduler.schedule)
+    assert sum(map(len, by_teacher.values())) == len(scheduler.schedule)
+    for cls in scheduler.schedule:
+        assert cls in by_section[(cls.section_id, cls.day, cls.slot)]
+        assert cls in by_teacher[(cls.teacher_id, cls.day, cls.slot)]
+
+
+def test_excel_sheets_hold_every_class(make_scheduler, tmp_path, monkeypatch):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    scheduler.generate_timetable()
+    monkeypatch.chdir(tmp_path)
+    scheduler.export_to_excel()
+
+    wb = load_workbook(tmp_path / 'generated_timetable_csp.xlsx')
+    sections = [s['Section_ID'] for s in scheduler.sections]
+    teachers = [t['Teacher_ID'] for t in scheduler.teachers]
+    assert wb.sheetnames == ([f"Section_{s}" for s in sections] +
+                             [f"Teacher_{t}" for t in teachers])
+
+    ws = wb['Section_SA']
+    header = [cell.value for cell in ws[1]]
+    assert header == ['Day\\Time'] + [scheduler.slot_times[s] for s in scheduler.slot_list]
+    assert ws['A1'].style == 'timetable_header'
+    assert ws['A2'].style == 'timetable_day'
+    assert ws['B2'].style == 'timetable_cell'
+    assert [ws.cell(row=r, column=1).value for r in range(2, 5)] == \
+        [DAY_NAMES[d] for d in scheduler.day_list]
+
+    for cls in scheduler.schedule:
+        row = scheduler.day_list.index(cls.day) + 2
+        column = scheduler.slot_list.index(cls.slot) + 2
+        text = wb[f"Section_{cls.section_id}"].cell(row=row, column=column).value
+        assert f"Course {cls.course_id}\n{cls.room_or_lab}\nTeacher {cls.teacher_id}" in text
+        text = wb[f"Teacher_{cls.teacher_id}"].cell(row=row, column=column).value
+        assert f"Section: {cls.section_id}" in text
+
+    # Cells with no class stay empty rather than missing
+    filled = {(cls.day, cls.slot) for cls in scheduler.schedule if cls.section_id == 'SA'}
+    for r, day in enumerate(scheduler.day_list, start=2):
+        for c, slot in enumerate(scheduler.slot_list, start=2):
+            if (day, slot) not in filled:
+                assert not ws.cell(row=r, column=c).value
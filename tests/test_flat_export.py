@@ -0,0 +1,59 @@
+import csv
+import json
+import random
+
+import pytest
+
+import l_flat_export
+from conftest import small_university
+from l_flat_export import FLAT_COLUMNS, export_csv, export_jsonl, read_flat_schedule, schedule_frame
+
+
+@pytest.fixture
+def solved(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(1)
+    scheduler.generate_timetable()
+    return scheduler
+
+
+def sort_rows(rows):
+    return sorted(rows, key=lambda row: (row['Day'], row['Slot'], row['Section_ID']))
+
+
+def test_jsonl_streams_the_same_rows_as_the_frame(solved, tmp_path, monkeypatch):
+    expected = schedule_frame(solved).to_dict('records')
+    monkeypatch.setattr(l_flat_export, 'JSONL_CHUNK_ROWS', 7)
+
+    def no_frame(scheduler):
+        raise AssertionError("export_jsonl must not build the DataFrame")
+    monkeypatch.setattr(l_flat_export, 'schedule_frame', no_frame)
+
+    path = tmp_path / 'timetable.jsonl'
+    assert export_jsonl(solved, str(path)) == len(solved.schedule) == len(expected)
+    rows = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert rows == expected
+    assert all(list(row) == FLAT_COLUMNS for row in rows)
+
+
+def test_csv_and_jsonl_hold_the_same_rows_in_the_same_order(solved, tmp_path):
+    # Classes of a course missing from course_dict: both formats leave its name empty
+    solved.course_dict.pop('C4')
+    export_csv(solved, str(tmp_path / 'timetable.csv'))
+    export_jsonl(solved, str(tmp_path / 'timetable.jsonl'))
+
+    with open(tmp_path / 'timetable.csv', newline='', encoding='utf-8') as f:
+        csv_rows = list(csv.DictReader(f))
+    jsonl_rows = [json.loads(line) for line in
+                  (tmp_path / 'timetable.jsonl').read_text(encoding='utf-8').splitlines()]
+    assert len(csv_rows) == len(jsonl_rows) == len(solved.schedule)
+    assert csv_rows == [{column: '' if value is None else str(value) for column, value in row.items()}
+                        for row in jsonl_rows]
+    assert any(row['Course_Name'] is None for row in jsonl_rows)
+
+
+@pytest.mark.parametrize('export, suffix', [(export_csv, '.csv'), (export_jsonl, '.jsonl')])
+def test_flat_exports_read_back(solved, tmp_path, export, suffix):
+    path = str(tmp_path / f"timetable{suffix}")
+    export(solved, path)
+    assert sort_rows(read_flat_schedule(solved, path)) == sort_rows(solved.schedule.to_list())
@@ -0,0 +1,72 @@
+import copy
+import random
+
+from conftest import small_university
+from e_forward_checking import ForwardChecker
+
+
+def setup(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    variables = scheduler.build_variables(scheduler.assignments)
+    for var_id, var in enumerate(variables):
+        var.id = var_id
+    return scheduler, variables, ForwardChecker(scheduler, variables)
+
+
+def counters(checker):
+    return copy.deepcopy((checker.block, checker.free, checker.size))
+
+
+def assign_some(checker, variables, count, seed=0):
+    rng = random.Random(seed)
+    assigned = []
+    for var in variables:
+        values = checker.get_values(var)
+        if values and not checker.assigned[var.id]:
+            checker.assign(var, rng.choice(values))
+            assigned.append(var)
+            if len(assigned) == count:
+                break
+    return assigned
+
+
+def test_incremental_domains_match_a_rebuild(make_scheduler):
+    scheduler, variables, checker = setup(make_scheduler)
+    assign_some(checker, variables, 8)
+
+    fresh = ForwardChecker(scheduler, variables)
+    for var in variables:
+        if checker.assigned[var.id]:
+            continue
+        v = var.id
+        assert (checker.block[v], checker.free[v], checker.size[v]) == \
+               (fresh.block[v], fresh.free[v], fresh.size[v])
+        assert sorted(checker.get_values(var)) == sorted(fresh.get_values(var))
+
+
+def test_domains_match_generated_domains(make_scheduler):
+    scheduler, variables, checker = setup(make_scheduler)
+    assign_some(checker, variables, 6, seed=1)
+    for var in variables:
+        if checker.assigned[var.id]:
+            continue
+        row = next(a for a in scheduler.assignments if a['Assignment_ID'] == var.assignment.assignment_id)
+        if var.kind == 'theory':
+            course = scheduler.course_dict[row['Course_ID']]
+            domain = scheduler.get_theory_domain(row, course['Is_2Hour_Special'], skip_scheduled_days=True)
+        else:
+            domain = scheduler.get_lab_domain(row, skip_scheduled_days=True)
+        assert sorted(checker.get_values(var)) == sorted(domain)
+
+
+def test_undo_restores_every_counter(make_scheduler):
+    scheduler, variables, checker = setup(make_scheduler)
+    before = counters(checker)
+    schedule_before = scheduler.schedule.to_list()
+    assigned = assign_some(checker, variables, 10, seed=2)
+    assert len(scheduler.schedule) > 0
+    for _ in assigned:
+        checker.undo()
+    assert counters(checker) == before
+    assert scheduler.schedule.to_list() == schedule_before
+    assert not checker.trail and not checker.occupant
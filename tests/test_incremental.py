@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from conftest import assignment, check_timetable, small_university
+from m_incremental import IncrementalRescheduler
+
+
+@pytest.fixture
+def solved(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    success_count, _ = scheduler.generate_timetable()
+    assert success_count == len(scheduler.assignments)
+    return scheduler
+
+
+def placements(scheduler):
+    return {(cls.assignment_id, cls.day, cls.slot, cls.room_or_lab) for cls in scheduler.schedule}
+
+
+def test_added_assignment_is_scheduled_around_the_rest(solved):
+    report = IncrementalRescheduler(solved).apply(
+        {'add_assignments': [assignment('NEW', 'SA', 'C3', 'T3')]})
+    assert report['affected'] == 1 and report['unscheduled'] == 0
+    check_timetable(solved)
+    assert sum(1 for cls in solved.schedule if cls.assignment_id == 'NEW') == 1
+
+
+def test_blocked_teacher_moves_only_their_classes(solved):
+    cls = next(iter(solved.schedule))
+    before = placements(solved)
+    success_count, _ = solved.reschedule({'block_teacher': [(cls.teacher_id, cls.day, cls.slot)]})
+    assert success_count == len(solved.assignments)
+    check_timetable(solved)
+    assert not any(c.teacher_id == cls.teacher_id and (c.day, c.slot) == (cls.day, cls.slot)
+                   for c in solved.schedule)
+    moved = {entry[0] for entry in before - placements(solved)}
+    assert cls.assignment_id in moved
+
+
+def test_removed_assignment_leaves_the_timetable(solved):
+    report = IncrementalRescheduler(solved).apply({'remove_assignments': ['A00']})
+    assert report['moved'] == 4 and report['unscheduled'] == 0
+    assert all(cls.assignment_id != 'A00' for cls in solved.schedule)
+
+
+@pytest.mark.parametrize('row, message', [
+    ({'Section_ID': 'SA', 'Course_ID': 'C3', 'Teacher_ID': 'T3', 'Student_Count': 30}, 'missing'),
+    ({**assignment('NEW', 'SA', 'C3', 'T3'), 'Student_Count': None}, 'not a number'),
+    ({**assignment('NEW', 'SA', 'C3', 'T3'), 'Student_Count': 'thirty'}, 'not a number'),
+    ({**assignment('NEW', 'SA', 'C3', 'T3'), 'Student_Count': float('nan')}, 'not a number'),
+    (assignment('A01', 'SA', 'C3', 'T3'), 'Duplicate Assignment_ID'),
+    (assignment('NEW', 'SX', 'C3', 'T3'), 'Unknown section'),
+    (assignment('NEW', 'SA', 'CX', 'T3'), 'Unknown course'),
+    (assignment('NEW', 'SA', 'C3', 'TX'), 'Unknown teacher'),
+])
+def test_invalid_added_rows_change_nothing(solved, row, message):
+    before = placements(solved)
+    assignments = list(solved.assignments)
+    with pytest.raises(ValueError, match=message):
+        IncrementalRescheduler(solved).apply({'add_assignments': [row]})
+    assert placements(solved) == before and solved.assignments == assignments
+
+
+def test_removed_id_can_be_added_again(solved):
+    report = IncrementalRescheduler(solved).apply({
+        'remove_assignments': ['A02'], 'add_assignments': [assignment('A02', 'SA', 'C3', 'T2', 35)]})
+    assert report['unscheduled'] == 0
+    check_timetable(solved)
+
+
+def test_teacher_blocked_all_week_moves_no_other_class(solved):
+    week = [('T0', day, slot) for day in solved.day_list for slot in solved.slot_list]
+    before = placements(solved)
+    report = IncrementalRescheduler(solved).apply({'block_teacher': week})
+    check_timetable(solved)
+    assert not solved.budget_exhausted
+    assert report['impossible'] == report['affected'] == report['unscheduled'] == 6
+    assert report['freed'] == 6 and report['rounds'] == 0
+    # Only T0's classes left the timetable; nothing else moved
+    assert {entry[0] for entry in before - placements(solved)} == {'A00', 'A13', 'A22'}
+    assert placements(solved) <= before
+
+
+def test_failed_widening_puts_the_neighbours_back(solved):
+    # Three more C3 classes for SA: one per day is all the week allows
+    before = placements(solved)
+    report = IncrementalRescheduler(solved).apply({'add_assignments': [
+        assignment('N1', 'SA', 'C3', 'T1'), assignment('N2', 'SA', 'C3', 'T2'),
+        assignment('N3', 'SA', 'C3', 'T3')]})
+    check_timetable(solved)
+    assert report['rounds'] > 1 and report['freed'] > report['affected']
+    assert report['moved'] == 0 and placements(solved) >= before
+    assert report['unscheduled'] == 3 - len(placements(solved) - before)
@@ -0,0 +1,59 @@
+import json
+import random
+
+from conftest import small_university
+from j_instrumentation import Instrumentation
+from r_records import Assignment, Variable
+
+
+def test_counters_timers_and_dead_ends():
+    stats = Instrumentation()
+    stats.count('nodes')
+    stats.count('nodes', 4)
+    stats.add_time('assign', 0.5)
+    with stats.phase('assign'):
+        pass
+    var = Variable('lab', Assignment('A1', 'S1', 'C1', 'T1', 30))
+    stats.record_dead_end(3, var)
+    stats.record_dead_end(3, var)
+
+    report = json.loads(stats.to_json())
+    assert report['counters'] == {'nodes': 5, 'backtracks': 2}
+    assert report['timers']['assign']['calls'] == 2
+    assert report['timers']['assign']['seconds'] >= 0.5
+    assert report['backtracks_by_depth'] == {'3': 2}
+    assert report['top_dead_ends'] == [{'section': 'S1', 'course': 'C1', 'kind': 'lab', 'count': 2}]
+
+    stats.reset(keep=('assign',))
+    assert not stats.counters and list(stats.timers) == ['assign'] and not stats.dead_ends
+
+
+def test_merge_sums_counts_and_keeps_deepest():
+    stats = Instrumentation()
+    stats.count('nodes', 3)
+    stats.counters['max_depth'] = 9
+    stats.merge({'counters': {'nodes': 2, 'max_depth': 4}, 'timers': {'search': [1.5, 1]},
+                 'backtracks_by_depth': {2: 1}, 'dead_ends': {('S1', 'C1', 'theory'): 1}})
+    assert stats.counters['nodes'] == 5 and stats.counters['max_depth'] == 9
+    assert stats.timers['search'] == [1.5, 1]
+
+
+def test_snapshots_during_search(make_scheduler, monkeypatch):
+    monkeypatch.setattr(Instrumentation, 'TICK_EVERY', 1)
+    scheduler = make_scheduler(**small_university())
+    snapshots = []
+    scheduler.stats.enable_snapshots(interval=0, callback=snapshots.append)
+    random.seed(0)
+    scheduler.generate_timetable()
+    assert snapshots and set(snapshots[-1]) == {'elapsed', 'nodes', 'backtracks', 'depth', 'max_depth'}
+
+
+def test_scheduler_records_the_hot_path(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    scheduler.generate_timetable()
+    stats = scheduler.stats.to_dict()
+    assert stats['counters']['nodes'] >= stats['counters']['variables'] == 24
+    for phase in ('load', 'build_variables', 'domain_generation', 'arc_consistency',
+                  'select_variable', 'assign', 'search', 'generate_timetable'):
+        assert phase in stats['timers'], phase
@@ -0,0 +1,68 @@
+import random
+
+from conftest import assignment, check_timetable, course, small_university
+from n_local_search import MinConflictsRepair
+
+
+def test_repair_completes_an_empty_timetable(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    success_count, failed = scheduler.repair_with_local_search()
+    assert success_count == len(scheduler.assignments) and not failed
+    assert len(scheduler.schedule) == 30
+    check_timetable(scheduler)
+    assert 'local_search' in scheduler.stats.timers
+
+
+def test_repair_keeps_at_least_the_partial_timetable(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(1)
+    scheduler.generate_timetable()
+    partial = [cls for cls in scheduler.schedule if cls.section_id != 'SB']
+    scheduler.load_schedule(partial)
+
+    report = MinConflictsRepair(scheduler).run()
+    # Section SB's six theory sessions and two labs are missing
+    assert report['placed_before'] == 24 - 8
+    assert report['placed'] >= report['placed_before']
+    assert report['unscheduled'] == 0 and report['dropped'] == 0
+    assert len(scheduler.schedule) == 30
+    check_timetable(scheduler)
+
+
+def test_overfull_instance_drops_conflicts_and_stays_valid(make_scheduler):
+    # Five one-slot sessions of one teacher in a one-day, four-slot week
+    scheduler = make_scheduler(
+        rooms=[('R1', 40, False), ('R2', 40, False)],
+        courses=[course(f"C{i}") for i in range(5)],
+        assignments=[assignment(f"A{i}", f"S{i}", f"C{i}", 'T1') for i in range(5)])
+    random.seed(0)
+    report = MinConflictsRepair(scheduler).run(max_steps=500)
+    check_timetable(scheduler)
+    assert report['placed'] == len(scheduler.schedule) == 4
+    assert report['unscheduled'] == 1
+    assert report['steps'] <= 500
+
+
+def test_blocked_cells_are_never_used(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    for slot in ('S1', 'S2'):
+        scheduler.block_cell('teacher', 'T0', 'MON', slot)
+    scheduler.block_cell('room', 'CL1', 'TUE', 'S3')
+    random.seed(2)
+    scheduler.repair_with_local_search()
+    check_timetable(scheduler)
+
+
+def test_generate_timetable_falls_back_to_local_search(make_scheduler):
+    scheduler = make_scheduler(
+        rooms=[('R1', 40, False)],
+        labs=[('P1', 40, 'Physics')],
+        courses=[course('PH', theory=1, lab_type='Physics')],
+        assignments=[assignment(f"A{i}", f"S{i}", 'PH', f"T{i}") for i in range(5)],
+        days=('MON', 'TUE'))
+    random.seed(0)
+    success_count, failed = scheduler.generate_timetable(node_limit=50, local_search=True)
+    check_timetable(scheduler)
+    assert 'local_search' in scheduler.stats.timers
+    assert success_count + len(failed) == 5
@@ -0,0 +1,46 @@
+import pytest
+
+from conftest import small_university
+
+THEORY = {'Assignment_ID': 'A00', 'Course_ID': 'C1', 'Type': '1.5 Hr Class'}
+
+
+def test_every_cell_has_its_own_bit(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    bits = list(scheduler.cell_bit.values())
+    assert len(bits) == 3 * 4
+    assert all(bit.bit_count() == 1 for bit in bits)
+    assert sum(bits) == (1 << len(bits)) - 1
+    assert scheduler.get_window_mask('TUE', ('S2', 'S3')) == \
+        scheduler.cell_bit[('TUE', 'S2')] | scheduler.cell_bit[('TUE', 'S3')]
+
+
+def test_assign_and_unassign_update_the_masks(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    scheduler.assign_class('MON', 'S2', 'SA', 'T0', 'R1', THEORY)
+    assert not scheduler.is_slot_available('MON', 'S2', 'SA', 'T9', 'R9')
+    assert not scheduler.is_slot_available('MON', 'S2', 'S9', 'T0', 'R9')
+    assert not scheduler.is_slot_available('MON', 'S2', 'S9', 'T9', 'R1')
+    assert scheduler.is_slot_available('MON', 'S3', 'SA', 'T0', 'R1')
+    assert scheduler.is_course_already_scheduled_today('SA', 'C1', 'MON')
+    # A two-slot window is blocked by either of its cells
+    assert not scheduler.is_window_available(scheduler.get_window_mask('MON', ('S1', 'S2')),
+                                             'S9', 'T9', 'R1')
+
+    scheduler.unassign_class('MON', 'S2', 'SA', 'T0', 'R1', 'C1')
+    assert scheduler.is_slot_available('MON', 'S2', 'SA', 'T0', 'R1')
+    assert not scheduler.is_course_already_scheduled_today('SA', 'C1', 'MON')
+    assert len(scheduler.schedule) == 0
+
+
+def test_blocked_cells_survive_a_reload(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    scheduler.block_cell('teacher', 'T1', 'WED', 'S1')
+    scheduler.block_cell('room', 'R2', 'WED', 'S4')
+    scheduler.load_schedule([dict(Section_ID='SA', Teacher_ID='T0', Day='MON', Slot='S1',
+                                  Room_or_Lab='R1', **THEORY)])
+    assert not scheduler.is_slot_available('WED', 'S1', 'S9', 'T1', 'R9')
+    assert not scheduler.is_slot_available('WED', 'S4', 'S9', 'T9', 'R2')
+    assert not scheduler.is_slot_available('MON', 'S1', 'SA', 'T9', 'R9')
+    with pytest.raises(ValueError, match='Unknown block kind'):
+        scheduler.block_cell('section', 'SA', 'MON', 'S1')
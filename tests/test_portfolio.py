@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import check_timetable, small_university
+from h_portfolio import PortfolioSolver
+
+
+def test_portfolio_solves_with_heuristic_option(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    success_count, failed = scheduler.generate_timetable_portfolio(
+        workers=2, time_limit=30, heuristic='mrv', backjumping=False)
+    assert success_count == len(scheduler.assignments) and not failed
+    check_timetable(scheduler)
+
+
+def test_heuristic_option_applies_to_configs_without_one(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    solver = PortfolioSolver(scheduler, configs=[{'seed': 1}, {'seed': 2, 'heuristic': 'labs-first'}],
+                             heuristic='mrv')
+    assert [solver.heuristic_of(c) for c in solver.configs] == ['mrv', 'labs-first']
+    assert 'heuristic' not in solver.options
+    assert {c['heuristic'] for c in PortfolioSolver(scheduler, workers=3, heuristic='mrv').configs} == {'mrv'}
+
+
+def test_portfolio_rejects_bad_options(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    with pytest.raises(ValueError):
+        PortfolioSolver(scheduler, workers=2, heuristic='fastest')
+    with pytest.raises(ValueError):
+        PortfolioSolver(scheduler, workers=2, time_limit=5)
+
+
+def test_worker_errors_are_raised(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    with pytest.raises(RuntimeError, match='TypeError'):
+        scheduler.generate_timetable_portfolio(workers=2, time_limit=30, no_such_option=True)
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from conftest import small_university
+from r_records import Assignment, ScheduledClass, Variable
+
+ROW = {'Assignment_ID': 'A1', 'Section_ID': 'S1', 'Course_ID': 'C1', 'Teacher_ID': 'T1',
+       'Day': 'MON', 'Slot': 'S2', 'Room_or_Lab': 'R1', 'Type': '1.5 Hr Class'}
+
+
+def test_records_have_no_instance_dict():
+    records = [Assignment('A1', 'S1', 'C1', 'T1', 30),
+               Variable('theory', Assignment('A1', 'S1', 'C1', 'T1', 30), index=0),
+               ScheduledClass.from_row(ROW)]
+    for record in records:
+        assert not hasattr(record, '__dict__')
+        with pytest.raises(AttributeError):
+            record.extra = 1
+
+
+def test_scheduled_class_reads_like_a_row():
+    cls = ScheduledClass.from_row(ROW)
+    assert cls['Day'] == 'MON' and cls.slot == 'S2'
+    assert cls.get('Type') == '1.5 Hr Class'
+    assert cls.get('Missing') is None and cls.get('Missing', 'x') == 'x'
+    with pytest.raises(KeyError):
+        cls['Missing']
+    assert list(cls.keys()) == list(ROW)
+    assert cls.to_dict() == ROW == dict(cls)
+    assert ScheduledClass.from_row(cls).to_dict() == ROW
+    assert pd.DataFrame([cls.to_dict()]).columns.tolist() == list(ROW)
+
+
+def test_assignment_from_row():
+    record = Assignment.from_row({'Assignment_ID': 'A1', 'Section_ID': 'S1', 'Course_ID': 'C1',
+                                  'Teacher_ID': 'T1', 'Student_Count': 30, 'Other': 'ignored'})
+    assert (record.assignment_id, record.section_id, record.course_id,
+            record.teacher_id, record.student_count) == ('A1', 'S1', 'C1', 'T1', 30)
+    assert repr(record) == "Assignment('A1', 'S1', 'C1', 'T1', 30)"
+
+
+def test_sessions_share_their_assignment_record(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    variables = scheduler.build_variables(scheduler.assignments)
+    assert len(variables) == 24
+    by_assignment = {}
+    for var in variables:
+        by_assignment.setdefault(var.assignment.assignment_id, set()).add(id(var.assignment))
+        assert var.id is None
+        assert (var.index is None) == (var.kind == 'lab')
+    assert len(by_assignment) == 12
+    assert all(len(ids) == 1 for ids in by_assignment.values())
+
+
+def test_schedule_holds_records(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    scheduler.generate_timetable()
+    assert scheduler.schedule
+    assert all(isinstance(cls, ScheduledClass) for cls in scheduler.schedule)
+    rows = [cls.to_dict() for cls in scheduler.schedule]
+    scheduler.load_schedule(rows)
+    assert [cls.to_dict() for cls in scheduler.schedule] == rows
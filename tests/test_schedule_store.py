@@ -0,0 +1,69 @@
+from conftest import small_university
+from f_schedule_store import ScheduleStore
+from r_records import ScheduledClass
+
+
+def lab(day, slot):
+    return ScheduledClass('A1', 'S1', 'C1', 'T1', day, slot, 'CL1', 'Lab: CL1')
+
+
+def test_add_remove_and_course_day_counts():
+    store = ScheduleStore()
+    first, second = lab('MON', 'S1'), lab('MON', 'S2')
+    store.add(first)
+    store.add(second)
+    store.add(ScheduledClass('A2', 'S2', 'C1', 'T2', 'MON', 'S1', 'R1', '1.5 Hr Class'))
+    assert len(store) == 3
+    assert store.classes_on_day('S1', 'C1', 'MON') == 2
+    assert list(store) == [first, second, store.entries[('MON', 'S1', 'S2', 'C1')]]
+
+    assert store.remove('MON', 'S1', 'S1', 'C1') == 1
+    assert store.remove('MON', 'S2', 'S1', 'C1') == 0
+    assert store.classes_on_day('S1', 'C1', 'MON') == 0
+    assert ('S1', 'C1', 'MON') not in store.course_day_count
+    # Removing a class that isn't there changes nothing
+    assert store.remove('TUE', 'S1', 'S1', 'C1') == 0
+    assert len(store) == 1
+
+
+def test_adding_the_same_key_twice_counts_once():
+    store = ScheduleStore()
+    first, again = lab('MON', 'S1'), lab('MON', 'S1')
+    store.add(first)
+    store.add(again)
+    assert len(store) == 1 and list(store) == [again]
+    assert store.classes_on_day('S1', 'C1', 'MON') == 1
+    assert store.remove('MON', 'S1', 'S1', 'C1') == 0
+    assert not store.course_day_count
+
+
+def test_duplicate_rows_load_consistently(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    row = {'Assignment_ID': 'A02', 'Section_ID': 'SA', 'Course_ID': 'C3', 'Teacher_ID': 'T2',
+           'Day': 'MON', 'Slot': 'S1', 'Room_or_Lab': 'R1', 'Type': '1.5 Hr Class'}
+    scheduler.load_schedule([row, dict(row)])
+    assert len(scheduler.schedule) == 1
+    scheduler.unassign_class('MON', 'S1', 'SA', 'T2', 'R1', 'C3')
+    assert not scheduler.is_course_already_scheduled_today('SA', 'C3', 'MON')
+    assert not scheduler.schedule.course_day_count
+
+
+def test_list_view_and_clear():
+    store = ScheduleStore()
+    store.add(lab('TUE', 'S3'))
+    assert store.to_list() == [{'Assignment_ID': 'A1', 'Section_ID': 'S1', 'Course_ID': 'C1',
+                                'Teacher_ID': 'T1', 'Day': 'TUE', 'Slot': 'S3',
+                                'Room_or_Lab': 'CL1', 'Type': 'Lab: CL1'}]
+    store.clear()
+    assert len(store) == 0 and not store.course_day_count
+
+
+def test_scheduler_keeps_the_course_day_until_the_last_lab_slot(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    info = {'Assignment_ID': 'A00', 'Course_ID': 'C1', 'Type': 'Lab: CL1'}
+    scheduler.assign_class('MON', 'S1', 'SA', 'T0', 'CL1', info)
+    scheduler.assign_class('MON', 'S2', 'SA', 'T0', 'CL1', info)
+    scheduler.unassign_class('MON', 'S1', 'SA', 'T0', 'CL1', 'C1')
+    assert scheduler.is_course_already_scheduled_today('SA', 'C1', 'MON')
+    scheduler.unassign_class('MON', 'S2', 'SA', 'T0', 'CL1', 'C1')
+    assert not scheduler.is_course_already_scheduled_today('SA', 'C1', 'MON')
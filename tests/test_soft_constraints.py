@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+import a_main
+from b_CSPTimetableScheduler import CSPTimetableScheduler
+from conftest import check_timetable, small_university, write_database
+from o_soft_constraints import DEFAULT_WEIGHTS, SoftConstraintOptimizer, day_mask_tables
+
+
+def test_day_mask_tables():
+    tables = day_mask_tables(4, late_slots=2)
+    # Slots 0 and 3 taken: two free slots between them, and slot 3 is late
+    assert tables['gaps'][0b1001] == 2
+    assert tables['load'][0b1001] == 4
+    assert tables['late'][0b1001] == 1
+    assert tables['gaps'][0b0110] == 0 and tables['late'][0b1100] == 2
+    assert tables['gaps'][0] == tables['load'][0] == tables['late'][0] == 0
+
+
+def test_unknown_weights_are_rejected(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    with pytest.raises(ValueError, match="Unknown soft constraints"):
+        SoftConstraintOptimizer(scheduler, weights={'gaps': 1})
+    with pytest.raises(ValueError, match="time_limit or max_iterations"):
+        SoftConstraintOptimizer(scheduler).run(time_limit=None)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_delta_matches_full_evaluation(make_scheduler, seed):
+    scheduler = make_scheduler(**small_university())
+    random.seed(seed)
+    scheduler.generate_timetable()
+    optimizer = SoftConstraintOptimizer(scheduler)
+    optimizer.run(time_limit=None, max_iterations=0)
+
+    moves = 0
+    for _ in range(2000):
+        move = optimizer._random_move()
+        if move is None:
+            continue
+        v, new = move
+        var, old = optimizer.variables[v], optimizer.values[v]
+        before = optimizer.evaluate()['total']
+        d = optimizer.delta(var, old, new)
+        optimizer._move(var, old, new)
+        optimizer.values[v] = new
+        assert optimizer.evaluate()['total'] - before == d
+        moves += 1
+    assert moves > 50
+    check_timetable(scheduler)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_optimize_keeps_hard_constraints_and_never_gets_worse(make_scheduler, seed):
+    scheduler = make_scheduler(**small_university())
+    random.seed(seed)
+    scheduler.generate_timetable()
+    classes = len(scheduler.schedule)
+
+    report = scheduler.optimize_timetable(time_limit=None, max_iterations=3000)
+    assert report['iterations'] == 3000
+    assert report['after']['total'] <= report['before']['total']
+    assert len(scheduler.schedule) == classes
+    check_timetable(scheduler)
+    # The report matches a fresh evaluation of the timetable left behind
+    fresh = SoftConstraintOptimizer(scheduler)
+    fresh.run(time_limit=None, max_iterations=0)
+    assert fresh.evaluate() == report['after']
+
+
+def test_weights_change_the_objective(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    scheduler.generate_timetable()
+    report = scheduler.optimize_timetable(time_limit=None, max_iterations=3000,
+                                          weights={'late_slots': 50})
+    assert report['after']['total'] == sum(
+        {**DEFAULT_WEIGHTS, 'late_slots': 50}[name] * report['after'][name] for name in DEFAULT_WEIGHTS)
+    assert report['after']['late_slots'] <= report['before']['late_slots']
+
+
+def test_classes_matching_no_variable_are_left_alone(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    scheduler.generate_timetable()
+    # A00's classes stay in the schedule but no longer match any assignment
+    scheduler.assignments = [a for a in scheduler.assignments if a['Assignment_ID'] != 'A00']
+    extra = [cls.to_dict() for cls in scheduler.schedule if cls.assignment_id == 'A00']
+    assert extra
+
+    SoftConstraintOptimizer(scheduler).run(time_limit=None, max_iterations=2000)
+    assert [cls.to_dict() for cls in scheduler.schedule if cls.assignment_id == 'A00'] == extra
+    check_timetable(scheduler)
+
+
+@pytest.mark.parametrize('options, optimized, local_search', [
+    ({}, False, False),
+    ({'local_search': True, 'optimize_time_limit': 1}, True, True),
+])
+def test_main_optimizes_only_when_asked(tmp_path, monkeypatch, options, optimized, local_search):
+    monkeypatch.chdir(tmp_path)
+    write_database(tmp_path / 'university_database.xlsx', **small_university())
+    calls = {}
+    monkeypatch.setattr(CSPTimetableScheduler, 'optimize_timetable',
+                        lambda self, time_limit: calls.setdefault('optimize', time_limit))
+    generate_timetable = CSPTimetableScheduler.generate_timetable
+
+    def spy(self, **kwargs):
+        calls['local_search'] = kwargs.get('local_search', False)
+        return generate_timetable(self, **kwargs)
+
+    monkeypatch.setattr(CSPTimetableScheduler, 'generate_timetable', spy)
+    random.seed(0)
+    a_main.main(**options)
+    assert ('optimize' in calls) == optimized
+    assert calls['local_search'] == local_search
+    assert (tmp_path / 'generated_timetable_csp.xlsx').exists()
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from conftest import assignment, check_timetable, course, small_university
+
+
+def lab_window_instance(make_scheduler):
+    """
+    One day, four slots, two labs of one type. XA can only take S1-S2 and XB
+    only S2-S3 (teacher blocks), and L2 is blocked at S3: XA must go to L2.
+    """
+    scheduler = make_scheduler(
+        labs=[('L1', 40, 'C'), ('L2', 40, 'C')],
+        courses=[course('CA', theory=0, lab_type='C'), course('CB', theory=0, lab_type='C')],
+        assignments=[assignment('XA', 'SA', 'CA', 'TA'), assignment('XB', 'SB', 'CB', 'TB')])
+    for slot in ('S3', 'S4'):
+        scheduler.block_cell('teacher', 'TA', 'MON', slot)
+    for slot in ('S1', 'S4'):
+        scheduler.block_cell('teacher', 'TB', 'MON', slot)
+    scheduler.block_cell('room', 'L2', 'MON', 'S3')
+    return scheduler
+
+
+@pytest.mark.parametrize('symmetry_breaking', [True, False])
+@pytest.mark.parametrize('backjumping', [True, False])
+def test_labs_with_different_busy_cells_are_not_equivalent(make_scheduler, symmetry_breaking, backjumping):
+    scheduler = lab_window_instance(make_scheduler)
+    random.seed(0)
+    success_count, failed = scheduler.generate_timetable(symmetry_breaking=symmetry_breaking,
+                                                         backjumping=backjumping)
+    assert success_count == 2 and not failed
+    check_timetable(scheduler)
+    labs = {cls.assignment_id: cls.room_or_lab for cls in scheduler.schedule}
+    assert labs == {'XA': 'L2', 'XB': 'L1'}
+
+
+def test_symmetry_breaking_skips_equivalent_rooms(make_scheduler):
+    scheduler = make_scheduler(
+        rooms=[('R1', 40, False), ('R2', 40, False), ('R3', 40, False)],
+        courses=[course('C1', theory=2)],
+        assignments=[assignment('A1', 'SA', 'C1', 'T1')],
+        days=('MON', 'TUE'))
+    scheduler.generate_timetable()
+    assert len(scheduler.schedule) == 2
+    assert scheduler.stats.counters['symmetric_rooms_skipped'] > 0
+    # Sibling sessions take increasing days
+    assert [cls.day for cls in scheduler.schedule] in (['MON', 'TUE'], ['TUE', 'MON'])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_symmetry_breaking_keeps_solutions(make_scheduler, seed):
+    for symmetry_breaking in (True, False):
+        scheduler = make_scheduler(**small_university())
+        random.seed(seed)
+        success_count, failed = scheduler.generate_timetable(symmetry_breaking=symmetry_breaking)
+        assert success_count == len(scheduler.assignments) and not failed
+        check_timetable(scheduler)
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from conftest import small_university
+from e_forward_checking import ForwardChecker
+
+pytest.importorskip('numpy')
+
+
+def checker_state(scheduler):
+    variables = scheduler.build_variables(scheduler.assignments)
+    for var_id, var in enumerate(variables):
+        var.id = var_id
+    checker = ForwardChecker(scheduler, variables)
+    return checker.block, checker.free, checker.size
+
+
+def partly_filled(make_scheduler, domain_engine):
+    scheduler = make_scheduler(domain_engine=domain_engine, **small_university())
+    scheduler.block_cell('room', 'CL1', 'TUE', 'S2')
+    scheduler.block_cell('room', 'R3', 'MON', 'S1')
+    scheduler.block_cell('teacher', 'T1', 'WED', 'S3')
+    scheduler.assign_class('MON', 'S2', 'SA', 'T0', 'R1', {'Assignment_ID': 'A00', 'Course_ID': 'C1',
+                                                          'Type': '1.5 Hr Class'})
+    scheduler.assign_class('TUE', 'S3', 'SB', 'T1', 'CL2', {'Assignment_ID': 'A10', 'Course_ID': 'C1',
+                                                           'Type': 'Lab: CL2'})
+    return scheduler
+
+
+def test_numpy_engine_sets_up_the_same_domains(make_scheduler):
+    python_state = checker_state(partly_filled(make_scheduler, 'python'))
+    numpy_state = checker_state(partly_filled(make_scheduler, 'numpy'))
+    assert numpy_state == python_state
+
+
+def test_free_counts_match_bitmask_check(make_scheduler):
+    scheduler = partly_filled(make_scheduler, 'numpy')
+    times = [(day, 'S2', 'S3') for day in scheduler.day_list]
+    labs = ('CL1', 'CL2')
+    expected = [sum(1 for lab in labs if not scheduler.room_busy.get(lab, 0)
+                    & scheduler.get_window_mask(day, slots))
+                for day, *slots in times]
+    assert scheduler.tensor_engine.free_counts(labs, times) == expected == [2, 0, 2]
+
+
+def test_engines_search_the_same_way(make_scheduler):
+    schedules = []
+    for domain_engine in ('python', 'numpy'):
+        scheduler = make_scheduler(domain_engine=domain_engine, **small_university())
+        random.seed(3)
+        scheduler.generate_timetable()
+        schedules.append(scheduler.schedule.to_list())
+        nodes = scheduler.stats.counters['nodes']
+    assert schedules[0] == schedules[1] and nodes > 0
+
+
+@pytest.mark.parametrize('skip_scheduled_days', [False, True])
+def test_engines_generate_the_same_domains_for_every_assignment(make_scheduler, skip_scheduled_days):
+    python, numpy = (partly_filled(make_scheduler, engine) for engine in ('python', 'numpy'))
+    assert numpy.tensor_engine is not None and python.tensor_engine is None
+    values = 0
+    for row in python.assignments:
+        course = python.course_dict[row['Course_ID']]
+        domains = [scheduler.get_theory_domain(row, course['Is_2Hour_Special'],
+                                               skip_scheduled_days=skip_scheduled_days)
+                   for scheduler in (python, numpy)]
+        if course['Has_Lab']:
+            domains += [scheduler.get_lab_domain(row, skip_scheduled_days=skip_scheduled_days)
+                        for scheduler in (python, numpy)]
+        for python_domain, numpy_domain in zip(domains[::2], domains[1::2]):
+            assert sorted(numpy_domain) == sorted(python_domain)
+            values += len(python_domain)
+    assert values > 0
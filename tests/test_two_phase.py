@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from conftest import assignment, check_timetable, course, small_university
+from e_forward_checking import ForwardChecker
+from q_room_matching import RoomMatcher
+
+
+def mixed_rooms(make_scheduler, slots=1):
+    """A multimedia room of 35 and a plain room of 40; X needs no multimedia, Y and Z do."""
+    return make_scheduler(
+        rooms=[('RM', 35, True), ('RP', 40, False)],
+        courses=[course('CX'), course('CY', multimedia=True), course('CZ', multimedia=True)],
+        assignments=[assignment('X', 'SX', 'CX', 'TX'), assignment('Y', 'SY', 'CY', 'TY'),
+                     assignment('Z', 'SZ', 'CZ', 'TZ')],
+        slots=slots)
+
+
+def phase_one_checker(scheduler):
+    variables = scheduler.build_variables(scheduler.assignments)
+    for var_id, var in enumerate(variables):
+        var.id = var_id
+    return ForwardChecker(scheduler, variables, two_phase=True), variables
+
+
+def test_phase_one_counts_room_capacity(make_scheduler):
+    scheduler = mixed_rooms(make_scheduler)
+    checker, (x, y, z) = phase_one_checker(scheduler)
+    assert checker.get_time_values(x) == [('MON', 'S1', None)]
+
+    # X takes no room in phase one: the best fit (RM) is still there for Y
+    checker.assign(x, ('MON', 'S1', None))
+    assert scheduler.room_busy.get('RM', 0) == 0
+    assert checker.get_time_values(y) == [('MON', 'S1', None)]
+    checker.assign(y, ('MON', 'S1', None))
+    assert checker.domain_size(z) == 0
+    assert checker.conflict_set(z) == {0: False, 1: False}
+
+    checker.undo()
+    assert checker.domain_size(z) == 1
+    checker.undo()
+    assert checker.domain_size(y) == 1 and checker.domain_size(z) == 1
+
+
+@pytest.mark.parametrize('backjumping', [True, False])
+def test_two_phase_seats_every_class(make_scheduler, backjumping):
+    scheduler = mixed_rooms(make_scheduler, slots=2)
+    random.seed(0)
+    success_count, failed = scheduler.generate_timetable(two_phase=True, backjumping=backjumping)
+    assert success_count == 3 and not failed
+    check_timetable(scheduler)
+    assert all(cls.room_or_lab is not None for cls in scheduler.schedule)
+    assert scheduler.room_busy['RM'].bit_count() + scheduler.room_busy['RP'].bit_count() == 3
+
+
+def test_two_phase_keeps_the_best_partial(make_scheduler):
+    # Three classes need multimedia, only two (day, slot) cells have a room for them
+    scheduler = make_scheduler(
+        rooms=[('RM', 35, True), ('RP', 40, False)],
+        courses=[course('CY', multimedia=True)],
+        assignments=[assignment(f"Y{i}", f"S{i}", 'CY', f"T{i}") for i in range(3)],
+        slots=2)
+    success_count, _ = scheduler.generate_timetable(two_phase=True)
+    assert success_count == 2
+    assert {cls.room_or_lab for cls in scheduler.schedule} == {'RM'}
+    check_timetable(scheduler)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_two_phase_solves_small_university(make_scheduler, seed):
+    scheduler = make_scheduler(**small_university())
+    random.seed(seed)
+    success_count, failed = scheduler.generate_timetable(two_phase=True)
+    assert success_count == len(scheduler.assignments) and not failed
+    check_timetable(scheduler)
+
+
+def test_reopened_rounds_share_the_node_limit(make_scheduler, monkeypatch):
+    # Two days and two rooms: phase one can't place every theory class
+    scheduler = make_scheduler(**dict(small_university(), rooms=[('R1', 40, True), ('R2', 40, False)],
+                                      days=('MON', 'TUE')))
+    rounds = []
+    solve_variables = scheduler.solve_variables
+
+    def spy(variables, *args, **kwargs):
+        if not args:  # Re-opened phase one (generate_timetable passes its options by position)
+            rounds.append((kwargs['node_limit'], scheduler.stats.counters['nodes']))
+        return solve_variables(variables, *args, **kwargs)
+
+    monkeypatch.setattr(scheduler, 'solve_variables', spy)
+    random.seed(0)
+    scheduler.generate_timetable(two_phase=True, node_limit=1000)
+    check_timetable(scheduler)
+    assert rounds
+    for node_limit, nodes in rounds:
+        assert node_limit == 1000 - nodes
+    assert scheduler.stats.counters['nodes'] <= 1000
+    assert scheduler.stats.counters['rooms_reseated'] == 0
+
+
+def test_run_counts_only_its_own_reseats(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    random.seed(0)
+    scheduler.generate_timetable(two_phase=True)
+    counted = scheduler.stats.counters['rooms_reseated']
+    matcher = RoomMatcher(scheduler)
+    matcher.reseated = 3  # Re-seats of an earlier call on the same matcher
+    assert matcher.run()
+    assert scheduler.stats.counters['rooms_reseated'] == counted
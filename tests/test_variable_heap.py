@@ -0,0 +1,89 @@
+import random
+from types import SimpleNamespace
+
+from conftest import check_timetable, small_university
+from e_forward_checking import ForwardChecker, VariableHeap
+
+
+def fake_checker(count):
+    variables = [SimpleNamespace(id=v) for v in range(count)]
+    return SimpleNamespace(variables=variables, changed=set())
+
+
+def test_best_follows_changed_ranks_and_skips_stale_entries():
+    checker = fake_checker(4)
+    keys = {0: 5, 1: 3, 2: 7, 3: 1}
+    heap = VariableHeap(checker, lambda var: keys[var.id], checker.variables)
+    assert len(heap) == 4 and heap.best().id == 3
+
+    # A rank change is only seen once the variable is marked as changed
+    keys[0] = 0
+    assert heap.best().id == 3
+    checker.changed.add(0)
+    assert heap.best().id == 0
+
+    heap.remove(checker.variables[0])
+    heap.remove(checker.variables[3])
+    assert len(heap) == 2 and heap.best().id == 1
+    # Changed but assigned variables are not pushed back
+    checker.changed.add(3)
+    assert heap.best().id == 1
+
+    heap.add(checker.variables[3])
+    heap.add(checker.variables[3])
+    assert len(heap) == 3 and heap.best().id == 3
+    for var in checker.variables:
+        heap.remove(var)
+    assert len(heap) == 0 and heap.best() is None
+
+
+def test_stale_entries_are_compacted():
+    checker = fake_checker(3)
+    keys = [0, 1, 2]
+    heap = VariableHeap(checker, lambda var: keys[var.id], checker.variables)
+    for step in range(200):
+        keys[1] = -step - 1
+        checker.changed.add(1)
+        assert heap.best().id == 1
+    assert len(heap.heap) <= 4 * len(heap) + 64 + 1
+    assert heap.refreshed == 3 + 200
+
+
+def test_heap_agrees_with_a_scan_through_search(make_scheduler):
+    scheduler = make_scheduler(**small_university())
+    variables = scheduler.build_variables(scheduler.assignments)
+    for var_id, var in enumerate(variables):
+        var.id = var_id
+    checker = ForwardChecker(scheduler, variables)
+
+    def rank(var):
+        return (checker.earliest_slot(var), checker.domain_size(var), var.id)
+
+    heap = VariableHeap(checker, rank, variables)
+    rng = random.Random(0)
+    assigned = []
+    for _ in range(60):
+        if assigned and (rng.random() < 0.3 or heap.best() is None):
+            checker.undo()
+            heap.add(assigned.pop())
+            continue
+        var = heap.best()
+        if var is None:
+            continue
+        unassigned = [w for w in variables if not checker.assigned[w.id]]
+        assert var is min(unassigned, key=rank)
+        values = checker.get_values(var)
+        if not values:
+            continue
+        heap.remove(var)
+        checker.assign(var, rng.choice(values))
+        assigned.append(var)
+
+
+def test_every_heuristic_solves(make_scheduler):
+    for heuristic in ('earliest-slot', 'mrv', 'labs-first'):
+        scheduler = make_scheduler(**small_university())
+        random.seed(0)
+        success_count, failed = scheduler.generate_timetable(heuristic=heuristic)
+        assert success_count == len(scheduler.assignments) and not failed
+        check_timetable(scheduler)